@@ -0,0 +1,63 @@
+"""
+/anonymize yöntemlerinin yoğunluğa göre maliyeti.
+
+Gaussian blur'ün süresi çekirdek boyutuyla artar; box_blur (kayan toplam) ve
+pixelate (küçült-büyüt) piksel başına sabit maliyetlidir. Her yöntem, en büyük
+yüz kutusu üzerinde farklı yoğunluklarla ölçülür.
+
+Kullanım (backend klasöründen):
+    python -m benchmarks.anonymize
+    python -m benchmarks.anonymize --resolutions 12mp 48mp --intensities 5 25 75 151 --repeat 5
+"""
+import argparse
+import json
+import statistics
+import time
+
+import main
+from benchmarks.synthetic import RESOLUTIONS, phone_photo
+
+def run(resolutions, methods, intensities, repeat: int) -> list:
+    rows = []
+    for resolution in resolutions:
+        image, boxes = phone_photo(resolution, faces=3)
+        x, y, w, h = max(boxes, key=lambda box: box[2] * box[3])
+        coords = {"top": y, "right": x + w, "bottom": y + h, "left": x}
+        for method in methods:
+            for intensity in intensities:
+                timings = []
+                for _ in range(repeat):
+                    target = image.copy()
+                    start = time.perf_counter()
+                    main.anonymize_region(target, coords, method, intensity)
+                    timings.append((time.perf_counter() - start) * 1000)
+                rows.append({
+                    "resolution": resolution,
+                    "method": method,
+                    "intensity": intensity,
+                    "face_px": w,
+                    "median_ms": round(statistics.median(timings), 3)
+                })
+    return rows
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolutions", nargs="+", default=["12mp"], help=", ".join(RESOLUTIONS))
+    parser.add_argument("--methods", nargs="+", default=["blur", "box_blur", "pixelate"])
+    parser.add_argument("--intensities", nargs="+", type=int, default=[5, 15, 51, 151])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    rows = run(args.resolutions, args.methods, args.intensities, args.repeat)
+
+    print(f"{'resolution':<10} {'method':<9} {'intensity':>9} {'median_ms':>10}")
+    for row in rows:
+        print(f"{row['resolution']:<10} {row['method']:<9} {row['intensity']:>9} {row['median_ms']:>10}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+if __name__ == "__main__":
+    main_cli()
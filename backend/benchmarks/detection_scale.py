@@ -0,0 +1,74 @@
+"""
+Küçült-tespit et-büyüt modunun gecikme / recall dengesi.
+
+Her tespit üst sınırı (uzun kenar) için sentetik telefon fotoğraflarında
+detect_objects süresini ve bilinen yüzlere göre recall'u ölçer.
+
+Kullanım (backend klasöründen):
+    python -m benchmarks.detection_scale
+    python -m benchmarks.detection_scale --resolutions 12mp 48mp --caps 0 2048 1280 960 --repeat 3
+    python -m benchmarks.detection_scale --json detection_scale.json
+"""
+import argparse
+import json
+import statistics
+import time
+
+import cv2
+
+import main
+from benchmarks.synthetic import iou, phone_photo
+
+def match_count(found, expected, threshold: float = 0.3) -> int:
+    """Beklenen kutulardan kaçının bir tespitle eşleştiği"""
+    return sum(1 for box in expected if any(iou(box, tuple(rect)) >= threshold for rect in found))
+
+def run(resolutions, caps, photos: int, faces: int, repeat: int) -> list:
+    main.detector_registry.load_all()
+    rows = []
+    for resolution in resolutions:
+        samples = [phone_photo(resolution, faces=faces, seed=seed) for seed in range(photos)]
+        samples = [(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), boxes) for image, boxes in samples]
+        for cap in caps:
+            timings = []
+            found_total = 0
+            expected_total = 0
+            for gray, boxes in samples:
+                for attempt in range(repeat):
+                    start = time.perf_counter()
+                    rects = main.detect_objects(gray, "face", max_side=cap, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
+                    timings.append((time.perf_counter() - start) * 1000)
+                found_total += match_count(rects, boxes)
+                expected_total += len(boxes)
+            rows.append({
+                "resolution": resolution,
+                "max_side": cap,
+                "median_ms": round(statistics.median(timings), 2),
+                "recall": round(found_total / expected_total, 3) if expected_total else None,
+                "faces": expected_total
+            })
+    return rows
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolutions", nargs="+", default=["1mp", "12mp"], help="1mp, 12mp, 48mp")
+    parser.add_argument("--caps", nargs="+", type=int, default=[0, 2048, 1600, 1280, 960, 640], help="0 = full resolution")
+    parser.add_argument("--photos", type=int, default=3)
+    parser.add_argument("--faces", type=int, default=4, help="Faces per photo")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    rows = run(args.resolutions, args.caps, args.photos, args.faces, args.repeat)
+
+    print(f"{'resolution':<10} {'max_side':>8} {'median_ms':>10} {'recall':>7}")
+    for row in rows:
+        cap = row["max_side"] or "full"
+        print(f"{row['resolution']:<10} {cap:>8} {row['median_ms']:>10} {row['recall']:>7}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+if __name__ == "__main__":
+    main_cli()
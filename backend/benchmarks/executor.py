@@ -0,0 +1,107 @@
+"""
+Thread ve process havuzunun toplu iş verimi, paylaşımlı bellek aktarımının maliyeti.
+
+İki ölçüm yapılır:
+  handoff  - verilen boyutta bir görsel tamponu worker'a gidip geri döner
+             (main.source_bytes); pickle ile paylaşımlı bellek karşılaştırılır
+  batch    - closure ceremony dönüşümü (NumPy/PIL ağırlıklı, GIL tutar) bir
+             grup fotoğrafa eşzamanlı uygulanır; thread ve process havuzu karşılaştırılır
+
+Kullanım (backend klasöründen):
+    python -m benchmarks.executor
+    python -m benchmarks.executor --workers 4 --images 16 --ceremony abstract --json executor.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+import cv2
+import numpy as np
+
+import main
+from benchmarks.synthetic import RESOLUTIONS, phone_photo
+
+def make_executor(kind: str, workers: int) -> main.ImageExecutor:
+    return main.ImageExecutor(kind, workers, workers, {})
+
+async def run_batch(executor: main.ImageExecutor, fn, payloads: list) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(executor.run("benchmark", fn, *payload) for payload in payloads))
+    return (time.perf_counter() - start) * 1000
+
+def handoff(sizes_mb, repeat: int) -> list:
+    rows = []
+    executor = make_executor("process", 1)
+    try:
+        for size_mb in sizes_mb:
+            payload = os.urandom(int(size_mb * 1024 * 1024))
+            for shared in (False, True):
+                main.SHARED_MEMORY_ENABLED = shared
+                # Worker'ı ısıt
+                asyncio.run(run_batch(executor, main.source_bytes, [(payload,)]))
+                timings = [asyncio.run(run_batch(executor, main.source_bytes, [(payload,)])) for _ in range(repeat)]
+                rows.append({
+                    "size_mb": size_mb,
+                    "transport": "shared_memory" if shared else "pickle",
+                    "round_trip_ms": round(statistics.median(timings), 2)
+                })
+    finally:
+        main.SHARED_MEMORY_ENABLED = True
+        executor.shutdown()
+    return rows
+
+def batch(resolution: str, images: int, workers: int, ceremony: str) -> list:
+    jpegs = [
+        cv2.imencode(".jpg", phone_photo(resolution, faces=2, seed=seed)[0], [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+        for seed in range(images)
+    ]
+    payloads = [(jpeg, ceremony, "van_gogh", "jpeg") for jpeg in jpegs]
+    rows = []
+    for kind in ("thread", "process"):
+        executor = make_executor(kind, workers)
+        try:
+            # Havuzu ve cascade'leri ısıt
+            asyncio.run(run_batch(executor, main.closure_transform_sync, payloads[:workers]))
+            elapsed = asyncio.run(run_batch(executor, main.closure_transform_sync, payloads))
+        finally:
+            executor.shutdown()
+        rows.append({
+            "executor": kind,
+            "workers": workers,
+            "ceremony": ceremony,
+            "images": images,
+            "total_ms": round(elapsed, 1),
+            "images_per_second": round(images / (elapsed / 1000), 2)
+        })
+    return rows
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--images", type=int, default=8)
+    parser.add_argument("--resolution", default="1mp", help=", ".join(RESOLUTIONS))
+    parser.add_argument("--ceremony", default="healing", help="artistic, dreamy, abstract, healing")
+    parser.add_argument("--sizes", nargs="+", type=float, default=[1, 8, 32], help="Handoff payload sizes in MB")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    handoff_rows = handoff(args.sizes, args.repeat)
+    print(f"{'size_mb':>8} {'transport':<14} {'round_trip_ms':>14}")
+    for row in handoff_rows:
+        print(f"{row['size_mb']:>8} {row['transport']:<14} {row['round_trip_ms']:>14}")
+
+    batch_rows = batch(args.resolution, args.images, args.workers, args.ceremony)
+    print(f"\n{'executor':<9} {'workers':>7} {'images':>7} {'total_ms':>10} {'img/s':>7}")
+    for row in batch_rows:
+        print(f"{row['executor']:<9} {row['workers']:>7} {row['images']:>7} {row['total_ms']:>10} {row['images_per_second']:>7}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"handoff": handoff_rows, "batch": batch_rows}, f, indent=2)
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,93 @@
+"""
+Tekrar eden kişi aramalarında galeri indeksi ile /scan-gallery yaklaşımının karşılaştırması.
+
+/scan-gallery her aramada tüm galeriyi decode edip yüzleri yeniden bulur;
+indeks bu işi fotoğraf eklenirken bir kez yapar ve aramayı tek bir
+matris-vektör çarpımına indirir. Benzerlik skorlarının template matching
+skorlarından ne kadar saptığı da raporlanır.
+
+Kullanım (backend klasöründen):
+    python -m benchmarks.gallery_index
+    python -m benchmarks.gallery_index --photos 200 --resolution 1mp --repeat 20 --json gallery.json
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+import main
+from benchmarks.synthetic import RESOLUTIONS, phone_photo
+
+def build_gallery(count: int, resolution: str) -> list:
+    """Farklı seed'lerle JPEG olarak kodlanmış galeri fotoğrafları"""
+    gallery = []
+    for seed in range(count):
+        image, _ = phone_photo(resolution, faces=3, seed=seed)
+        gallery.append(cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes())
+    return gallery
+
+def run(photos: int, resolution: str, repeat: int) -> dict:
+    gallery = build_gallery(photos, resolution)
+    reference = main.extract_reference_face(gallery[0])["face"]
+
+    start = time.perf_counter()
+    scanned = [main.score_target_faces(image, reference) for image in gallery]
+    scan_ms = (time.perf_counter() - start) * 1000
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = main.GalleryIndex.create(directory, "benchmark", "benchmark")
+        start = time.perf_counter()
+        for i, image in enumerate(gallery):
+            index.add(str(i), str(i), main.index_photo_sync(image))
+        build_ms = (time.perf_counter() - start) * 1000
+
+        descriptor = main.face_descriptor(reference)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = index.search(descriptor, -1.0)
+            timings.append((time.perf_counter() - start) * 1000)
+        index.close()
+
+    # Aynı yüz kutuları için iki skorun farkı
+    indexed = {(r["photo_id"], tuple(m["coordinates"].values())): m["similarity"] for r in results for m in r["matches"]}
+    diffs = [
+        abs(face["similarity"] - indexed[(str(i), tuple(face["coordinates"].values()))])
+        for i, result in enumerate(scanned) for face in result["faces"]
+        if (str(i), tuple(face["coordinates"].values())) in indexed
+    ]
+    faces = sum(len(r["matches"]) for r in results)
+    return {
+        "resolution": resolution,
+        "photos": photos,
+        "faces": faces,
+        "scan_gallery_ms": round(scan_ms, 2),
+        "index_build_ms": round(build_ms, 2),
+        "index_search_ms": round(statistics.median(timings), 3),
+        "speedup": round(scan_ms / statistics.median(timings), 1),
+        "max_similarity_diff": round(max(diffs), 4) if diffs else None,
+        "mean_similarity_diff": round(float(np.mean(diffs)), 4) if diffs else None
+    }
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--photos", type=int, default=50)
+    parser.add_argument("--resolution", default="1mp", help=", ".join(RESOLUTIONS))
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    row = run(args.photos, args.resolution, args.repeat)
+    for key, value in row.items():
+        print(f"{key:<22} {value}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(row, f, indent=2)
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,82 @@
+"""
+Inpainting ön ayarlarının gecikme / kalite dengesi.
+
+Sentetik fotoğrafın yüzsüz hali aynı seed ile üretilebildiği için gerçek arka
+plan bilinir; kalite, silinen dairesel bölgede bu arka plana göre PSNR olarak
+ölçülür (yüksek = daha iyi).
+
+Kullanım (backend klasöründen):
+    python -m benchmarks.inpainting
+    python -m benchmarks.inpainting --resolutions 12mp 48mp --presets quality fast --repeat 3 --json inpaint.json
+"""
+import argparse
+import json
+import statistics
+import time
+
+import cv2
+import numpy as np
+
+import main
+from benchmarks.synthetic import RESOLUTIONS, phone_photo, synthetic_photo
+
+def psnr(expected: np.ndarray, actual: np.ndarray, mask: np.ndarray) -> float:
+    diff = (expected.astype(np.float64) - actual.astype(np.float64))[mask > 0]
+    mse = float(np.mean(diff ** 2)) if diff.size else 0.0
+    return round(10 * np.log10(255 ** 2 / mse), 2) if mse else float("inf")
+
+def removal_mask(shape: tuple, coords: dict) -> np.ndarray:
+    """apply_advanced_inpainting'in sildiği daire (tam kare koordinatlarında)"""
+    h, w = shape[:2]
+    top, bottom = max(0, coords["top"] - 20), min(h, coords["bottom"] + 20)
+    left, right = max(0, coords["left"] - 20), min(w, coords["right"] + 20)
+    mask = np.zeros((h, w), dtype=np.uint8)
+    radius = max((right - left) // 2, (bottom - top) // 2)
+    cv2.circle(mask, ((left + right) // 2, (top + bottom) // 2), radius, 255, -1)
+    return mask
+
+def run(resolutions, presets, repeat: int) -> list:
+    rows = []
+    for resolution in resolutions:
+        image, boxes = phone_photo(resolution, faces=3)
+        width, height = RESOLUTIONS[resolution]
+        background, _ = synthetic_photo(width, height, (), seed=0)
+        x, y, w, h = max(boxes, key=lambda box: box[2] * box[3])
+        coords = {"top": y, "right": x + w, "bottom": y + h, "left": x}
+        mask = removal_mask(image.shape, coords)
+
+        for preset in presets:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = main.apply_advanced_inpainting(image, coords, preset=preset)
+                timings.append((time.perf_counter() - start) * 1000)
+            rows.append({
+                "resolution": resolution,
+                "preset": preset,
+                "face_px": w,
+                "median_ms": round(statistics.median(timings), 2),
+                "psnr_db": psnr(background, result, mask)
+            })
+    return rows
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolutions", nargs="+", default=["1mp", "12mp"], help=", ".join(RESOLUTIONS))
+    parser.add_argument("--presets", nargs="+", default=list(main.INPAINT_PRESETS))
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    rows = run(args.resolutions, args.presets, args.repeat)
+
+    print(f"{'resolution':<10} {'preset':<9} {'face_px':>7} {'median_ms':>10} {'psnr_db':>8}")
+    for row in rows:
+        print(f"{row['resolution']:<10} {row['preset']:<9} {row['face_px']:>7} {row['median_ms']:>10} {row['psnr_db']:>8}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+if __name__ == "__main__":
+    main_cli()
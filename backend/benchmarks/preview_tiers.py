@@ -0,0 +1,84 @@
+"""
+/artify-photo ve seremoni efektlerinde önizleme (preview) ile son (final) katmanın süresi.
+
+İki süre raporlanır:
+  render_ms      - decode edilmiş görsele filtrenin uygulanması
+  end_to_end_ms  - JPEG decode + filtre + JPEG encode (artify_photo_sync /
+                   closure_transform_sync), endpoint'in havuzda yaptığı iş
+
+Önizleme küçültülmüş görselde ölçeğe uyarlanmış çekirdeklerle ve yaklaşık
+parametrelerle (bilinear küçültme, abstract için daha az k-means denemesi)
+çalışır; çıktının boyutu da raporlanır.
+
+Kullanım (backend klasöründen):
+    python -m benchmarks.preview_tiers
+    python -m benchmarks.preview_tiers --resolution 48mp --styles van_gogh sketch --effects dreamy --json tiers.json
+"""
+import argparse
+import json
+import statistics
+import time
+
+import cv2
+
+import main
+from benchmarks.synthetic import RESOLUTIONS, phone_photo
+
+def median_ms(fn, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, round(statistics.median(timings), 1)
+
+def art_renderer(style: str):
+    return lambda image, tier: main.apply_art_style(image, style, tier)
+
+def run(resolution: str, styles, effects, repeat: int) -> list:
+    # Önbellek ölçümü bozmasın
+    main.CACHE_ENABLED = False
+    image, _ = phone_photo(resolution, faces=3)
+    jpeg = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+    cases = [(style, "artistic", art_renderer(style)) for style in styles]
+    cases += [(effect, effect, main.PIPELINE_EFFECTS[effect]) for effect in effects]
+
+    rows = []
+    for name, ceremony, render in cases:
+        for tier in main.RENDER_TIERS:
+            output, render_ms = median_ms(lambda: render(image.copy(), tier), repeat)
+            _, end_to_end_ms = median_ms(
+                lambda: main.closure_transform_sync(jpeg, ceremony, name, "jpeg", main.DEFAULT_IMAGE_QUALITY, tier), repeat
+            )
+            rows.append({
+                "resolution": resolution,
+                "filter": name,
+                "tier": tier,
+                "output": f"{output.shape[1]}x{output.shape[0]}",
+                "render_ms": render_ms,
+                "end_to_end_ms": end_to_end_ms
+            })
+    return rows
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolution", default="12mp", help=", ".join(RESOLUTIONS))
+    parser.add_argument("--styles", nargs="+", default=["van_gogh", "monet", "picasso", "sketch"])
+    parser.add_argument("--effects", nargs="+", default=list(main.PIPELINE_EFFECTS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    rows = run(args.resolution, args.styles, args.effects, args.repeat)
+
+    print(f"{'filter':<10} {'tier':<8} {'output':>10} {'render_ms':>10} {'e2e_ms':>9}")
+    for row in rows:
+        print(f"{row['filter']:<10} {row['tier']:<8} {row['output']:>10} {row['render_ms']:>10} {row['end_to_end_ms']:>9}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,101 @@
+"""
+Tespit yollarında renkli tam decode ile doğrudan gri / küçük (DCT ölçekli) decode karşılaştırması.
+
+Eski yol: load_image (renkli, tam çözünürlük) + cvtColor + detect_objects.
+Yeni yol: load_gray (gri, max_side varsa JPEG 1/2-1/8 ölçekli) + GrayImage.detect,
+kutular orijinal koordinatlara çevrilir. Decode süresi, toplam tespit süresi ve
+iki yolun bulduğu yüz kutularının en düşük IoU'su raporlanır.
+
+Kullanım (backend klasöründen):
+    python -m benchmarks.reduced_decode
+    python -m benchmarks.reduced_decode --resolutions 12mp 48mp --max-sides 0 640 1024 --json decode.json
+"""
+import argparse
+import json
+import statistics
+import time
+
+import cv2
+import numpy as np
+
+import main
+from benchmarks.synthetic import RESOLUTIONS, phone_photo
+
+FACE_PARAMS = {"scaleFactor": 1.1, "minNeighbors": 5, "minSize": (30, 30)}
+
+def median_ms(fn, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, round(statistics.median(timings), 1)
+
+def color_path(data: bytes, max_side: int) -> np.ndarray:
+    gray = cv2.cvtColor(main.load_image(data), cv2.COLOR_BGR2GRAY)
+    return main.detect_objects(gray, "face", max_side=max_side, **FACE_PARAMS)
+
+def gray_path(data: bytes, max_side: int) -> np.ndarray:
+    frame = main.load_gray(data, max_side)
+    return frame.to_original(frame.detect("face", max_side=max_side, **FACE_PARAMS))
+
+def min_iou(reference: np.ndarray, candidate: np.ndarray) -> float:
+    """Her referans kutusunun adaydaki en iyi eşleşmesinin en kötüsü"""
+    if len(reference) != len(candidate):
+        return 0.0
+    worst = 1.0
+    for x, y, w, h in reference:
+        best = 0.0
+        for cx, cy, cw, ch in candidate:
+            iw = max(0, min(x + w, cx + cw) - max(x, cx))
+            ih = max(0, min(y + h, cy + ch) - max(y, cy))
+            inter = iw * ih
+            best = max(best, inter / (w * h + cw * ch - inter))
+        worst = min(worst, best)
+    return round(float(worst), 3)
+
+def run(resolutions, max_sides, repeat: int) -> list:
+    rows = []
+    for resolution in resolutions:
+        image, _ = phone_photo(resolution, faces=3)
+        data = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+        _, color_decode_ms = median_ms(lambda: main.load_image(data), repeat)
+        for max_side in max_sides:
+            _, gray_decode_ms = median_ms(lambda: main.load_gray(data, max_side), repeat)
+            reference, color_ms = median_ms(lambda: color_path(data, max_side), repeat)
+            candidate, gray_ms = median_ms(lambda: gray_path(data, max_side), repeat)
+            rows.append({
+                "resolution": resolution,
+                "max_side": max_side,
+                "color_decode_ms": color_decode_ms,
+                "gray_decode_ms": gray_decode_ms,
+                "color_detect_ms": color_ms,
+                "gray_detect_ms": gray_ms,
+                "faces": len(reference),
+                "min_iou": min_iou(reference, candidate)
+            })
+    return rows
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolutions", nargs="+", default=["12mp"], help=", ".join(RESOLUTIONS))
+    parser.add_argument("--max-sides", nargs="+", type=int, default=[0, 640, 1024], help="Detection max side (0 = full resolution)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    # Önbellek ölçümü bozmasın
+    main.CACHE_ENABLED = False
+    rows = run(args.resolutions, args.max_sides, args.repeat)
+
+    print(f"{'resolution':<10} {'max_side':>8} {'decode_rgb':>10} {'decode_gray':>11} {'detect_rgb':>10} {'detect_gray':>11} {'faces':>5} {'min_iou':>7}")
+    for row in rows:
+        print(f"{row['resolution']:<10} {row['max_side']:>8} {row['color_decode_ms']:>10} {row['gray_decode_ms']:>11} "
+              f"{row['color_detect_ms']:>10} {row['gray_detect_ms']:>11} {row['faces']:>5} {row['min_iou']:>7}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,121 @@
+"""
+Bölge işlemlerinde tam kare ve kırpıntı (ROI) yaklaşımının karşılaştırması.
+
+Blur, avatar ve inpainting'in eski tam kare sürümleri burada referans olarak
+tutulur; her biri main'deki kırpıntı sürümüyle hem süre hem de çıktı eşitliği
+(en büyük piksel farkı) açısından karşılaştırılır.
+
+Kullanım (backend klasöründen):
+    python -m benchmarks.roi_processing
+    python -m benchmarks.roi_processing --resolutions 1mp 12mp 48mp --repeat 5 --json roi.json
+"""
+import argparse
+import json
+import statistics
+import time
+
+import cv2
+import numpy as np
+
+import main
+from benchmarks.synthetic import RESOLUTIONS, phone_photo
+
+# --- Eski tam kare sürümler (referans) ---
+
+def full_frame_blur(image: np.ndarray, coords: dict, blur_intensity: int = 15) -> np.ndarray:
+    top, right, bottom, left = coords["top"], coords["right"], coords["bottom"], coords["left"]
+    blurred_face = cv2.GaussianBlur(image[top:bottom, left:right], (blur_intensity, blur_intensity), 0)
+    result = image.copy()
+    result[top:bottom, left:right] = blurred_face
+    return result
+
+def full_frame_avatar(image: np.ndarray, coords: dict, style: str = "cartoon") -> np.ndarray:
+    top, right, bottom, left = coords["top"], coords["right"], coords["bottom"], coords["left"]
+    avatar = main.generate_simple_avatar(right - left, bottom - top, style)
+    result = image.copy()
+    result[top:bottom, left:right] = avatar
+    return result
+
+def full_frame_inpaint(image: np.ndarray, coords: dict) -> np.ndarray:
+    h, w = image.shape[:2]
+    top, bottom = max(0, min(coords["top"], h)), max(0, min(coords["bottom"], h))
+    left, right = max(0, min(coords["left"], w)), max(0, min(coords["right"], w))
+    margin = 20
+    top_expanded, bottom_expanded = max(0, top - margin), min(h, bottom + margin)
+    left_expanded, right_expanded = max(0, left - margin), min(w, right + margin)
+    center = ((left_expanded + right_expanded) // 2, (top_expanded + bottom_expanded) // 2)
+    radius = max((right_expanded - left_expanded) // 2, (bottom_expanded - top_expanded) // 2)
+
+    mask = np.zeros((h, w), dtype=np.uint8)
+    cv2.circle(mask, center, radius, 255, -1)
+    inpainted = cv2.inpaint(image, mask, inpaintRadius=3, flags=cv2.INPAINT_TELEA)
+    inpainted_ns = cv2.inpaint(image, mask, inpaintRadius=3, flags=cv2.INPAINT_NS)
+    return cv2.addWeighted(inpainted, 0.7, inpainted_ns, 0.3, 0)
+
+# --- Kırpıntı sürümleri (main'deki yardımcılar) ---
+
+def roi_blur(image: np.ndarray, coords: dict, blur_intensity: int = 15) -> np.ndarray:
+    return main.blur_region(image, coords, blur_intensity)
+
+def roi_avatar(image: np.ndarray, coords: dict, style: str = "cartoon") -> np.ndarray:
+    return main.paste_avatar(image, coords, style)
+
+def roi_inpaint(image: np.ndarray, coords: dict) -> np.ndarray:
+    return main.apply_advanced_inpainting(image, coords, in_place=True)
+
+OPERATIONS = {
+    "blur": (full_frame_blur, roi_blur),
+    "avatar": (full_frame_avatar, roi_avatar),
+    "inpaint": (full_frame_inpaint, roi_inpaint),
+}
+
+def time_call(fn, image: np.ndarray, coords: dict, repeat: int):
+    """Her turda taze bir kopya verir (kırpıntı sürümleri yerinde yazar); kopya süreye dahil değil"""
+    timings = []
+    output = None
+    for _ in range(repeat):
+        source = image.copy()
+        start = time.perf_counter()
+        output = fn(source, coords)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), output
+
+def run(resolutions, repeat: int) -> list:
+    rows = []
+    for resolution in resolutions:
+        image, boxes = phone_photo(resolution, faces=3)
+        x, y, w, h = max(boxes, key=lambda box: box[2] * box[3])
+        coords = {"top": y, "right": x + w, "bottom": y + h, "left": x}
+        for name, (full_frame, roi) in OPERATIONS.items():
+            full_ms, expected = time_call(full_frame, image, coords, repeat)
+            roi_ms, actual = time_call(roi, image, coords, repeat)
+            rows.append({
+                "resolution": resolution,
+                "operation": name,
+                "face_px": w * h,
+                "full_frame_ms": round(full_ms, 2),
+                "roi_ms": round(roi_ms, 2),
+                "speedup": round(full_ms / roi_ms, 1) if roi_ms else None,
+                "max_abs_diff": int(cv2.absdiff(expected, actual).max())
+            })
+    return rows
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolutions", nargs="+", default=["12mp"], help=", ".join(RESOLUTIONS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    rows = run(args.resolutions, args.repeat)
+
+    print(f"{'resolution':<10} {'operation':<8} {'full_ms':>10} {'roi_ms':>9} {'speedup':>8} {'max_diff':>9}")
+    for row in rows:
+        print(f"{row['resolution']:<10} {row['operation']:<8} {row['full_frame_ms']:>10} {row['roi_ms']:>9} {row['speedup']:>7}x {row['max_abs_diff']:>9}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+if __name__ == "__main__":
+    main_cli()
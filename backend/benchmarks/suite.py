@@ -0,0 +1,301 @@
+"""
+Görsel işlemlerin mikro-benchmark paketi.
+
+Sentetik telefon fotoğraflarında (1, 12, 48 MP) her görüntü fonksiyonunu ve
+her endpoint'i (süreç içi ASGI istemcisiyle) ölçer. Her aşama için medyan süre
+ve tepe bellek raporlanır; sonuçlar JSON olarak yazılıp bir baseline ile
+karşılaştırılabilir.
+
+Bellek ölçümü süre ölçümünden ayrı bir turda yapılır: tracemalloc Python/numpy
+tahsislerini, /proc/self/statm örnekleyicisi (yalnızca Linux) OpenCV'nin kendi
+tamponları dahil RSS artışını gösterir.
+
+Endpoint'ler için httpx gerekir (Starlette TestClient). Sonuç önbelleği
+tekrarlı ölçümleri bozmasın diye kapatılır.
+
+Kullanım (backend klasöründen):
+    python -m benchmarks.suite
+    python -m benchmarks.suite --resolutions 12mp --cases "art.*" "effect.*" --repeat 5
+    python -m benchmarks.suite --json after.json --baseline before.json --threshold 0.15
+"""
+import argparse
+import base64
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+os.environ.setdefault("FACEFADE_CACHE", "0")
+
+import cv2
+import numpy as np
+
+import main
+from benchmarks.synthetic import RESOLUTIONS, phone_photo
+
+ART_STYLES = ("van_gogh", "picasso", "monet", "glitch", "vaporwave", "sketch")
+AVATAR_STYLES = ("cartoon", "anime", "abstract")
+EFFECTS = {
+    "dreamy": main.apply_dreamy_effect,
+    "abstract": main.apply_abstract_effect,
+    "healing": main.apply_healing_effect,
+}
+
+class Sample:
+    """Bir çözünürlük için önceden hazırlanmış girdiler (ölçüme dahil değil)"""
+
+    def __init__(self, resolution: str, faces: int = 3, seed: int = 0):
+        self.resolution = resolution
+        self.image, self.boxes = phone_photo(resolution, faces=faces, seed=seed)
+        self.jpeg = main.encode_image(self.image, "jpeg")
+        self.b64 = base64.b64encode(self.jpeg).decode("utf-8")
+        # En büyük yüz: blur/avatar/inpaint hedefi
+        x, y, w, h = max(self.boxes, key=lambda box: box[2] * box[3])
+        self.face = {"top": y, "right": x + w, "bottom": y + h, "left": x}
+        self.face_json = json.dumps(self.face)
+
+# --- Fonksiyon vakaları: her vaka (aşama adı, fn(önceki çıktı)) listesi döndürür ---
+
+def function_cases() -> dict:
+    cases = {
+        "codec.encode_base64": lambda s: [("encode", lambda _: main.encode_image_to_base64(s.image))],
+        "codec.decode_base64": lambda s: [("decode", lambda _: main.decode_base64_image(s.b64))],
+        "detect.face": lambda s: [
+            ("grayscale", lambda _: cv2.cvtColor(s.image, cv2.COLOR_BGR2GRAY)),
+            ("detect", lambda gray: main.detect_objects(gray, "face", scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))),
+        ],
+        "inpaint.advanced": lambda s: [("inpaint", lambda _: main.apply_advanced_inpainting(s.image, s.face))],
+    }
+    for style in ART_STYLES:
+        cases[f"art.{style}"] = lambda s, style=style: [("art_style", lambda _: main.apply_art_style(s.image, style))]
+    for name, effect in EFFECTS.items():
+        cases[f"effect.{name}"] = lambda s, effect=effect: [("effect", lambda _: effect(s.image))]
+    for style in AVATAR_STYLES:
+        cases[f"avatar.{style}"] = lambda s, style=style: [
+            ("generate", lambda _: main.generate_simple_avatar(s.face["right"] - s.face["left"], s.face["bottom"] - s.face["top"], style))
+        ]
+    return cases
+
+# --- Endpoint vakaları: (yol, görsel alanı, liste mi, ek form alanları, çıktı görsel anahtarı) ---
+
+ENDPOINTS = {
+    "detect-face": ("/detect-face", "image", False, lambda s: {}, None),
+    "blur-face": ("/blur-face", "image", False, lambda s: {"face_coordinates": s.face_json, "blur_intensity": "15"}, "processed_image"),
+    "replace-with-avatar": ("/replace-with-avatar", "image", False, lambda s: {"face_coordinates": s.face_json}, "processed_image"),
+    "artify-photo": ("/artify-photo", "image", False, lambda s: {"art_style": "van_gogh"}, "processed_image"),
+    "count-people": ("/count-people", "image", False, lambda s: {}, None),
+    "count-people-fast": ("/count-people", "image", False, lambda s: {"mode": "fast"}, None),
+    "smart-remove-person": ("/smart-remove-person", "image", False, lambda s: {"target_face_coordinates": s.face_json, "removal_method": "inpaint"}, "processed_image"),
+    "compare-faces": ("/compare-faces", "target_image", False, lambda s: {"reference_image": s.b64}, None),
+    "closure-ceremony": ("/closure-ceremony", "images", True, lambda s: {"person_name": "Benchmark", "ceremony_type": "healing"}, None),
+    "anonymize": ("/anonymize", "image", False, lambda s: {"method": "pixelate", "intensity": "15"}, "processed_image"),
+    "pipeline": ("/pipeline", "image", False, lambda s: {"steps": json.dumps([{"op": "detect"}, {"op": "blur"}, {"op": "artify", "art_style": "van_gogh"}])}, "processed_image"),
+}
+
+def endpoint_cases(client, transport: str) -> dict:
+    def make(path, field, is_list, extra, image_key):
+        def stages(s):
+            def build(_):
+                data = extra(s)
+                files = None
+                if transport == "base64":
+                    data[field] = [s.b64] if is_list else s.b64
+                else:
+                    files = [(f"{field}_files" if is_list else f"{field}_file", ("image.jpg", s.jpeg, "image/jpeg"))]
+                return data, files
+
+            def call(request):
+                data, files = request
+                response = client.post(path, data=data, files=files)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{path} -> {response.status_code}: {response.text[:200]}")
+                return response
+
+            def parse(response):
+                body = response.json()
+                if image_key and body.get(image_key):
+                    main.decode_base64_image(body[image_key])
+                return body
+
+            return [("request_build", build), ("asgi_call", call), ("response_parse", parse)]
+        return stages
+
+    return {f"endpoint.{name}": make(*spec) for name, spec in ENDPOINTS.items()}
+
+# --- Ölçüm ---
+
+class RssSampler:
+    """Arka planda RSS'i örnekleyip tepe değeri tutar (yalnızca Linux)"""
+
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def __init__(self, interval: float = 0.002):
+        self.interval = interval
+        self.available = os.path.exists("/proc/self/statm")
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def read(self) -> int:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * self.PAGE_SIZE
+
+    def __enter__(self):
+        if self.available:
+            self.start_rss = self.peak = self.read()
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.read())
+            time.sleep(self.interval)
+
+    def __exit__(self, *exc):
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self.peak = max(self.peak, self.read())
+
+    @property
+    def growth_mb(self):
+        return round((self.peak - self.start_rss) / 2**20, 2) if self.available else None
+
+def run_stages(stages) -> list:
+    """Aşamaları sırayla çalıştırır, her birinin süresini (ms) döndürür"""
+    timings = []
+    value = None
+    for name, fn in stages:
+        start = time.perf_counter()
+        value = fn(value)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def measure_memory(stages) -> list:
+    """Her aşama için (tracemalloc tepe MB, RSS artışı MB)"""
+    peaks = []
+    value = None
+    tracemalloc.start()
+    try:
+        for name, fn in stages:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            with RssSampler() as rss:
+                value = fn(value)
+            peaks.append((round((tracemalloc.get_traced_memory()[1] - baseline) / 2**20, 2), rss.growth_mb))
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+def bench_case(name: str, factory, sample: Sample, repeat: int, memory: bool) -> dict:
+    stages = factory(sample)
+    run_stages(stages)  # ısınma (cascade/thread havuzu, ilk tahsisler)
+    runs = [run_stages(stages) for _ in range(repeat)]
+    peaks = measure_memory(stages) if memory else [(None, None)] * len(stages)
+
+    result = {"case": name, "resolution": sample.resolution, "stages": {}}
+    for i, (stage, _) in enumerate(stages):
+        times = [run[i] for run in runs]
+        result["stages"][stage] = {
+            "median_ms": round(statistics.median(times), 3),
+            "min_ms": round(min(times), 3),
+            "peak_mb": peaks[i][0],
+            "rss_peak_mb": peaks[i][1],
+        }
+    result["total_ms"] = round(statistics.median(sum(run) for run in runs), 3)
+    known = [p[0] for p in peaks if p[0] is not None]
+    result["peak_mb"] = max(known) if known else None
+    return result
+
+def environment() -> dict:
+    return {
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "opencv_threads": cv2.getNumThreads(),
+        "executor": main.EXECUTOR_KIND,
+    }
+
+def run(resolutions, patterns, repeat: int, transport: str, memory: bool, faces: int, log=print) -> dict:
+    from fastapi.testclient import TestClient
+
+    results = {}
+    with TestClient(main.app) as client:
+        cases = {**function_cases(), **endpoint_cases(client, transport)}
+        selected = {name: factory for name, factory in cases.items() if any(fnmatch.fnmatch(name, p) for p in patterns)}
+        for resolution in resolutions:
+            sample = Sample(resolution, faces=faces)
+            for name, factory in selected.items():
+                result = bench_case(name, factory, sample, repeat, memory)
+                results[f"{name}@{resolution}"] = result
+                log(f"{name:<32} {resolution:>5} {result['total_ms']:>11.2f} ms  peak {result['peak_mb']} MB")
+    return {"environment": environment(), "repeat": repeat, "transport": transport, "results": results}
+
+def compare(current: dict, baseline: dict, threshold: float, min_ms: float) -> list:
+    """
+    Ortak vakaların medyan toplam süresini karşılaştırır.
+    Çok kısa vakalarda gürültüyü yok saymak için min_ms altındaki farklar sayılmaz.
+    """
+    rows = []
+    for key, result in current["results"].items():
+        before = baseline.get("results", {}).get(key)
+        if not before:
+            continue
+        delta = result["total_ms"] - before["total_ms"]
+        ratio = delta / before["total_ms"] if before["total_ms"] else 0.0
+        status = "ok"
+        if abs(delta) >= min_ms and ratio > threshold:
+            status = "REGRESSION"
+        elif abs(delta) >= min_ms and ratio < -threshold:
+            status = "faster"
+        rows.append({
+            "key": key,
+            "baseline_ms": before["total_ms"],
+            "current_ms": result["total_ms"],
+            "change": round(ratio, 4),
+            "status": status,
+        })
+    return rows
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS), help="1mp, 12mp, 48mp")
+    parser.add_argument("--cases", nargs="+", default=["*"], help="Glob patterns, e.g. 'art.*' 'endpoint.*'")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--faces", type=int, default=3, help="Faces per photo")
+    parser.add_argument("--transport", choices=("base64", "binary"), default="base64", help="How endpoints receive the image")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the memory pass")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a previous --json output")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown counted as a regression")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="Ignore absolute differences below this")
+    args = parser.parse_args()
+
+    report = run(args.resolutions, args.cases, args.repeat, args.transport, not args.no_memory, args.faces)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.threshold, args.min_ms)
+        print(f"\n{'case':<40} {'baseline':>11} {'current':>11} {'change':>8}")
+        for row in rows:
+            print(f"{row['key']:<40} {row['baseline_ms']:>11.2f} {row['current_ms']:>11.2f} {row['change']:>+8.1%}  {row['status']}")
+        if any(row["status"] == "REGRESSION" for row in rows):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main_cli()
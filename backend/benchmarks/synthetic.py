@@ -0,0 +1,71 @@
+"""
+Benchmark'lar için sentetik test görselleri.
+
+Yüzler Haar frontal cascade'in yakaladığı basit çizimlerdir; konumları
+bilindiği için recall ölçümünde referans (ground truth) olarak kullanılır.
+"""
+import cv2
+import numpy as np
+
+# Telefon kamerası çözünürlükleri (genişlik, yükseklik)
+RESOLUTIONS = {
+    "1mp": (1152, 864),
+    "12mp": (4000, 3000),
+    "48mp": (8000, 6000),
+}
+
+def draw_face(image: np.ndarray, cx: int, cy: int, radius: int):
+    """(cx, cy) merkezli, yaklaşık 2*radius boyunda bir yüz çizer"""
+    cv2.ellipse(image, (cx, cy), (int(radius * 0.8), radius), 0, 0, 360, (150, 170, 200), -1)
+    for side in (-1, 1):
+        ex = cx + side * int(radius * 0.35)
+        ey = cy - int(radius * 0.2)
+        # Kaş ve göz
+        cv2.ellipse(image, (ex, ey - int(radius * 0.22)), (int(radius * 0.22), int(radius * 0.06)), 0, 0, 360, (40, 40, 40), -1)
+        cv2.ellipse(image, (ex, ey), (int(radius * 0.16), int(radius * 0.09)), 0, 0, 360, (30, 30, 30), -1)
+    # Burun ve ağız
+    cv2.ellipse(image, (cx, cy + int(radius * 0.15)), (int(radius * 0.08), int(radius * 0.2)), 0, 0, 360, (120, 140, 170), -1)
+    cv2.ellipse(image, (cx, cy + int(radius * 0.5)), (int(radius * 0.3), int(radius * 0.08)), 0, 0, 360, (60, 60, 110), -1)
+
+def face_box(cx: int, cy: int, radius: int) -> tuple:
+    """draw_face ile çizilen yüzün (x, y, w, h) kutusu"""
+    return (cx - radius, cy - radius, 2 * radius, 2 * radius)
+
+def synthetic_photo(width: int, height: int, face_radii=(), seed: int = 0):
+    """
+    Gürültülü bir arka plan üzerine verilen yarıçaplarda yüzler yerleştirir.
+    (BGR image, yüz kutuları listesi) döndürür.
+    """
+    rng = np.random.default_rng(seed)
+    # Düşük frekanslı arka plan + ince gren
+    background = rng.integers(60, 140, size=(max(2, height // 64), max(2, width // 64), 3), dtype=np.uint8)
+    image = cv2.resize(background, (width, height), interpolation=cv2.INTER_CUBIC)
+    image = cv2.add(image, rng.integers(0, 12, size=(height, width, 3), dtype=np.uint8))
+
+    boxes = []
+    if face_radii:
+        slot_width = width // len(face_radii)
+        for i, radius in enumerate(face_radii):
+            radius = min(radius, slot_width // 2 - 2, height // 2 - 2)
+            cx = slot_width * i + slot_width // 2
+            cy = int(rng.integers(radius + 1, height - radius - 1))
+            draw_face(image, cx, cy, radius)
+            boxes.append(face_box(cx, cy, radius))
+    image = cv2.GaussianBlur(image, (5, 5), 0)
+    return image, boxes
+
+def phone_photo(resolution: str = "12mp", faces: int = 3, seed: int = 0):
+    """Çözünürlüğe göre orantılı yüz boyutlarıyla bir 'telefon fotoğrafı' üretir"""
+    width, height = RESOLUTIONS[resolution]
+    # Grup fotoğrafı gibi: kısa kenarın %3'ü ile %20'si arası boyda yüzler
+    radii = [int(min(width, height) * r) for r in np.linspace(0.015, 0.10, faces)] if faces else []
+    return synthetic_photo(width, height, radii, seed)
+
+def iou(a: tuple, b: tuple) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
@@ -0,0 +1,81 @@
+"""
+Van Gogh ve Monet stillerinde şeritli (tiled) işlemenin süre, bellek ve çıktı eşitliği.
+
+Her ölçüm ayrı bir süreçte yapılır; böylece bir önceki ölçümün serbest
+bıraktığı ama işletim sistemine geri vermediği bellek tepe RSS'i bozmaz.
+Çıktılar SHA-256 ile karşılaştırılır; tüm bütçelerde şeritsiz çalıştırmayla
+aynı olmalıdır.
+
+Kullanım (backend klasöründen):
+    python -m benchmarks.tiled_art
+    python -m benchmarks.tiled_art --resolutions 48mp --budgets 0 64 16 --workers 1 4 --json tiled.json
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import time
+
+from benchmarks.synthetic import RESOLUTIONS, phone_photo
+
+def measure(style: str, resolution: str, budget_mb: int, workers: int) -> dict:
+    # Alt süreçte çalışır; main burada import edilir ki ana sürecin belleği karışmasın
+    import main
+    from benchmarks.suite import RssSampler
+
+    image, _ = phone_photo(resolution, faces=3)
+    filter_fn, halo = main.TILED_ART_FILTERS[style]
+    with RssSampler() as sampler:
+        start = time.perf_counter()
+        result = main.render_tiled(image, filter_fn, halo, budget_mb, workers)
+        elapsed = (time.perf_counter() - start) * 1000
+    return {
+        "ms": round(elapsed, 1),
+        "rss_growth_mb": sampler.growth_mb,
+        "sha256": hashlib.sha256(result.tobytes()).hexdigest()
+    }
+
+def run(styles, resolutions, budgets, workers_list) -> list:
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    for resolution in resolutions:
+        for style in styles:
+            reference = None
+            for budget_mb in budgets:
+                for workers in workers_list if budget_mb else [1]:
+                    with context.Pool(1) as pool:
+                        measured = pool.apply(measure, (style, resolution, budget_mb, workers))
+                    # Bütçe 0 = şeritsiz; listede önce gelmesi beklenir
+                    reference = reference or measured["sha256"]
+                    rows.append({
+                        "resolution": resolution,
+                        "style": style,
+                        "budget_mb": budget_mb,
+                        "workers": workers,
+                        "ms": measured["ms"],
+                        "rss_growth_mb": measured["rss_growth_mb"],
+                        "identical": measured["sha256"] == reference
+                    })
+    return rows
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--styles", nargs="+", default=["van_gogh", "monet"])
+    parser.add_argument("--resolutions", nargs="+", default=["12mp"], help=", ".join(RESOLUTIONS))
+    parser.add_argument("--budgets", nargs="+", type=int, default=[0, 64, 16], help="Memory budgets in MB (0 = untiled)")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2])
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    rows = run(args.styles, args.resolutions, args.budgets, args.workers)
+
+    print(f"{'resolution':<10} {'style':<9} {'budget_mb':>9} {'workers':>7} {'ms':>9} {'rss_mb':>8} {'identical':>9}")
+    for row in rows:
+        print(f"{row['resolution']:<10} {row['style']:<9} {row['budget_mb']:>9} {row['workers']:>7} {row['ms']:>9} {row['rss_growth_mb']:>8} {str(row['identical']):>9}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+if __name__ == "__main__":
+    main_cli()
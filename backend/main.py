@@ -1,7 +1,14 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 import uvicorn
+import asyncio
+import bisect
+import contextlib
+import contextvars
+import functools
+import multiprocessing
+from multiprocessing import resource_tracker, shared_memory
 import cv2
 import numpy as np
 import base64
@@ -11,9 +18,18 @@ import requests
 import os
 import uuid
 import tempfile
+import shutil
+import threading
+import copy
+import hashlib
+import pickle
+from collections import OrderedDict
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 # import face_recognition  # Removed - requires dlib/CMake
-from typing import List, Optional
+from typing import List, Optional, Union
 import json
 
 app = FastAPI(
@@ -39,193 +55,1494 @@ REPLICATE_TOKEN = os.getenv("REPLICATE_TOKEN", "")
 TEMP_DIR = "temp_files"
 os.makedirs(TEMP_DIR, exist_ok=True)
 
-def decode_base64_image(base64_string: str) -> np.ndarray:
+# Performans ölçümü: aşama süreleri (Server-Timing) + Prometheus /metrics
+METRICS_ENABLED = os.getenv("FACEFADE_METRICS", "1") != "0"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+MEGAPIXEL_BUCKETS = (0.3, 1, 2, 4, 8, 12, 16, 24, 48, 64)
+FACE_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 20, 50)
+
+class RequestTimings:
+    """
+    Tek bir isteğin aşama süreleri ve gözlemleri.
+    Sıcak yolda yalnızca sözlüğe ekleme yapılır; histogramlar istek sonunda bir kez güncellenir.
+    """
+    __slots__ = ("stages", "observations", "_lock")
+
+    def __init__(self):
+        self.stages = {}
+        self.observations = []
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def observe(self, metric: str, value: float):
+        self.observations.append((metric, value))
+
+    def export(self) -> tuple:
+        return dict(self.stages), list(self.observations)
+
+    def merge(self, exported: tuple):
+        stages, observations = exported
+        for stage, seconds in stages.items():
+            self.add(stage, seconds)
+        self.observations.extend(observations)
+
+request_timings = contextvars.ContextVar("request_timings", default=None)
+
+class _StageTimer:
+    __slots__ = ("timings", "stage", "start")
+
+    def __init__(self, timings: RequestTimings, stage: str):
+        self.timings = timings
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.timings.add(self.stage, time.perf_counter() - self.start)
+
+_NO_TIMING = contextlib.nullcontext()
+
+def timed_stage(stage: str):
+    """İstek içindeyse bloğun süresini ilgili aşamaya ekler, değilse hiçbir şey yapmaz"""
+    timings = request_timings.get()
+    if timings is None:
+        return _NO_TIMING
+    return _StageTimer(timings, stage)
+
+def observe_metric(metric: str, value: float):
+    """Görsel boyutu, yüz sayısı gibi dağılımlar için istek içi gözlem"""
+    timings = request_timings.get()
+    if timings is not None:
+        timings.observe(metric, value)
+
+class Histogram:
+    """Prometheus tarzı kümülatif histogram (etiket kombinasyonu başına)"""
+
+    def __init__(self, name: str, description: str, label_names: tuple, buckets: tuple):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, labels: tuple, value: float):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            label_text = ",".join(f'{name}="{value}"' for name, value in zip(self.label_names, labels))
+            prefix = label_text + "," if label_text else ""
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {total}")
+            lines.append(f"{self.name}_count{{{label_text}}} {count}")
+        return lines
+
+class MetricsRegistry:
+    """İstek bitince RequestTimings'i histogramlara işler, /metrics için metin üretir"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.request_duration = Histogram(
+            "facefade_request_duration_seconds", "End-to-end request latency", ("endpoint",), LATENCY_BUCKETS
+        )
+        self.stage_duration = Histogram(
+            "facefade_stage_duration_seconds", "Time spent per processing stage within a request", ("endpoint", "stage"), LATENCY_BUCKETS
+        )
+        self.observations = {
+            "image_megapixels": Histogram(
+                "facefade_image_megapixels", "Decoded input image size", ("endpoint",), MEGAPIXEL_BUCKETS
+            ),
+            "faces_detected": Histogram(
+                "facefade_faces_detected", "Faces found per detection call", ("endpoint",), FACE_COUNT_BUCKETS
+            ),
+        }
+
+    def record(self, endpoint: str, duration: float, timings: RequestTimings):
+        with self._lock:
+            self.request_duration.observe((endpoint,), duration)
+            for stage, seconds in timings.stages.items():
+                self.stage_duration.observe((endpoint, stage), seconds)
+            for metric, value in timings.observations:
+                self.observations[metric].observe((endpoint,), value)
+
+    def render(self) -> str:
+        with self._lock:
+            lines = self.request_duration.render() + self.stage_duration.render()
+            for histogram in self.observations.values():
+                lines.extend(histogram.render())
+        return "\n".join(lines) + "\n"
+
+metrics_registry = MetricsRegistry()
+
+def server_timing_header(timings: RequestTimings, total: float) -> str:
+    parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.stages.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+class MetricsMiddleware:
+    """
+    Her HTTP isteği için aşama toplayıcısı açar, yanıta Server-Timing ekler
+    ve gövde bitince (streaming dahil) histogramları günceller.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths = None
+
+    def endpoint_label(self, scope) -> str:
+        # Yol şablonu kullanılır ki /jobs/{job_id} gibi yollar ayrı seri üretmesin
+        if self._route_paths is None:
+            self._route_paths = {getattr(route, "endpoint", None): route.path for route in app.routes}
+        return self._route_paths.get(scope.get("endpoint"), "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = request_timings.set(timings)
+        start = time.perf_counter()
+        recorded = False
+
+        async def send_with_timing(message):
+            nonlocal recorded
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing_header(timings, time.perf_counter() - start).encode("latin-1")))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body" and not message.get("more_body", False) and not recorded:
+                recorded = True
+                metrics_registry.record(self.endpoint_label(scope), time.perf_counter() - start, timings)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_timings.reset(token)
+
+app.add_middleware(MetricsMiddleware)
+
+# Haar cascade modelleri (OpenCV ile gelir)
+CASCADE_FILES = {
+    "face": "haarcascade_frontalface_default.xml",
+    "body": "haarcascade_fullbody.xml",
+}
+
+class DetectorRegistry:
+    """
+    Haar cascade modellerini uygulama açılışında bir kez yükler.
+    CascadeClassifier thread-safe olmadığı için her thread kendi kopyasını
+    bellekteki XML'den üretir (diskten tekrar okuma yapılmaz).
+    """
+
+    def __init__(self, cascade_files: dict):
+        self._files = dict(cascade_files)
+        self._sources = {}
+        self._info = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def load_all(self):
+        for name in self._files:
+            self._load(name)
+
+    def _load(self, name: str):
+        if name not in self._files:
+            raise KeyError(f"Unknown detector: {name}")
+        path = cv2.data.haarcascades + self._files[name]
+
+        start = time.perf_counter()
+        with open(path, "r", encoding="utf-8") as f:
+            source = f.read()
+        cascade = self._build(source)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        if cascade.empty():
+            raise RuntimeError(f"Cascade could not be loaded: {path}")
+
+        with self._lock:
+            self._sources[name] = source
+            self._info[name] = {
+                "name": name,
+                "file": self._files[name],
+                "path": path,
+                "load_time_ms": round(load_ms, 2),
+                "loaded_at": datetime.now().isoformat(),
+                "thread_instances": 1
+            }
+        self._thread_cache()[name] = cascade
+
+    @staticmethod
+    def _build(source: str) -> cv2.CascadeClassifier:
+        storage = cv2.FileStorage(source, cv2.FILE_STORAGE_READ | cv2.FILE_STORAGE_MEMORY)
+        cascade = cv2.CascadeClassifier()
+        cascade.read(storage.getFirstTopLevelNode())
+        storage.release()
+        return cascade
+
+    def _thread_cache(self) -> dict:
+        cache = getattr(self._local, "cascades", None)
+        if cache is None:
+            cache = self._local.cascades = {}
+        return cache
+
+    def get(self, name: str) -> cv2.CascadeClassifier:
+        """Çağıran thread'e ait cascade kopyasını döndürür"""
+        cache = self._thread_cache()
+        cascade = cache.get(name)
+        if cascade is not None:
+            return cascade
+
+        if name not in self._sources:
+            self._load(name)
+            return cache[name]
+
+        cascade = self._build(self._sources[name])
+        cache[name] = cascade
+        with self._lock:
+            self._info[name]["thread_instances"] += 1
+        return cascade
+
+    def describe(self) -> List[dict]:
+        with self._lock:
+            return [dict(info) for info in self._info.values()]
+
+detector_registry = DetectorRegistry(CASCADE_FILES)
+
+@app.on_event("startup")
+def load_detectors():
+    """Cascade modellerini istek gelmeden önce yükle"""
+    detector_registry.load_all()
+
+# Tespit çözünürlüğü: 0 = tam çözünürlük, aksi halde uzun kenar bu değere küçültülür
+DETECTION_MAX_SIDE = int(os.getenv("FACEFADE_DETECTION_MAX_SIDE", "0"))
+
+def detection_scale(shape: tuple, max_side: Optional[int] = None) -> float:
+    """Tespit için uygulanacak küçültme oranı (1.0 = küçültme yok)"""
+    if max_side is None:
+        max_side = DETECTION_MAX_SIDE
+    longest = max(shape[:2])
+    if not max_side or max_side <= 0 or longest <= max_side:
+        return 1.0
+    return max_side / longest
+
+def detect_objects(gray_image: np.ndarray, model: str = "face", max_side: Optional[int] = None,
+                   scaleFactor: float = 1.1, minNeighbors: int = 5, minSize: Optional[tuple] = None,
+                   maxSize: Optional[tuple] = None) -> np.ndarray:
+    """
+    Cascade'i uzun kenarı en fazla max_side olan küçültülmüş görselde çalıştırır
+    ve dikdörtgenleri orijinal görsel koordinatlarına geri ölçekler
+    """
+    cascade = detector_registry.get(model)
+    scale = detection_scale(gray_image.shape, max_side)
+    
+    with timed_stage("detect"):
+        if scale < 1.0:
+            height, width = gray_image.shape[:2]
+            small = cv2.resize(gray_image, (max(1, round(width * scale)), max(1, round(height * scale))), interpolation=cv2.INTER_AREA)
+            if minSize is not None:
+                minSize = (max(1, round(minSize[0] * scale)), max(1, round(minSize[1] * scale)))
+            if maxSize is not None:
+                maxSize = (max(1, round(maxSize[0] * scale)), max(1, round(maxSize[1] * scale)))
+        else:
+            small = gray_image
+        
+        params = {"scaleFactor": scaleFactor, "minNeighbors": minNeighbors}
+        if minSize is not None:
+            params["minSize"] = minSize
+        if maxSize is not None:
+            params["maxSize"] = maxSize
+        rects = cascade.detectMultiScale(small, **params)
+    if model == "face":
+        observe_metric("faces_detected", len(rects))
+    if len(rects) == 0:
+        return np.empty((0, 4), dtype=np.int32)
+    
+    rects = np.asarray(rects, dtype=np.float64)
+    if scale < 1.0:
+        rects = np.round(rects / scale)
+        height, width = gray_image.shape[:2]
+        rects[:, 0] = np.clip(rects[:, 0], 0, width - 1)
+        rects[:, 1] = np.clip(rects[:, 1], 0, height - 1)
+        rects[:, 2] = np.minimum(rects[:, 2], width - rects[:, 0])
+        rects[:, 3] = np.minimum(rects[:, 3], height - rects[:, 1])
+    return rects.astype(np.int32)
+
+# CPU-yoğun OpenCV işleri için işlem havuzu ayarları
+EXECUTOR_KIND = os.getenv("FACEFADE_EXECUTOR", "thread")  # thread veya process
+EXECUTOR_WORKERS = int(os.getenv("FACEFADE_EXECUTOR_WORKERS", str(os.cpu_count() or 2)))
+ENDPOINT_CONCURRENCY = int(os.getenv("FACEFADE_ENDPOINT_CONCURRENCY", str(EXECUTOR_WORKERS)))
+# Process havuzu: bir worker bu kadar işten sonra yenilenir (0 = yenilenmez)
+EXECUTOR_MAX_TASKS = int(os.getenv("FACEFADE_EXECUTOR_MAX_TASKS", "0"))
+# fork, forkserver veya spawn; boşsa platform varsayılanı (yenilemede forkserver)
+EXECUTOR_START_METHOD = os.getenv("FACEFADE_EXECUTOR_START_METHOD", "")
+# Büyük görsel tamponları process havuzuna pickle yerine paylaşımlı bellekle taşınır
+SHARED_MEMORY_ENABLED = os.getenv("FACEFADE_SHARED_MEMORY", "1") != "0"
+SHARED_MEMORY_MIN_BYTES = 256 * 1024
+# Endpoint bazlı limitler, örn: "artify-photo=2,scan-gallery=1"
+ENDPOINT_LIMITS = {
+    name.strip(): int(limit)
+    for name, limit in (
+        item.split("=", 1) for item in os.getenv("FACEFADE_ENDPOINT_LIMITS", "").split(",") if "=" in item
+    )
+}
+
+class ImageExecutor:
+    """
+    Görüntü işlemlerini event loop dışında, sınırlı bir havuzda çalıştırır.
+    Her endpoint'in kendi eşzamanlılık limiti ve kuyruk sayaçları vardır.
+    """
+
+    def __init__(self, kind: str, workers: int, default_limit: int, limits: dict,
+                 max_tasks_per_child: int = 0, start_method: str = ""):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.default_limit = max(1, default_limit)
+        self.limits = limits
+        self.max_tasks_per_child = max(0, max_tasks_per_child)
+        # max_tasks_per_child fork ile kullanılamaz
+        self.start_method = start_method or ("forkserver" if self.max_tasks_per_child else multiprocessing.get_start_method())
+        self._pool = None
+        # Havuz hem event loop'tan hem de (çöken havuz yenilenirken) kurulabilir
+        self._pool_lock = threading.RLock()
+        self._restarts = 0
+        self._semaphores = {}
+        self._stats = {}
+        self._shared = {"inputs": 0, "outputs": 0, "bytes": 0}
+
+    def start(self):
+        with self._pool_lock:
+            self._create_pool()
+
+    def _create_pool(self):
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = self._new_process_pool(self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="facefade")
+
+    def _new_process_pool(self, workers: int) -> ProcessPoolExecutor:
+        context = multiprocessing.get_context(self.start_method)
+        if self.start_method == "forkserver":
+            # main bir kez forkserver'da import edilir, worker'lar oradan kopyalanır
+            context.set_forkserver_preload([__name__])
+        if os.name == "posix":
+            # fork'ta worker'lar ana sürecin resource tracker'ını devralsın; aksi halde
+            # kendi tracker'larını açar ve ana sürecin sildiği segmentleri sızıntı sayarlar
+            resource_tracker.ensure_running()
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker_process,
+            initargs=(self.workers,),
+            max_tasks_per_child=self.max_tasks_per_child or None
+        )
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _restart_pool(self, broken):
+        """
+        Bir worker öldüğünde (OOM, segfault) ProcessPoolExecutor kalıcı olarak bozulur.
+        Havuz bir kez yeniden kurulur; aynı bozuk havuzu gören diğer istekler yenisini kullanır.
+        """
+        with self._pool_lock:
+            if self._pool is broken:
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+                self._restarts += 1
+                self._create_pool()
+
+    def _endpoint_state(self, endpoint: str):
+        if endpoint not in self._semaphores:
+            limit = max(1, self.limits.get(endpoint, self.default_limit))
+            self._semaphores[endpoint] = asyncio.Semaphore(limit)
+            self._stats[endpoint] = {"limit": limit, "queued": 0, "running": 0, "completed": 0, "failed": 0}
+        return self._semaphores[endpoint], self._stats[endpoint]
+
+    async def run(self, endpoint: str, fn, *args, **kwargs):
+        """fn'i havuzda çalıştırır; endpoint limiti doluysa sırada bekler"""
+        self.start()
+        semaphore, stats = self._endpoint_state(endpoint)
+        timings = request_timings.get()
+        stats["queued"] += 1
+        try:
+            with timed_stage("queue"):
+                await semaphore.acquire()
+        finally:
+            stats["queued"] -= 1
+
+        stats["running"] += 1
+        blocks = []
+        try:
+            if self.kind == "thread":
+                # contextvars thread'e taşınsın
+                call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+                result = await asyncio.get_running_loop().run_in_executor(self._pool, call)
+            else:
+                result = await self._run_in_process(fn, args, kwargs, timings, blocks)
+            stats["completed"] += 1
+            return result
+        except Exception:
+            stats["failed"] += 1
+            raise
+        finally:
+            # Girdi tamponları worker'da kopyalandı; segmentler burada silinir
+            release_shared_blocks(blocks, unlink=True)
+            stats["running"] -= 1
+            semaphore.release()
+
+    async def _run_in_process(self, fn, args, kwargs, timings: Optional["RequestTimings"], blocks: list):
+        """Büyük tamponları paylaşımlı belleğe koyup fn'i bir worker sürecinde çalıştırır"""
+        if SHARED_MEMORY_ENABLED:
+            args = share_payload(args, blocks)
+            kwargs = share_payload(kwargs, blocks)
+            self._count_shared("inputs", blocks)
+        pool = self._pool
+        try:
+            result = await self._submit(pool, fn, args, kwargs, timings)
+        except BrokenProcessPool:
+            # Bir worker'ın ölmesi (OOM, segfault) havuzdaki tüm işleri düşürür ve hangisinin
+            # suçlu olduğu bilinemez. Havuz yenilenir, her istek tek worker'lı ayrı bir havuzda
+            # bir kez daha denenir; böylece yalnızca çökmeye yol açan istek hata alır.
+            self._restart_pool(pool)
+            isolated = self._new_process_pool(1)
+            try:
+                result = await self._submit(isolated, fn, args, kwargs, timings)
+            except BrokenProcessPool:
+                raise RuntimeError("Worker process crashed while processing the request") from None
+            finally:
+                isolated.shutdown(wait=False, cancel_futures=True)
+        
+        output_blocks = []
+        try:
+            result = restore_payload(result, output_blocks)
+            self._count_shared("outputs", output_blocks)
+        finally:
+            release_shared_blocks(output_blocks, unlink=True)
+        if timings is not None:
+            result, exported = result
+            timings.merge(exported)
+        return result
+
+    async def _submit(self, pool, fn, args, kwargs, timings: Optional["RequestTimings"]):
+        future = pool.submit(_run_in_worker_process, fn, args, kwargs, timings is not None, SHARED_MEMORY_ENABLED)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # İstek iptal edildi; worker'ın yine de ürettiği çıktı segmentleri sızmasın
+            future.add_done_callback(_discard_shared_result)
+            raise
+
+    def _count_shared(self, direction: str, blocks: list):
+        self._shared[direction] += len(blocks)
+        self._shared["bytes"] += sum(block.size for block in blocks)
+
+    def queue_depth(self) -> int:
+        return sum(stats["queued"] for stats in self._stats.values())
+
+    def describe(self) -> dict:
+        info = {
+            "kind": self.kind,
+            "workers": self.workers,
+            "default_endpoint_limit": self.default_limit,
+            "queue_depth": self.queue_depth(),
+            "running": sum(stats["running"] for stats in self._stats.values()),
+            "endpoints": {name: dict(stats) for name, stats in self._stats.items()}
+        }
+        if self.kind == "process":
+            info["start_method"] = self.start_method
+            info["max_tasks_per_child"] = self.max_tasks_per_child
+            info["pool_restarts"] = self._restarts
+            info["shared_memory"] = dict(self._shared, enabled=SHARED_MEMORY_ENABLED)
+        return info
+
+class SharedBuffer:
+    """
+    Paylaşımlı bellekteki bir bytes, str ya da ndarray değerinin süreçler arası
+    taşınan tanımı. Pickle edilen yalnızca bu küçük nesnedir.
+    """
+
+    def __init__(self, name: str, kind: str, size: int, shape: tuple = (), dtype: str = ""):
+        self.name = name
+        self.kind = kind
+        self.size = size
+        self.shape = shape
+        self.dtype = dtype
+
+    @classmethod
+    def create(cls, value, blocks: list) -> "SharedBuffer":
+        if isinstance(value, np.ndarray):
+            data = np.ascontiguousarray(value)
+            kind, shape, dtype = "ndarray", data.shape, data.dtype.str
+            raw = data.reshape(-1).view(np.uint8)
+        else:
+            kind, shape, dtype = type(value).__name__, (), ""
+            raw = np.frombuffer(value.encode("utf-8") if isinstance(value, str) else value, dtype=np.uint8)
+        block = shared_memory.SharedMemory(create=True, size=max(1, raw.size))
+        np.ndarray(raw.shape, dtype=np.uint8, buffer=block.buf)[:] = raw
+        blocks.append(block)
+        return cls(block.name, kind, int(raw.size), shape, dtype)
+
+    def load(self, blocks: list):
+        """Değerin süreç-yerel bir kopyasını döndürür; segment blocks'a eklenir"""
+        block = shared_memory.SharedMemory(name=self.name)
+        blocks.append(block)
+        view = block.buf[:self.size]
+        try:
+            if self.kind == "ndarray":
+                return np.frombuffer(view, dtype=np.dtype(self.dtype)).reshape(self.shape).copy()
+            data = bytes(view)
+            return data.decode("utf-8") if self.kind == "str" else data
+        finally:
+            view.release()
+
+def share_payload(value, blocks: list):
+    """Büyük bytes/str/ndarray değerlerini (iç içe liste, tuple, dict dahil) SharedBuffer ile değiştirir"""
+    if isinstance(value, (bytes, bytearray, str)) and len(value) >= SHARED_MEMORY_MIN_BYTES:
+        return SharedBuffer.create(value, blocks)
+    if isinstance(value, np.ndarray) and value.dtype != object and value.nbytes >= SHARED_MEMORY_MIN_BYTES:
+        return SharedBuffer.create(value, blocks)
+    if isinstance(value, (list, tuple)):
+        return type(value)(share_payload(item, blocks) for item in value)
+    if isinstance(value, dict):
+        return {key: share_payload(item, blocks) for key, item in value.items()}
+    return value
+
+def restore_payload(value, blocks: list):
+    """share_payload'un tersi; bağlanılan segmentler blocks'a eklenir"""
+    if isinstance(value, SharedBuffer):
+        return value.load(blocks)
+    if isinstance(value, (list, tuple)):
+        return type(value)(restore_payload(item, blocks) for item in value)
+    if isinstance(value, dict):
+        return {key: restore_payload(item, blocks) for key, item in value.items()}
+    return value
+
+def release_shared_blocks(blocks: list, unlink: bool = False):
+    for block in blocks:
+        block.close()
+        if unlink:
+            try:
+                block.unlink()
+            except FileNotFoundError:
+                pass
+    blocks.clear()
+
+def _discard_shared_result(future):
+    """İptal edilen bir işin çıktı segmentlerini okumadan siler"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    blocks = []
+    try:
+        restore_payload(future.result(), blocks)
+    finally:
+        release_shared_blocks(blocks, unlink=True)
+
+def _init_worker_process(workers: int):
+    """
+    Process havuzundaki her worker başlarken çalışır: cascade'ler ilk istekten
+    önce yüklenir, OpenCV'nin iç thread havuzu çekirdekleri worker'lar arasında
+    paylaşacak kadar küçültülür, süreç-yerel sonuç önbelleği kapatılır.
+    """
+    global CACHE_ENABLED, _worker_palettes
+    cv2.setNumThreads(max(1, (os.cpu_count() or 1) // workers))
+    detector_registry.load_all()
+    # Önbellek ana sürecindir (cached_run); efektlerin içindeki palet araması
+    # ana sürece dönemediği için worker'da küçük bir süreç-yerel LRU kullanır
+    if CACHE_ENABLED:
+        _worker_palettes = OrderedDict()
+    CACHE_ENABLED = False
+
+def _run_in_worker_process(fn, args, kwargs, collect_timings: bool = False, share_result: bool = False):
+    """
+    Process havuzunda çalışır; HTTPException pickle edilemediği için sade hataya çevrilir.
+    collect_timings ise aşama süreleri sonuçla birlikte ana sürece taşınır.
+    Girdi segmentleri kopyalanıp bırakılır (silmek ana sürecin işi); share_result
+    ise büyük çıktılar yeni segmentlerle döner ve ana süreç okuyunca siler.
+    """
+    blocks = []
+    try:
+        args = restore_payload(args, blocks)
+        kwargs = restore_payload(kwargs, blocks)
+    finally:
+        release_shared_blocks(blocks)
+    
+    timings = RequestTimings() if collect_timings else None
+    token = request_timings.set(timings)
+    try:
+        result = fn(*args, **kwargs)
+    except HTTPException as e:
+        raise RuntimeError(f"{e.status_code}: {e.detail}") from None
+    finally:
+        request_timings.reset(token)
+    output = (result, timings.export()) if collect_timings else result
+    if share_result:
+        output = share_payload(output, blocks)
+        release_shared_blocks(blocks)
+    return output
+
+image_executor = ImageExecutor(EXECUTOR_KIND, EXECUTOR_WORKERS, ENDPOINT_CONCURRENCY, ENDPOINT_LIMITS,
+                               EXECUTOR_MAX_TASKS, EXECUTOR_START_METHOD)
+
+@app.on_event("startup")
+def start_executor():
+    image_executor.start()
+
+@app.on_event("shutdown")
+def stop_executor():
+    image_executor.shutdown()
+
+# Sadece çalışma çözünürlüğü gereken yollar JPEG'i DCT ölçeklemesiyle (1/2, 1/4, 1/8)
+# küçük decode eder; JPEG olmayan formatlarda OpenCV tam decode edip küçültür
+REDUCED_DECODE_FLAGS = {
+    False: {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8},
+    True: {1: cv2.IMREAD_GRAYSCALE, 2: cv2.IMREAD_REDUCED_GRAYSCALE_2, 4: cv2.IMREAD_REDUCED_GRAYSCALE_4, 8: cv2.IMREAD_REDUCED_GRAYSCALE_8},
+}
+EXIF_ORIENTATION_TAG = 0x0112
+
+def image_header(image_data: bytes) -> Optional[tuple]:
+    """(genişlik, yükseklik, EXIF yönü); sadece başlık okunur, okunamazsa None"""
+    try:
+        with Image.open(io.BytesIO(image_data)) as pil_image:
+            orientation = pil_image.getexif().get(EXIF_ORIENTATION_TAG, 1)
+            return pil_image.size[0], pil_image.size[1], orientation if orientation in range(1, 9) else 1
+    except Exception:
+        return None
+
+def reduced_decode_factor(width: int, height: int, max_side: Optional[int]) -> int:
+    """Uzun kenarı max_side'ın altına düşürmeyen en büyük DCT küçültme oranı"""
+    if not max_side or max_side <= 0:
+        return 1
+    for factor in (8, 4, 2):
+        if max(width, height) / factor >= max_side:
+            return factor
+    return 1
+
+def decode_image_bytes(image_data: bytes, gray: bool = False, max_side: Optional[int] = None,
+                       header: Optional[tuple] = None) -> np.ndarray:
+    """
+    Ham görsel byte'larını doğrudan OpenCV image'e (gray=True ise tek kanala)
+    dönüştür. max_side verilirse uzun kenarı en az max_side kalacak kadar küçük
+    decode edilir; başlığı zaten okuyan çağıran onu header ile verir.
+    """
+    factor = 1
+    if max_side:
+        if header is None:
+            header = image_header(image_data)
+        if header is not None:
+            factor = reduced_decode_factor(header[0], header[1], max_side)
+    
+    buffer = np.frombuffer(image_data, dtype=np.uint8)
+    # EXIF yönü PIL yolundaki gibi yok sayılır; koordinatlar diskteki piksel düzenindedir
+    opencv_image = cv2.imdecode(buffer, REDUCED_DECODE_FLAGS[gray][factor] | cv2.IMREAD_IGNORE_ORIENTATION)
+    if opencv_image is not None:
+        return opencv_image
+    
+    # OpenCV'nin açamadığı formatlar için PIL'e düş
+    pil_image = Image.open(io.BytesIO(image_data))
+    if factor > 1:
+        pil_image.draft("L" if gray else "RGB", (pil_image.size[0] // factor, pil_image.size[1] // factor))
+    if gray:
+        return np.array(pil_image.convert('L'))
+    return cv2.cvtColor(np.array(pil_image.convert('RGB')), cv2.COLOR_RGB2BGR)
+
+def decode_base64_image(base64_string: str, gray: bool = False, max_side: Optional[int] = None,
+                        header: Optional[tuple] = None) -> np.ndarray:
     """Base64 stringi OpenCV image'e dönüştür"""
     try:
         # Base64 decode
         image_data = base64.b64decode(base64_string)
-        # PIL Image'e dönüştür
-        pil_image = Image.open(io.BytesIO(image_data))
-        # RGB'ye dönüştür
-        pil_image = pil_image.convert('RGB')
-        # OpenCV formatına dönüştür
-        opencv_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-        return opencv_image
+        return decode_image_bytes(image_data, gray, max_side, header)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid base64 image: {str(e)}")
 
-def encode_image_to_base64(image: np.ndarray) -> str:
+def load_image(source: Union[str, bytes], max_side: Optional[int] = None, gray: bool = False,
+               header: Optional[tuple] = None) -> np.ndarray:
+    """
+    Base64 string veya binary upload'dan OpenCV image üret. max_side verilirse
+    (önizleme gibi) görsel küçük decode edilebilir; çağıran boyutu kendisi ölçer.
+    """
+    with timed_stage("decode"):
+        if isinstance(source, str):
+            image = decode_base64_image(source, gray, max_side, header)
+        else:
+            try:
+                image = decode_image_bytes(source, gray, max_side, header)
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=f"Invalid image file: {str(e)}")
+    observe_metric("image_megapixels", image.shape[0] * image.shape[1] / 1e6)
+    return image
+
+def orient_image(image: np.ndarray, orientation: int) -> np.ndarray:
+    """Diskteki piksel düzenini EXIF yönüne göre dik (görüntülendiği) hale getirir"""
+    if orientation == 2:
+        return cv2.flip(image, 1)
+    if orientation == 3:
+        return cv2.rotate(image, cv2.ROTATE_180)
+    if orientation == 4:
+        return cv2.flip(image, 0)
+    if orientation == 5:
+        return cv2.transpose(image)
+    if orientation == 6:
+        return cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)
+    if orientation == 7:
+        return cv2.rotate(cv2.transpose(image), cv2.ROTATE_180)
+    if orientation == 8:
+        return cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    return image
+
+class GrayImage:
+    """
+    Tespit için gri görsel. EXIF yönüne göre dik çevrilmiştir (cascade'ler
+    yan yatmış yüzleri bulamaz) ve küçük decode edilmiş olabilir. detect ve
+    crop bu karede çalışır; to_original dikdörtgenleri load_image'in döndürdüğü
+    tam çözünürlüklü, diskteki piksel düzenine çevirir.
+    """
+
+    def __init__(self, gray: np.ndarray, width: int, height: int, orientation: int = 1):
+        self.gray = gray
+        # Orijinal (diskteki) boyutlar
+        self.width = width
+        self.height = height
+        self.orientation = orientation
+        self.transposed = orientation in (5, 6, 7, 8)
+        upright_width, upright_height = (height, width) if self.transposed else (width, height)
+        self.scale_x = upright_width / gray.shape[1]
+        self.scale_y = upright_height / gray.shape[0]
+
+    @classmethod
+    def from_image(cls, image: np.ndarray, orientation: int = 1) -> "GrayImage":
+        """Zaten decode edilmiş BGR görselden"""
+        gray = orient_image(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), orientation)
+        return cls(gray, image.shape[1], image.shape[0], orientation)
+
+    def detect(self, model: str = "face", max_side: Optional[int] = None, **params) -> np.ndarray:
+        """detect_objects'i bu karede çalıştırır; minSize/maxSize orijinal piksel cinsindendir"""
+        for key in ("minSize", "maxSize"):
+            if params.get(key) is not None:
+                size = params[key][::-1] if self.transposed else params[key]
+                params[key] = (max(1, round(size[0] / self.scale_x)), max(1, round(size[1] / self.scale_y)))
+        return detect_objects(self.gray, model, max_side=max_side, **params)
+
+    def to_original(self, rects) -> np.ndarray:
+        """Bu karedeki (x, y, w, h) dikdörtgenlerini orijinal görsel koordinatlarına çevirir"""
+        rects = np.asarray(rects, dtype=np.float64).reshape(-1, 4)
+        if self.scale_x == 1.0 and self.scale_y == 1.0 and self.orientation == 1:
+            return rects.astype(np.int32)
+        
+        # Küçük kareden dik, tam çözünürlüklü kareye
+        u0, v0 = rects[:, 0] * self.scale_x, rects[:, 1] * self.scale_y
+        u1, v1 = (rects[:, 0] + rects[:, 2]) * self.scale_x, (rects[:, 1] + rects[:, 3]) * self.scale_y
+        # Dik kareden diskteki düzene (köşeler; kenar koordinatları)
+        x0, y0 = self._unorient(u0, v0)
+        x1, y1 = self._unorient(u1, v1)
+        left = np.clip(np.round(np.minimum(x0, x1)), 0, self.width)
+        top = np.clip(np.round(np.minimum(y0, y1)), 0, self.height)
+        right = np.clip(np.round(np.maximum(x0, x1)), 0, self.width)
+        bottom = np.clip(np.round(np.maximum(y0, y1)), 0, self.height)
+        return np.stack([left, top, right - left, bottom - top], axis=1).astype(np.int32)
+
+    def _unorient(self, u: np.ndarray, v: np.ndarray) -> tuple:
+        W, H = self.width, self.height
+        return {
+            1: (u, v), 2: (W - u, v), 3: (W - u, H - v), 4: (u, H - v),
+            5: (v, u), 6: (v, H - u), 7: (W - v, H - u), 8: (W - v, u)
+        }[self.orientation]
+
+def load_gray(source: Union[str, bytes], max_side: Optional[int] = None) -> GrayImage:
+    """
+    Tespit yolları için doğrudan gri decode: renkli decode ve cvtColor atlanır,
+    JPEG tespit çözünürlüğüne (max_side, verilmediyse DETECTION_MAX_SIDE) kadar
+    küçük decode edilir. EXIF yönü uygulanır.
+    """
+    if max_side is None:
+        max_side = DETECTION_MAX_SIDE
+    image_data = source_bytes(source)
+    # Başlık bir kez okunur: hem küçültme oranı hem yön için
+    header = image_header(image_data)
+    gray = load_image(image_data, max_side, gray=True, header=header)
+    if header is None:
+        return GrayImage(gray, gray.shape[1], gray.shape[0])
+    width, height, orientation = header
+    return GrayImage(orient_image(gray, orientation), width, height, orientation)
+
+def load_oriented_image(source: Union[str, bytes]) -> tuple:
+    """
+    Tam çözünürlüklü renkli görsel ve EXIF yönü: (görsel, yön). Görsel diskteki
+    piksel düzeninde kalır; tespit GrayImage.from_image(görsel, yön) karesinde yapılır.
+    """
+    image_data = source_bytes(source)
+    header = image_header(image_data)
+    return load_image(image_data), header[2] if header is not None else 1
+
+def source_bytes(source: Union[str, bytes]) -> bytes:
+    """Base64 string ise çözülmüş, binary ise olduğu gibi görsel byte'ları"""
+    if isinstance(source, str):
+        try:
+            return base64.b64decode(source)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid base64 image: {str(e)}")
+    return bytes(source)
+
+class ImageContext:
+    """
+    Tek bir isteğin decode edilmiş görselini, gri tonlu halini ve tespit
+    sonuçlarını saklar. Handler'ın çağırdığı yardımcılar aynı context'i
+    paylaşır; görsel bir kez decode edilir, aynı cascade aynı parametrelerle
+    bir kez çalışır. Renkli görsel de gerekecekse image, frame'den önce
+    okunmalıdır; yoksa tespit için ayrı bir gri decode yapılır. Görseli
+    yerinde değiştiren adımlar tespitlerden sonra gelmelidir.
+    """
+
+    def __init__(self, source: Union[str, bytes], max_side: Optional[int] = None):
+        self.source = source
+        # Renkli görsel gerekmeden tespit yapılırsa gri kare bu çözünürlükte decode edilir
+        self.max_side = max_side
+        self._image = None
+        self._orientation = 1
+        self._frame = None
+        self._detections = {}
+
+    @property
+    def image(self) -> np.ndarray:
+        if self._image is None:
+            self._image, self._orientation = load_oriented_image(self.source)
+            # Ham byte'lar artık gerekmiyor
+            self.source = None
+        return self._image
+
+    @property
+    def frame(self) -> GrayImage:
+        """Tespit karesi: renkli görsel decode edildiyse ondan, yoksa doğrudan gri decode"""
+        if self._frame is None:
+            if self._image is None:
+                self._frame = load_gray(self.source, self.max_side)
+            else:
+                self._frame = GrayImage.from_image(self._image, self._orientation)
+        return self._frame
+
+    @property
+    def gray(self) -> np.ndarray:
+        return self.frame.gray
+
+    def detect(self, model: str = "face", max_side: Optional[int] = None, **params) -> np.ndarray:
+        """
+        frame.detect sonucunu (model, max_side, parametreler) anahtarıyla saklar;
+        dikdörtgenler frame karesindedir (orijinale frame.to_original ile)
+        """
+        key = (model, max_side, tuple(sorted(params.items())))
+        if key not in self._detections:
+            self._detections[key] = self.frame.detect(model, max_side=max_side, **params)
+        return self._detections[key]
+
+async def read_image_source(image: Optional[str], image_file: Optional[UploadFile], field: str = "image") -> Union[str, bytes]:
+    """Binary upload varsa onu, yoksa base64 form alanını döndürür"""
+    if image_file is not None:
+        data = await image_file.read()
+        if data:
+            return data
+    if image:
+        return image
+    raise HTTPException(status_code=400, detail=f"Either '{field}' (base64) or '{field}_file' (binary upload) is required")
+
+async def read_image_sources(images: Optional[List[str]], image_files: Optional[List[UploadFile]], field: str = "images") -> List[Union[str, bytes]]:
+    """Base64 listesi ve binary upload'ları tek listede birleştirir (önce base64, sonra dosyalar)"""
+    sources = [image for image in (images or []) if image]
+    for image_file in image_files or []:
+        data = await image_file.read()
+        if data:
+            sources.append(data)
+    if not sources:
+        raise HTTPException(status_code=400, detail=f"Either '{field}' (base64) or '{field}_files' (binary upload) is required")
+    return sources
+
+# Binary yanıt formatları
+IMAGE_MEDIA_TYPES = {
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+    "png": "image/png",
+}
+RESPONSE_FORMATS = ("json",) + tuple(IMAGE_MEDIA_TYPES)
+DEFAULT_IMAGE_QUALITY = 95
+
+def encode_image(image: np.ndarray, image_format: str = "jpeg", quality: int = DEFAULT_IMAGE_QUALITY) -> bytes:
+    """OpenCV image'i istenen formatta byte'lara dönüştür"""
+    quality = max(1, min(int(quality), 100))
+    if image_format == "jpeg":
+        ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    elif image_format == "webp":
+        ok, buffer = cv2.imencode(".webp", image, [cv2.IMWRITE_WEBP_QUALITY, quality])
+    elif image_format == "png":
+        ok, buffer = cv2.imencode(".png", image, [cv2.IMWRITE_PNG_COMPRESSION, 3])
+    else:
+        raise ValueError(f"Unknown image format: {image_format}")
+    if not ok:
+        raise ValueError(f"Image could not be encoded as {image_format}")
+    return buffer.tobytes()
+
+def encode_image_to_base64(image: np.ndarray, quality: int = DEFAULT_IMAGE_QUALITY) -> str:
     """OpenCV image'i base64 stringe dönüştür"""
     try:
-        # OpenCV'den PIL'e dönüştür
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        pil_image = Image.fromarray(image_rgb)
-        
-        # Base64'e encode et
-        buffer = io.BytesIO()
-        pil_image.save(buffer, format='JPEG', quality=95)
-        img_str = base64.b64encode(buffer.getvalue()).decode()
-        return img_str
+        return base64.b64encode(encode_image(image, "jpeg", quality)).decode()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Image encoding error: {str(e)}")
 
+def encode_output(image: np.ndarray, response_format: str = "json", quality: int = DEFAULT_IMAGE_QUALITY) -> Union[str, bytes]:
+    """JSON modunda base64 string, binary modda ham image byte'ları döndürür"""
+    with timed_stage("encode"):
+        if response_format == "json":
+            return encode_image_to_base64(image, quality)
+        return encode_image(image, response_format, quality)
+
+def resolve_response_format(request: Request, response_format: Optional[str]) -> str:
+    """Yanıt formatını query parametresinden, yoksa Accept header'ından seç"""
+    if response_format:
+        response_format = response_format.lower()
+        if response_format == "jpg":
+            response_format = "jpeg"
+        if response_format not in RESPONSE_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unknown response_format: {response_format}. Use one of {', '.join(RESPONSE_FORMATS)}")
+        return response_format
+    
+    accept = request.headers.get("accept", "")
+    for image_format, media_type in IMAGE_MEDIA_TYPES.items():
+        if media_type in accept:
+            return image_format
+    if "multipart/mixed" in accept:
+        return "jpeg"
+    return "json"
+
+def image_response(result: dict, response_format: str, image_key: str = "processed_image"):
+    """Binary modda image'i ham byte olarak, diğer alanları header'da döndürür"""
+    if response_format == "json" or not isinstance(result.get(image_key), bytes):
+        return result
+    
+    info = {key: value for key, value in result.items() if key != image_key}
+    return Response(
+        content=result[image_key],
+        media_type=IMAGE_MEDIA_TYPES[response_format],
+        headers={"X-Processing-Info": json.dumps(info, default=str)}
+    )
+
+def multipart_part(boundary: str, headers: dict, body: bytes) -> bytes:
+    """multipart/mixed gövdesi için tek bir parça üret"""
+    lines = [f"--{boundary}"]
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    lines.append(f"Content-Length: {len(body)}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body + b"\r\n"
+
+def multipart_response(items, summary, response_format: str, image_key: str = "processed_image") -> StreamingResponse:
+    """
+    Toplu sonuçları her görsel bitince multipart/mixed olarak akıtır.
+    items: (index, result) üreten async generator
+    summary: image'siz sonuç listesini alıp son JSON parçasını döndüren fonksiyon
+    Durum kodu ilk parçayla gönderildiği için istek hataları çağıran tarafta akıştan
+    önce doğrulanmalıdır; akış sırasındaki hata bir JSON hata parçası olarak yazılır
+    ve yanıt yine özet ve kapanış sınırıyla biter.
+    """
+    boundary = f"facefade-{uuid.uuid4().hex}"
+    
+    async def body():
+        results = []
+        error = None
+        index = -1
+        try:
+            async for index, result in items:
+                image_bytes = result.get(image_key)
+                info = {key: value for key, value in result.items() if key != image_key}
+                results.append(info)
+                if isinstance(image_bytes, bytes):
+                    yield multipart_part(boundary, {
+                        "Content-Type": IMAGE_MEDIA_TYPES[response_format],
+                        "X-Image-Index": str(index),
+                        "X-Processing-Info": json.dumps(info, default=str)
+                    }, image_bytes)
+                else:
+                    yield multipart_part(boundary, {
+                        "Content-Type": "application/json",
+                        "X-Image-Index": str(index)
+                    }, json.dumps(result, default=str).encode())
+        except Exception as e:
+            # Generator bu noktada kapandı; kalan görseller işlenmez
+            error = e.detail if isinstance(e, HTTPException) else str(e)
+            yield multipart_part(boundary, {
+                "Content-Type": "application/json",
+                "X-Image-Index": str(index + 1),
+                "X-Error": "true"
+            }, json.dumps({"index": index + 1, "success": False, "error": error}).encode())
+        final = summary(results)
+        if error is not None:
+            final = dict(final, success=False, error=error)
+        yield multipart_part(boundary, {"Content-Type": "application/json", "X-Summary": "true"}, json.dumps(final, default=str).encode())
+        yield f"--{boundary}--\r\n".encode()
+    
+    return StreamingResponse(body(), media_type=f"multipart/mixed; boundary={boundary}")
+
+# Sonuç önbelleği: bellek (LRU) + TEMP_DIR altında boyutu sınırlı disk katmanı
+CACHE_ENABLED = os.getenv("FACEFADE_CACHE", "1") != "0"
+CACHE_MEMORY_MB = int(os.getenv("FACEFADE_CACHE_MEMORY_MB", "128"))
+CACHE_DISK_MB = int(os.getenv("FACEFADE_CACHE_DISK_MB", "512"))
+CACHE_DIR = os.path.join(TEMP_DIR, "cache")
+
+def _code_version() -> str:
+    with open(__file__, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+# Anahtara giren kod sürümü: deploy sonrası eski kodun sonuçları (kalıcı diskte) kullanılmaz
+CACHE_VERSION = _code_version()
+
+def cache_config() -> dict:
+    """Parametre None iken sonucu belirleyen ortam ayarları; anahtara girer"""
+    return {
+        "detection_max_side": DETECTION_MAX_SIDE,
+        "fast_body_max_side": FAST_BODY_MAX_SIDE,
+        "preview_max_side": PREVIEW_MAX_SIDE
+    }
+
+class ResultCache:
+    """
+    Görsel byte'larının hash'i + işlem + parametrelerle anahtarlanan sonuç önbelleği.
+    Bellek katmanı LRU'dur; disk katmanı en eski erişilenden başlayarak
+    boyut sınırına kadar temizlenir. Kayıtlar kod sürümüne ait alt klasördedir,
+    diğer sürümlerin klasörleri açılışta silinir.
+    """
+
+    def __init__(self, directory: str, memory_bytes: int, disk_bytes: int, version: str = CACHE_VERSION):
+        self.root = directory
+        self.directory = os.path.join(directory, version)
+        self.version = version
+        self.memory_limit = memory_bytes
+        self.disk_limit = disk_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "memory_evictions": 0, "disk_evictions": 0}
+        if self.disk_limit > 0:
+            os.makedirs(self.directory, exist_ok=True)
+            self._remove_stale_versions()
+            self._scan_disk()
+
+    def _remove_stale_versions(self):
+        for name in os.listdir(self.root):
+            if name == self.version:
+                continue
+            path = os.path.join(self.root, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+
+    def _scan_disk(self):
+        entries = []
+        for filename in os.listdir(self.directory):
+            if filename.endswith(".pkl"):
+                path = os.path.join(self.directory, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, filename[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    @staticmethod
+    def _key_param(value):
+        if isinstance(value, np.ndarray):
+            return {"ndarray": hashlib.sha256(np.ascontiguousarray(value).data).hexdigest(), "shape": value.shape, "dtype": str(value.dtype)}
+        return str(value)
+
+    @classmethod
+    def make_key(cls, image_data: bytes, operation: str, params) -> str:
+        image_hash = hashlib.sha256(image_data).hexdigest()
+        params_json = json.dumps(params, sort_keys=True, default=cls._key_param)
+        config_json = json.dumps(cache_config(), sort_keys=True)
+        return hashlib.sha256(f"{CACHE_VERSION}:{image_hash}:{operation}:{params_json}:{config_json}".encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".pkl")
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return copy.deepcopy(entry[0])
+            on_disk = key in self._disk
+
+        if on_disk:
+            try:
+                with open(self._path(key), "rb") as f:
+                    payload = f.read()
+                os.utime(self._path(key))
+                value = pickle.loads(payload)
+            except (FileNotFoundError, pickle.UnpicklingError, EOFError):
+                with self._lock:
+                    self._forget_disk(key)
+            else:
+                with self._lock:
+                    if key in self._disk:
+                        self._disk.move_to_end(key)
+                    self._stats["disk_hits"] += 1
+                    self._remember(key, value, len(payload))
+                return copy.deepcopy(value)
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, key: str, value):
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._stats["stores"] += 1
+            self._remember(key, copy.deepcopy(value), len(payload))
+
+        if 0 < len(payload) <= self.disk_limit:
+            path = self._path(key)
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self._forget_disk(key)
+                self._disk[key] = len(payload)
+                self._disk_bytes += len(payload)
+                evicted = self._evict_disk()
+            for old_key in evicted:
+                try:
+                    os.remove(self._path(old_key))
+                except FileNotFoundError:
+                    pass
+
+    def _remember(self, key: str, value, size: int):
+        """Bellek katmanına ekle (kilit altında çağrılır)"""
+        if size > self.memory_limit:
+            return
+        if key in self._memory:
+            self._memory_bytes -= self._memory.pop(key)[1]
+        self._memory[key] = (value, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_limit and self._memory:
+            _, (_, old_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= old_size
+            self._stats["memory_evictions"] += 1
+
+    def _forget_disk(self, key: str):
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_bytes -= size
+
+    def _evict_disk(self) -> List[str]:
+        evicted = []
+        while self._disk_bytes > self.disk_limit and self._disk:
+            old_key, old_size = self._disk.popitem(last=False)
+            self._disk_bytes -= old_size
+            self._stats["disk_evictions"] += 1
+            evicted.append(old_key)
+        return evicted
+
+    def clear(self):
+        with self._lock:
+            keys = list(self._disk)
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._disk.clear()
+            self._disk_bytes = 0
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def describe(self) -> dict:
+        with self._lock:
+            hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+            lookups = hits + self._stats["misses"]
+            return {
+                "enabled": CACHE_ENABLED,
+                "version": self.version,
+                **self._stats,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_items": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "memory_limit_bytes": self.memory_limit,
+                "disk_items": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+                "disk_limit_bytes": self.disk_limit
+            }
+
+result_cache = ResultCache(CACHE_DIR, CACHE_MEMORY_MB * 1024 * 1024, CACHE_DISK_MB * 1024 * 1024)
+
+def refresh_cached_result(result):
+    """
+    Önbellekten dönen yanıtın zaman damgalarını bu isteğe göre yeniler; ilk
+    hesaplamanın süreleri (elapsed_ms) bu istekte harcanmadığı için sıfırlanır
+    """
+    if isinstance(result, dict):
+        result = {key: refresh_cached_result(value) for key, value in result.items()}
+        if "processed_at" in result:
+            result["processed_at"] = datetime.now().isoformat()
+        if "elapsed_ms" in result:
+            result["elapsed_ms"] = 0.0
+    elif isinstance(result, list):
+        result = [refresh_cached_result(item) for item in result]
+    return result
+
+def _cache_lookup(fn, source: Union[str, bytes], args: tuple) -> tuple:
+    image_data = source_bytes(source)
+    key = result_cache.make_key(image_data, fn.__name__, args)
+    return image_data, key, result_cache.get(key)
+
+async def cached_run(endpoint: str, fn, source: Union[str, bytes], *args):
+    """
+    image_executor.run(endpoint, fn, source, *args) sonucunu önbellekle sarar.
+    Arama ve kayıt her zaman ana süreçte yapılır; process havuzunda da tek
+    bellek katmanı, tek istatistik ve tek disk sınırı olur.
+    """
+    if not CACHE_ENABLED:
+        return await image_executor.run(endpoint, fn, source, *args)
+    
+    image_data, key, cached = await asyncio.to_thread(_cache_lookup, fn, source, args)
+    if cached is not None:
+        return refresh_cached_result(cached)
+    
+    result = await image_executor.run(endpoint, fn, image_data, *args)
+    await asyncio.to_thread(result_cache.put, key, result)
+    return result
+
+def cached_result(fn, source: Union[str, bytes], *args):
+    """cached_run'ın sadece okuyan hali: fn(source, *args) önbellekte yoksa None"""
+    if not CACHE_ENABLED:
+        return None
+    return result_cache.get(result_cache.make_key(source_bytes(source), fn.__name__, args))
+
 @app.get("/")
 async def root():
     return {"message": "FaceFade AI Backend is running!", "version": "1.0.0"}
 
 @app.post("/detect-face")
 async def detect_faces(
-    image: str = Form(..., description="Base64 encoded image")
+    image: Optional[str] = Form(default=None, description="Base64 encoded image"),
+    image_file: Optional[UploadFile] = File(default=None, description="Raw image file (binary upload)"),
+    detection_max_side: Optional[int] = Form(default=None, description="Run detection with the longest side capped at this many pixels (0 = full resolution)")
 ):
     """
     Görseldeki yüzleri tespit eder
-    Input: Base64 encoded image
+    Input: Base64 encoded image veya binary upload (image_file)
     Output: Yüz sayısı ve koordinatları
     """
+    source = await read_image_source(image, image_file)
     try:
-        # Base64'ten image'e dönüştür
-        opencv_image = decode_base64_image(image)
-        
-        # OpenCV Haar Cascade ile yüz tespiti
-        gray_image = cv2.cvtColor(opencv_image, cv2.COLOR_BGR2GRAY)
-        
-        # Haar cascade klasörü (OpenCV ile gelir)
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        
-        # Yüz tespiti
-        face_rects = face_cascade.detectMultiScale(
-            gray_image,
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(30, 30)
-        )
-        
-        # Sonuçları formatla
-        faces = []
-        for i, (x, y, w, h) in enumerate(face_rects):
-            faces.append({
-                "id": i,
-                "coordinates": {
-                    "top": int(y),
-                    "right": int(x + w),
-                    "bottom": int(y + h),
-                    "left": int(x)
-                },
-                "width": int(w),
-                "height": int(h),
-                "confidence": 0.85  # Haar cascade için ortalama güven skoru
-            })
-        
-        return {
-            "success": True,
-            "face_count": len(faces),
-            "faces": faces,
-            "image_dimensions": {
-                "width": opencv_image.shape[1],
-                "height": opencv_image.shape[0]
-            }
-        }
-        
+        return await cached_run("detect-face", detect_faces_sync, source, detection_max_side)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Face detection error: {str(e)}")
 
+def detect_faces_sync(image: Union[str, bytes], max_side: Optional[int] = None) -> dict:
+    """Yüz tespitinin CPU tarafı (havuzda çalışır)"""
+    # Sadece gri kare gerekir; max_side varsa JPEG küçük decode edilir
+    frame = load_gray(image, max_side)
+    face_rects = frame.detect("face", max_side=max_side, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
+    faces = face_entries(frame.to_original(face_rects))
+    
+    return {
+        "success": True,
+        "face_count": len(faces),
+        "faces": faces,
+        "image_dimensions": {
+            "width": frame.width,
+            "height": frame.height
+        },
+        "detection_scale": round(detection_scale((frame.height, frame.width), max_side), 4)
+    }
+
+def find_faces(opencv_image: np.ndarray, max_side: Optional[int] = None, orientation: int = 1) -> List[dict]:
+    """
+    Yüzleri /detect-face yanıtındaki biçimde döndürür. Tespit EXIF yönüne göre
+    dik karede yapılır; koordinatlar opencv_image'in piksel düzenindedir
+    """
+    # OpenCV Haar Cascade ile yüz tespiti
+    frame = GrayImage.from_image(opencv_image, orientation)
+    
+    # Yüz tespiti (gerekirse küçültülmüş görselde)
+    face_rects = frame.detect(
+        "face",
+        max_side=max_side,
+        scaleFactor=1.1,
+        minNeighbors=5,
+        minSize=(30, 30)
+    )
+    return face_entries(frame.to_original(face_rects))
+
+def face_entries(face_rects: np.ndarray) -> List[dict]:
+    # Sonuçları formatla
+    faces = []
+    for i, (x, y, w, h) in enumerate(face_rects):
+        faces.append({
+            "id": i,
+            "coordinates": {
+                "top": int(y),
+                "right": int(x + w),
+                "bottom": int(y + h),
+                "left": int(x)
+            },
+            "width": int(w),
+            "height": int(h),
+            "confidence": 0.85  # Haar cascade için ortalama güven skoru
+        })
+    return faces
+
 @app.post("/blur-face")
 async def blur_face(
-    image: str = Form(..., description="Base64 encoded image"),
+    request: Request,
+    image: Optional[str] = Form(default=None, description="Base64 encoded image"),
+    image_file: Optional[UploadFile] = File(default=None, description="Raw image file (binary upload)"),
     face_coordinates: str = Form(..., description="JSON string of face coordinates"),
-    blur_intensity: int = Form(default=15, description="Blur intensity (5-50)")
+    blur_intensity: int = Form(default=15, description="Blur intensity (5-50)"),
+    response_format: Optional[str] = Query(default=None, description="json (default), jpeg, webp, png"),
+    quality: int = Query(default=DEFAULT_IMAGE_QUALITY, ge=1, le=100, description="Output image quality")
 ):
     """
     Belirtilen yüzü bulanıklaştırır
     """
+    source = await read_image_source(image, image_file)
+    response_format = resolve_response_format(request, response_format)
     try:
-        # Parameters validation
-        if blur_intensity < 5 or blur_intensity > 50:
-            blur_intensity = 15
-            
-        # Base64'ten image'e dönüştür
-        opencv_image = decode_base64_image(image)
-        
-        # Koordinatları parse et
-        coords = json.loads(face_coordinates)
-        top = coords["top"]
-        right = coords["right"]
-        bottom = coords["bottom"]
-        left = coords["left"]
-        
-        # Yüz bölgesini extract et
-        face_region = opencv_image[top:bottom, left:right]
-        
-        # Gaussian blur uygula
-        blurred_face = cv2.GaussianBlur(face_region, (blur_intensity, blur_intensity), 0)
-        
-        # Blurred face'i orijinal image'e geri koy
-        result_image = opencv_image.copy()
-        result_image[top:bottom, left:right] = blurred_face
-        
-        # Base64'e encode et
-        result_base64 = encode_image_to_base64(result_image)
-        
-        return {
-            "success": True,
-            "processed_image": result_base64,
-            "processing_info": {
-                "blur_intensity": blur_intensity,
-                "face_coordinates": coords,
-                "processed_at": datetime.now().isoformat()
-            }
-        }
-        
+        result = await cached_run("blur-face", blur_face_sync, source, face_coordinates, blur_intensity, response_format, quality)
+        return image_response(result, response_format)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Face blur error: {str(e)}")
 
+def blur_face_sync(image: Union[str, bytes], face_coordinates: str, blur_intensity: int,
+                   response_format: str = "json", quality: int = DEFAULT_IMAGE_QUALITY) -> dict:
+    """Yüz bulanıklaştırmanın CPU tarafı (havuzda çalışır)"""
+    # Parameters validation
+    if blur_intensity < 5 or blur_intensity > 50:
+        blur_intensity = 15
+        
+    # Base64 veya binary upload'dan image'e dönüştür
+    opencv_image = load_image(image)
+    
+    # Koordinatları parse et
+    coords = json.loads(face_coordinates)
+    
+    with timed_stage("process"):
+        result_image = blur_region(opencv_image, coords, blur_intensity)
+    
+    # Base64'e (veya binary formata) encode et
+    result_image_data = encode_output(result_image, response_format, quality)
+    
+    return {
+        "success": True,
+        "processed_image": result_image_data,
+        "processing_info": {
+            "blur_intensity": blur_intensity,
+            "face_coordinates": coords,
+            "processed_at": datetime.now().isoformat()
+        }
+    }
+
+def blur_region(image: np.ndarray, coords: dict, blur_intensity: int) -> np.ndarray:
+    """Yüz dikdörtgenini yerinde Gaussian blur ile bulanıklaştırır"""
+    top = coords["top"]
+    right = coords["right"]
+    bottom = coords["bottom"]
+    left = coords["left"]
+    
+    # Yüz bölgesini extract et
+    face_region = image[top:bottom, left:right]
+    
+    # Gaussian blur uygula
+    blurred_face = cv2.GaussianBlur(face_region, (blur_intensity, blur_intensity), 0)
+    
+    # Blurred face'i yerinde geri koy (decode edilen image bu isteğe ait, tam kopya gereksiz)
+    image[top:bottom, left:right] = blurred_face
+    return image
+
 @app.post("/replace-with-avatar")
 async def replace_with_avatar(
-    image: str = Form(..., description="Base64 encoded image"),
+    request: Request,
+    image: Optional[str] = Form(default=None, description="Base64 encoded image"),
+    image_file: Optional[UploadFile] = File(default=None, description="Raw image file (binary upload)"),
     face_coordinates: str = Form(..., description="JSON string of face coordinates"),
-    avatar_style: str = Form(default="cartoon", description="Avatar style: cartoon, anime, realistic, abstract")
+    avatar_style: str = Form(default="cartoon", description="Avatar style: cartoon, anime, realistic, abstract"),
+    response_format: Optional[str] = Query(default=None, description="json (default), jpeg, webp, png"),
+    quality: int = Query(default=DEFAULT_IMAGE_QUALITY, ge=1, le=100, description="Output image quality")
 ):
     """
     Yüzü AI-generated avatar ile değiştirir
     """
+    source = await read_image_source(image, image_file)
+    response_format = resolve_response_format(request, response_format)
     try:
-        # Base64'ten image'e dönüştür
-        opencv_image = decode_base64_image(image)
-        
-        # Koordinatları parse et
-        coords = json.loads(face_coordinates)
-        top = coords["top"]
-        right = coords["right"]
-        bottom = coords["bottom"]
-        left = coords["left"]
-        
-        # Yüz bölgesinin boyutlarını al
-        face_width = right - left
-        face_height = bottom - top
-        
-        # Basit avatar generation (gerçek AI avatar için Stable Diffusion kullanılabilir)
-        avatar_image = generate_simple_avatar(face_width, face_height, avatar_style)
-        
-        # Avatar'ı orijinal image'e yerleştir
-        result_image = opencv_image.copy()
-        result_image[top:bottom, left:right] = avatar_image
-        
-        # Base64'e encode et
-        result_base64 = encode_image_to_base64(result_image)
-        
-        return {
-            "success": True,
-            "processed_image": result_base64,
-            "processing_info": {
-                "avatar_style": avatar_style,
-                "face_coordinates": coords,
-                "processed_at": datetime.now().isoformat()
-            }
-        }
-        
+        result = await cached_run("replace-with-avatar", replace_with_avatar_sync, source, face_coordinates, avatar_style, response_format, quality)
+        return image_response(result, response_format)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Avatar replacement error: {str(e)}")
 
+def replace_with_avatar_sync(image: Union[str, bytes], face_coordinates: str, avatar_style: str,
+                             response_format: str = "json", quality: int = DEFAULT_IMAGE_QUALITY) -> dict:
+    """Avatar yerleştirmenin CPU tarafı (havuzda çalışır)"""
+    # Base64 veya binary upload'dan image'e dönüştür
+    opencv_image = load_image(image)
+    
+    # Koordinatları parse et
+    coords = json.loads(face_coordinates)
+    
+    with timed_stage("process"):
+        result_image = paste_avatar(opencv_image, coords, avatar_style)
+    
+    # Base64'e (veya binary formata) encode et
+    result_image_data = encode_output(result_image, response_format, quality)
+    
+    return {
+        "success": True,
+        "processed_image": result_image_data,
+        "processing_info": {
+            "avatar_style": avatar_style,
+            "face_coordinates": coords,
+            "processed_at": datetime.now().isoformat()
+        }
+    }
+
+def paste_avatar(image: np.ndarray, coords: dict, avatar_style: str) -> np.ndarray:
+    """Yüz dikdörtgenine yerinde avatar yerleştirir"""
+    top = coords["top"]
+    right = coords["right"]
+    bottom = coords["bottom"]
+    left = coords["left"]
+    
+    # Basit avatar generation (gerçek AI avatar için Stable Diffusion kullanılabilir)
+    avatar_image = generate_simple_avatar(right - left, bottom - top, avatar_style)
+    
+    # Avatar'ı yerinde yerleştir
+    image[top:bottom, left:right] = avatar_image
+    return image
+
 def generate_simple_avatar(width: int, height: int, style: str) -> np.ndarray:
     """Basit avatar generation (demo amaçlı)"""
     # PIL ile basit geometrik avatar oluştur
@@ -258,73 +1575,268 @@ def generate_simple_avatar(width: int, height: int, style: str) -> np.ndarray:
 
 @app.post("/artify-photo")
 async def artify_photo(
-    image: str = Form(..., description="Base64 encoded image"),
-    art_style: str = Form(default="van_gogh", description="Art style: van_gogh, picasso, monet, glitch, vaporwave, sketch")
+    request: Request,
+    image: Optional[str] = Form(default=None, description="Base64 encoded image"),
+    image_file: Optional[UploadFile] = File(default=None, description="Raw image file (binary upload)"),
+    art_style: str = Form(default="van_gogh", description="Art style: van_gogh, picasso, monet, glitch, vaporwave, sketch"),
+    tier: str = Form(default="final", description="final (full resolution) or preview (reduced resolution, approximate filters)"),
+    response_format: Optional[str] = Query(default=None, description="json (default), jpeg, webp, png"),
+    quality: int = Query(default=DEFAULT_IMAGE_QUALITY, ge=1, le=100, description="Output image quality")
 ):
     """
     Fotoğrafı sanatsal stille dönüştürür
     """
+    tier = resolve_tier(tier)
+    source = await read_image_source(image, image_file)
+    response_format = resolve_response_format(request, response_format)
     try:
-        # Base64'ten image'e dönüştür
-        opencv_image = decode_base64_image(image)
-        
-        # Art style'a göre filter uygula
-        stylized_image = apply_art_style(opencv_image, art_style)
-        
-        # Base64'e encode et
-        result_base64 = encode_image_to_base64(stylized_image)
-        
-        return {
-            "success": True,
-            "processed_image": result_base64,
-            "processing_info": {
-                "art_style": art_style,
-                "processed_at": datetime.now().isoformat()
-            }
-        }
-        
+        result = await cached_run("artify-photo", artify_photo_sync, source, art_style, response_format, quality, tier)
+        return image_response(result, response_format)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Photo artify error: {str(e)}")
 
-def apply_art_style(image: np.ndarray, style: str) -> np.ndarray:
-    """Sanatsal stil filtrelerini uygular"""
-    if style == "van_gogh":
-        # Van Gogh tarzı (swirl effect + color enhancement)
-        result = cv2.bilateralFilter(image, 15, 80, 80)
-        result = cv2.addWeighted(result, 0.8, cv2.GaussianBlur(result, (15, 15), 0), 0.2, 0)
+def artify_photo_sync(image: Union[str, bytes], art_style: str,
+                      response_format: str = "json", quality: int = DEFAULT_IMAGE_QUALITY, tier: str = "final") -> dict:
+    """Sanatsal dönüşümün CPU tarafı (havuzda çalışır)"""
+    # Base64 veya binary upload'dan image'e dönüştür; önizlemede JPEG küçük decode edilir
+    opencv_image, scale = load_tier_image(image, tier)
+    
+    # Art style'a göre filter uygula
+    with timed_stage("process"):
+        stylized_image = apply_art_style(opencv_image, art_style, tier, scale)
+    
+    # Base64'e (veya binary formata) encode et
+    result_image_data = encode_output(stylized_image, response_format, tier_quality(tier, quality))
+    
+    return {
+        "success": True,
+        "processed_image": result_image_data,
+        "processing_info": {
+            "art_style": art_style,
+            "tier": tier,
+            "output_size": {"width": stylized_image.shape[1], "height": stylized_image.shape[0]},
+            "processed_at": datetime.now().isoformat()
+        }
+    }
+
+# Renk tonu dönüşümleri: adımlar 256 girişlik kanal başına tablolara derlenip cv2.LUT ile uygulanır
+def channel_gain(b: float = 1.0, g: float = 1.0, r: float = 1.0):
+    """np.clip(kanal * kazanç, 0, 255) ile aynı (kesirli kısım atılır)"""
+    gains = (b, g, r)
+    def step(table: np.ndarray) -> np.ndarray:
+        table = table.copy()
+        for channel, gain in enumerate(gains):
+            if gain != 1.0:
+                table[:, channel] = np.clip(table[:, channel] * gain, 0, 255)
+        return table
+    return step
+
+def scale_abs(alpha: float, beta: float):
+    """cv2.convertScaleAbs(alpha, beta) ile aynı"""
+    def step(table: np.ndarray) -> np.ndarray:
+        return cv2.convertScaleAbs(table, alpha=alpha, beta=beta)
+    return step
+
+class ColorStyleRegistry:
+    """
+    Piksel başına ton adımlarını (channel_gain, scale_abs, ...) bildirimsel olarak
+    kaydeder. Adımlar 0-255 tablosu üzerinde sırayla çalıştırılıp tek bir
+    BGR LUT'a derlenir; görsele uygulamak tek geçişlik cv2.LUT çağrısıdır.
+    """
+
+    def __init__(self):
+        self._steps = {}
+        self._luts = {}
+
+    def register(self, name: str, *steps):
+        self._steps[name] = steps
+        self._luts.pop(name, None)
+
+    def lut(self, name: str) -> np.ndarray:
+        lut = self._luts.get(name)
+        if lut is None:
+            table = np.repeat(np.arange(256, dtype=np.uint8)[:, None], 3, axis=1)
+            for step in self._steps[name]:
+                table = step(table)
+            lut = self._luts[name] = np.ascontiguousarray(table.reshape(1, 256, 3))
+        return lut
+
+    def apply(self, image: np.ndarray, name: str, in_place: bool = False) -> np.ndarray:
+        lut = self.lut(name)
+        if in_place:
+            return cv2.LUT(image, lut, dst=image)
+        return cv2.LUT(image, lut)
+
+    def names(self) -> List[str]:
+        return list(self._steps)
+
+color_styles = ColorStyleRegistry()
+# Vaporwave effect (purple/pink tint): Blue x1.2, Red x1.5
+color_styles.register("vaporwave", channel_gain(b=1.2, r=1.5))
+# Dreamy: brightness/contrast, sonra warm tone (Blue azalt, Red artır)
+color_styles.register("dreamy", scale_abs(1.1, 20), channel_gain(b=0.9, r=1.1))
+# Healing: green-blue tonlar, sonra contrast yumuşatma
+color_styles.register("healing", channel_gain(g=1.15, b=1.05), scale_abs(0.9, 15))
+
+# Büyük fotoğraflarda komşuluk filtreleri satır şeritleri halinde uygulanır
+ART_TILE_BUDGET_MB = int(os.getenv("FACEFADE_ART_TILE_BUDGET_MB", "64"))
+ART_TILE_WORKERS = int(os.getenv("FACEFADE_ART_TILE_WORKERS", "1"))
+# Şerit başına eşzamanlı tampon sayısı: girdi kenarlığı, bilateral, blur, çıktı
+ART_TILE_BUFFERS = 4
+ART_TILE_MIN_ROWS = 32
+
+# Önizleme katmanı: küçültülmüş görselde, ölçeğe uyarlanmış filtre parametreleriyle
+RENDER_TIERS = ("final", "preview")
+PREVIEW_MAX_SIDE = int(os.getenv("FACEFADE_PREVIEW_MAX_SIDE", "640"))
+PREVIEW_IMAGE_QUALITY = 75
+
+def preview_image(image: np.ndarray, max_side: Optional[int] = None) -> tuple:
+    """
+    Uzun kenarı max_side'a küçültülmüş görsel ve ölçek: (image, scale).
+    Küçük decode'dan sonra oran genelde 0.5'in üstündedir; orada bilinear
+    INTER_AREA'dan ~7 kat hızlıdır ve örtüşme (aliasing) üretmez.
+    """
+    max_side = PREVIEW_MAX_SIDE if max_side is None else max_side
+    longest = max(image.shape[:2])
+    if longest <= max_side:
+        return image, 1.0
+    scale = max_side / longest
+    size = (max(1, round(image.shape[1] * scale)), max(1, round(image.shape[0] * scale)))
+    interpolation = cv2.INTER_LINEAR if scale >= 0.5 else cv2.INTER_AREA
+    return cv2.resize(image, size, interpolation=interpolation), scale
+
+def art_kernel(size: int, scale: float, minimum: int = 1) -> int:
+    """Çekirdek boyutunu ölçeğe uyarlar; scale 1.0'da aynen döner, aksi halde tek sayı"""
+    if scale >= 1.0:
+        return size
+    return max(minimum, int(round(size * scale)) | 1)
+
+def resolve_tier(tier: str) -> str:
+    if tier not in RENDER_TIERS:
+        raise HTTPException(status_code=400, detail=f"Unknown tier: {tier}. Use one of {', '.join(RENDER_TIERS)}")
+    return tier
+
+def tier_quality(tier: str, quality: int) -> int:
+    """Önizlemede çıktı kalitesi PREVIEW_IMAGE_QUALITY ile sınırlanır"""
+    return min(quality, PREVIEW_IMAGE_QUALITY) if tier == "preview" else quality
+
+def load_tier_image(source: Union[str, bytes], tier: str) -> tuple:
+    """
+    Katmana göre decode: (görsel, orijinale göre ölçek). Önizlemede JPEG
+    PREVIEW_MAX_SIDE'ın altına inmeden DCT ölçeklemesiyle küçük decode edilir.
+    """
+    if tier != "preview":
+        return load_image(source), 1.0
+    image_data = source_bytes(source)
+    header = image_header(image_data)
+    image = load_image(image_data, PREVIEW_MAX_SIDE, header=header)
+    return image, image.shape[1] / header[0] if header is not None else 1.0
+
+def van_gogh_filter(image: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    # Van Gogh tarzı (swirl effect + color enhancement)
+    result = cv2.bilateralFilter(image, art_kernel(15, scale, 3), 80, 80 * min(scale, 1.0))
+    blur = art_kernel(15, scale)
+    return cv2.addWeighted(result, 0.8, cv2.GaussianBlur(result, (blur, blur), 0), 0.2, 0)
+
+def monet_filter(image: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    # Monet tarzı (soft, impressionist)
+    result = cv2.bilateralFilter(image, art_kernel(20, scale, 3), 200, 200 * min(scale, 1.0))
+    blur = art_kernel(25, scale)
+    return cv2.addWeighted(result, 0.7, cv2.GaussianBlur(result, (blur, blur), 0), 0.3, 0)
+
+# Halo: zincirdeki filtrelerin yarıçapları toplamı (bilateral d // 2 + Gaussian ksize // 2)
+TILED_ART_FILTERS = {
+    "van_gogh": (van_gogh_filter, 15 // 2 + 15 // 2),
+    "monet": (monet_filter, 20 // 2 + 25 // 2),
+}
+
+_tile_pool = None
+_tile_pool_lock = threading.Lock()
+
+def tile_pool() -> ThreadPoolExecutor:
+    """Şeritler için paylaşılan thread havuzu (OpenCV GIL'i bırakır)"""
+    global _tile_pool
+    with _tile_pool_lock:
+        if _tile_pool is None:
+            _tile_pool = ThreadPoolExecutor(max_workers=ART_TILE_WORKERS, thread_name_prefix="facefade-tile")
+        return _tile_pool
+
+def render_tiled(image: np.ndarray, filter_fn, halo: int, budget_mb: Optional[int] = None,
+                 workers: Optional[int] = None) -> np.ndarray:
+    """
+    filter_fn'i tam genişlikte, üst üste binen satır şeritlerinde uygular.
+    Her şerit iki yandan halo satır komşulukla işlenir; filtreler yalnızca
+    halo yarıçapında komşuya baktığı ve görsel kenarında aynı yansıtmalı
+    kenarlığı kullandığı için sonuç şeritsiz çalıştırmayla birebir aynıdır.
+    Şerit yüksekliği, eşzamanlı şeritlerin ara tamponları bütçeye sığacak
+    şekilde seçilir.
+    """
+    budget_mb = ART_TILE_BUDGET_MB if budget_mb is None else budget_mb
+    workers = max(1, ART_TILE_WORKERS if workers is None else workers)
+    height = image.shape[0]
+    row_bytes = image[0].nbytes
+    rows = budget_mb * 1024 * 1024 // (ART_TILE_BUFFERS * row_bytes * workers) - 2 * halo
+    if budget_mb <= 0 or rows >= height:
+        return filter_fn(image)
+    rows = max(rows, ART_TILE_MIN_ROWS)
+    
+    result = np.empty_like(image)
+    def render_strip(y0: int):
+        y1 = min(height, y0 + rows)
+        top, bottom = max(0, y0 - halo), min(height, y1 + halo)
+        result[y0:y1] = filter_fn(image[top:bottom])[y0 - top:y1 - top]
+    
+    starts = range(0, height, rows)
+    if workers > 1:
+        # Sıranın tamamı bitmeden dönme; hatalar burada yükselir
+        list(tile_pool().map(render_strip, starts))
+    else:
+        for y0 in starts:
+            render_strip(y0)
+    return result
+
+def apply_art_style(image: np.ndarray, style: str, tier: str = "final", scale: float = 1.0) -> np.ndarray:
+    """
+    Sanatsal stil filtrelerini uygular. tier="preview" ise küçültülmüş görselde,
+    çekirdekleri aynı oranda küçültülmüş filtrelerle çalışır ve küçük görsel döner.
+    scale: görselin orijinale göre zaten küçültülme oranı (küçük decode)
+    """
+    if tier == "preview":
+        image, reduced = preview_image(image)
+        scale *= reduced
+    
+    if style in TILED_ART_FILTERS:
+        # Van Gogh ve Monet: bilateral + blur, bellek bütçesiyle şeritler halinde
+        filter_fn, halo = TILED_ART_FILTERS[style]
+        result = render_tiled(image, filter_fn, halo) if scale == 1.0 else filter_fn(image, scale)
         
     elif style == "picasso":
         # Picasso tarzı (edge detection + color quantization)
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        edges = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, 7, 7)
+        edges = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, art_kernel(7, scale, 3), 7)
         edges = cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR)
         result = cv2.bitwise_and(image, edges)
         
-    elif style == "monet":
-        # Monet tarzı (soft, impressionist)
-        result = cv2.bilateralFilter(image, 20, 200, 200)
-        result = cv2.addWeighted(result, 0.7, cv2.GaussianBlur(result, (25, 25), 0), 0.3, 0)
-        
     elif style == "glitch":
         # Glitch effect
         result = image.copy()
         h, w = result.shape[:2]
+        band = max(1, round(10 * scale))
+        max_shift = max(1, round(20 * scale))
         for i in range(10):
-            y = np.random.randint(0, h-20)
-            shift = np.random.randint(-20, 20)
-            result[y:y+10, :] = np.roll(result[y:y+10, :], shift, axis=1)
+            y = np.random.randint(0, max(1, h - 2 * band))
+            shift = np.random.randint(-max_shift, max_shift)
+            result[y:y+band, :] = np.roll(result[y:y+band, :], shift, axis=1)
             
     elif style == "vaporwave":
         # Vaporwave effect (purple/pink tint)
-        result = image.copy()
-        result[:, :, 0] = np.clip(result[:, :, 0] * 1.2, 0, 255)  # Blue channel
-        result[:, :, 2] = np.clip(result[:, :, 2] * 1.5, 0, 255)  # Red channel
+        result = color_styles.apply(image, "vaporwave")
         
     elif style == "sketch":
         # Pencil sketch effect
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        gray_blur = cv2.medianBlur(gray, 5)
-        edges = cv2.adaptiveThreshold(gray_blur, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, 7, 7)
+        gray_blur = cv2.medianBlur(gray, art_kernel(5, scale, 3))
+        edges = cv2.adaptiveThreshold(gray_blur, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, art_kernel(7, scale, 3), 7)
         result = cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR)
         
     else:
@@ -332,27 +1844,46 @@ def apply_art_style(image: np.ndarray, style: str) -> np.ndarray:
         
     return result
 
+BATCH_OPERATIONS = ("detect", "artify")
+
+def validate_batch_operation(operation: str, params) -> dict:
+    """Operasyon ve parametreler işlem (ve akış) başlamadan önce 400 ile doğrulanır"""
+    if operation not in BATCH_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown operation: {operation}. Use one of {', '.join(BATCH_OPERATIONS)}")
+    if not isinstance(params, dict):
+        raise HTTPException(status_code=400, detail="parameters must be a JSON object")
+    if operation == "artify":
+        resolve_tier(params.get("tier", "final"))
+    return params
+
 @app.post("/batch-process")
 async def batch_process_images(
-    images: List[str] = Form(..., description="List of base64 encoded images"),
-    operation: str = Form(..., description="Operation: detect, blur, artify"),
-    parameters: str = Form(default="{}", description="JSON parameters for operation")
+    request: Request,
+    images: List[str] = Form(default=[], description="List of base64 encoded images"),
+    images_files: List[UploadFile] = File(default=[], description="Raw image files (binary upload)"),
+    operation: str = Form(..., description="Operation: detect, artify"),
+    parameters: str = Form(default="{}", description="JSON parameters for operation"),
+    response_format: Optional[str] = Query(default=None, description="json (default), or jpeg/webp/png for a multipart/mixed stream"),
+    quality: int = Query(default=DEFAULT_IMAGE_QUALITY, ge=1, le=100, description="Output image quality")
 ):
     """
     Birden fazla resmi toplu işleme tabi tutar
     """
+    sources = await read_image_sources(images, images_files)
+    response_format = resolve_response_format(request, response_format)
+    params = validate_batch_operation(operation, parse_json_param(parameters, "parameters"))
     try:
-        params = json.loads(parameters)
-        results = []
+        items = batch_process_items(sources, operation, params, response_format, quality)
         
-        for i, image_b64 in enumerate(images):
-            if operation == "detect":
-                result = await detect_faces(image_b64)
-            elif operation == "artify":
-                art_style = params.get("art_style", "van_gogh")
-                result = await artify_photo(image_b64, art_style)
-            # Diğer operasyonlar...
-            
+        if response_format != "json":
+            return multipart_response(
+                items,
+                lambda results: {"success": True, "processed_count": len(results)},
+                response_format
+            )
+        
+        results = []
+        async for i, result in items:
             results.append({
                 "image_index": i,
                 "result": result
@@ -367,6 +1898,22 @@ async def batch_process_images(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Batch processing error: {str(e)}")
 
+async def batch_process_items(sources: list, operation: str, params: dict, response_format: str, quality: int):
+    """Her görsel bittikçe (index, sonuç) üretir"""
+    for i, source in enumerate(sources):
+        yield i, await batch_process_item(source, operation, params, response_format, quality)
+
+async def batch_process_item(source: Union[str, bytes], operation: str, params: dict, response_format: str,
+                             quality: int, endpoint: str = "batch-process") -> dict:
+    if operation == "detect":
+        return await cached_run(endpoint, detect_faces_sync, source)
+    elif operation == "artify":
+        art_style = params.get("art_style", "van_gogh")
+        tier = resolve_tier(params.get("tier", "final"))
+        return await cached_run(endpoint, artify_photo_sync, source, art_style, response_format, quality, tier)
+    # Diğer operasyonlar...
+    raise ValueError(f"Unknown operation: {operation}")
+
 @app.get("/health")
 async def health_check():
     """Backend sağlık kontrolü"""
@@ -376,355 +1923,1459 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@app.get("/executor")
+async def executor_status():
+    """İşlem havuzu durumu ve endpoint bazlı kuyruk derinliği"""
+    return {
+        "success": True,
+        "executor": image_executor.describe(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/cache")
+async def cache_status():
+    """Sonuç önbelleği isabet/ıska istatistikleri"""
+    return {
+        "success": True,
+        "cache": result_cache.describe(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.delete("/cache")
+async def clear_cache():
+    result_cache.clear()
+    return {"success": True, "cache": result_cache.describe()}
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metin formatında gecikme histogramları ve dağılımlar"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (FACEFADE_METRICS=0)")
+    return Response(content=metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/detectors")
+async def list_detectors():
+    """Yüklü cascade modelleri ve yüklenme süreleri"""
+    return {
+        "success": True,
+        "detectors": detector_registry.describe(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+# Kayıtlı referans kişiler
+REFERENCES_DIR = os.path.join(TEMP_DIR, "references")
+
+class ReferenceStore:
+    """
+    /references ile kaydedilen referans yüzleri tutar.
+    Yüz kırpıntısı diskte PNG olarak saklanır, böylece diğer worker'lar ve
+    yeniden başlatmalar da aynı ID'yi kullanabilir; bellekte önbelleklenir.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+        self._faces = {}
+        self._lock = threading.Lock()
+
+    def _paths(self, reference_id: str):
+        base = os.path.join(self.directory, reference_id)
+        return base + ".png", base + ".json"
+
+    @staticmethod
+    def _valid_id(reference_id: str) -> bool:
+        return len(reference_id) == 32 and all(c in "0123456789abcdef" for c in reference_id)
+
+    def add(self, face: np.ndarray, info: dict) -> dict:
+        reference_id = uuid.uuid4().hex
+        image_path, info_path = self._paths(reference_id)
+        info = dict(
+            info,
+            reference_id=reference_id,
+            face_width=int(face.shape[1]),
+            face_height=int(face.shape[0]),
+            created_at=datetime.now().isoformat()
+        )
+        cv2.imwrite(image_path, face)
+        with open(info_path, "w", encoding="utf-8") as f:
+            json.dump(info, f, ensure_ascii=False)
+        with self._lock:
+            self._faces[reference_id] = (face, info)
+        return info
+
+    def get(self, reference_id: str) -> Optional[tuple]:
+        """(yüz kırpıntısı, bilgi) döndürür; bilinmeyen ID için None"""
+        if not self._valid_id(reference_id):
+            return None
+        with self._lock:
+            cached = self._faces.get(reference_id)
+        if cached is not None:
+            return cached
+
+        image_path, info_path = self._paths(reference_id)
+        if not os.path.exists(image_path) or not os.path.exists(info_path):
+            return None
+        face = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+        with open(info_path, "r", encoding="utf-8") as f:
+            info = json.load(f)
+        with self._lock:
+            self._faces[reference_id] = (face, info)
+        return face, info
+
+    def delete(self, reference_id: str) -> bool:
+        if not self._valid_id(reference_id):
+            return False
+        with self._lock:
+            self._faces.pop(reference_id, None)
+        removed = False
+        for path in self._paths(reference_id):
+            if os.path.exists(path):
+                os.remove(path)
+                removed = True
+        return removed
+
+    def list(self) -> List[dict]:
+        references = []
+        for filename in sorted(os.listdir(self.directory)):
+            if filename.endswith(".json"):
+                stored = self.get(filename[:-5])
+                if stored is not None:
+                    references.append(stored[1])
+        return references
+
+reference_store = ReferenceStore(REFERENCES_DIR)
+
+def get_stored_reference_face(reference_id: str) -> np.ndarray:
+    stored = reference_store.get(reference_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail=f"Unknown reference_id: {reference_id}")
+    return stored[0]
+
+@app.post("/references")
+async def register_reference(
+    image: Optional[str] = Form(default=None, description="Base64 encoded reference image of the person"),
+    image_file: Optional[UploadFile] = File(default=None, description="Raw reference image file (binary upload)"),
+    person_name: str = Form(default="Unknown", description="Name of the person"),
+    detection_max_side: Optional[int] = Form(default=None, description="Run detection with the longest side capped at this many pixels (0 = full resolution)")
+):
+    """
+    Referans kişiyi kaydeder; dönen ID /compare-faces ve /scan-gallery'de
+    reference_image yerine kullanılabilir
+    """
+    source = await read_image_source(image, image_file)
+    try:
+        reference = await image_executor.run("references", extract_reference_face, source, detection_max_side)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Reference registration error: {str(e)}")
+    if reference is None:
+        # Kaydedilecek bir şey yok; eşleştirme yanıtlarının matches alanı burada anlamsız
+        raise HTTPException(status_code=422, detail="No face found in reference image")
+    
+    try:
+        info = reference_store.add(reference["face"], {
+            "person_name": person_name,
+            "coordinates": reference["coordinates"],
+            "faces_in_image": reference["faces_in_image"]
+        })
+        return {"success": True, **info}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Reference registration error: {str(e)}")
+
+@app.get("/references")
+async def list_references():
+    """Kayıtlı referans kişiler"""
+    references = reference_store.list()
+    return {"success": True, "count": len(references), "references": references}
+
+@app.get("/references/{reference_id}")
+async def get_reference(reference_id: str):
+    stored = reference_store.get(reference_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail=f"Unknown reference_id: {reference_id}")
+    return {"success": True, **stored[1]}
+
+@app.delete("/references/{reference_id}")
+async def delete_reference(reference_id: str):
+    if not reference_store.delete(reference_id):
+        raise HTTPException(status_code=404, detail=f"Unknown reference_id: {reference_id}")
+    return {"success": True, "reference_id": reference_id, "deleted": True}
+
+# Yüz eşleştirme descriptor'ları: her yüz kanonik bir kareye getirilir ve
+# birim uzunlukta bir vektöre çevrilir; benzerlik tek bir matris çarpımıdır.
+# ncc descriptor'ları galeri indeksinde kullanılır; /compare-faces ve
+# /scan-gallery ncc skorlarını face_similarities'teki eski yoldan hesaplar
+FACE_DESCRIPTOR_SIDE = 32
+FACE_DESCRIPTOR_SIZE = FACE_DESCRIPTOR_SIDE * FACE_DESCRIPTOR_SIDE
+FACE_TEXTURE_SIDE = 64
+LBP_GRID = 4
+# LBP bitleri piksel gürültüsüyle kolayca döner; kodlamadan önce hafif yumuşatılır
+LBP_SMOOTHING_SIGMA = 1.0
+
+def canonical_faces(gray_image: np.ndarray, face_rects, side: int) -> np.ndarray:
+    """Yüz kırpıntılarını (n, side, side) boyutunda tek bir diziye toplar"""
+    faces = np.empty((len(face_rects), side, side), dtype=np.uint8)
+    for i, (x, y, w, h) in enumerate(face_rects):
+        cv2.resize(gray_image[y:y+h, x:x+w], (side, side), dst=faces[i], interpolation=cv2.INTER_AREA)
+    return faces
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 1e-6)
+
+def ncc_descriptors(faces: np.ndarray) -> np.ndarray:
+    """
+    Ortalaması çıkarılmış, birim uzunlukta pikseller. İki descriptor'ın iç
+    çarpımı aynı boyuttaki görüntülerde TM_CCOEFF_NORMED skoruna eşittir.
+    """
+    # Boyutlar açık verilir: yüzsüz görselde (n=0) -1 çözülemez
+    vectors = faces.reshape(len(faces), faces.shape[1] * faces.shape[2]).astype(np.float32)
+    vectors -= vectors.mean(axis=1, keepdims=True)
+    return normalize_rows(vectors)
+
+def _uniform_lbp_table() -> np.ndarray:
+    """8 komşulu LBP kodlarını 58 uniform desen + 1 'diğer' kutusuna eşler"""
+    table = np.full(256, 58, dtype=np.uint8)
+    uniform = [code for code in range(256) if bin(code ^ ((code >> 1) | ((code & 1) << 7))).count("1") <= 2]
+    table[uniform] = np.arange(len(uniform))
+    return table
+
+LBP_UNIFORM = _uniform_lbp_table()
+LBP_BINS = 59
+
+def lbp_descriptors(faces: np.ndarray) -> np.ndarray:
+    """
+    LBP_GRID x LBP_GRID hücrede, yumuşatılmış yüzün uniform LBP histogramları.
+    Histogramların karekökü alındığı için iç çarpım hücre başına Bhattacharyya
+    katsayısıdır; parlaklık ve kontrast değişimlerinden etkilenmez.
+    """
+    n, side = len(faces), faces.shape[1]
+    faces = faces.copy()
+    for face in faces:
+        cv2.GaussianBlur(face, (0, 0), LBP_SMOOTHING_SIGMA, dst=face)
+    center = faces[:, 1:-1, 1:-1]
+    codes = np.zeros(center.shape, dtype=np.uint8)
+    offsets = [(0, 0), (0, 1), (0, 2), (1, 2), (2, 2), (2, 1), (2, 0), (1, 0)]
+    for bit, (dy, dx) in enumerate(offsets):
+        codes |= (faces[:, dy:dy + side - 2, dx:dx + side - 2] >= center).astype(np.uint8) << bit
+    
+    cell = (side - 2) // LBP_GRID
+    codes = LBP_UNIFORM[codes[:, :cell * LBP_GRID, :cell * LBP_GRID]]
+    cells = codes.reshape(n, LBP_GRID, cell, LBP_GRID, cell).transpose(0, 1, 3, 2, 4).reshape(n, LBP_GRID * LBP_GRID, cell * cell)
+    # Her yüz/hücre çiftine ayrı bir kutu aralığı verip tek bincount ile say
+    bins = cells.astype(np.int64) + (np.arange(n * LBP_GRID * LBP_GRID) * LBP_BINS).reshape(n, LBP_GRID * LBP_GRID, 1)
+    histograms = np.bincount(bins.ravel(), minlength=n * LBP_GRID * LBP_GRID * LBP_BINS)
+    return normalize_rows(np.sqrt(histograms.reshape(n, LBP_GRID * LBP_GRID * LBP_BINS).astype(np.float32)))
+
+HOG = cv2.HOGDescriptor((FACE_TEXTURE_SIDE, FACE_TEXTURE_SIDE), (16, 16), (8, 8), (8, 8), 9)
+
+def hog_descriptors(faces: np.ndarray) -> np.ndarray:
+    """Gradyan yönü histogramları (HOG); kosinüs benzerliği için birim uzunlukta"""
+    vectors = np.empty((len(faces), HOG.getDescriptorSize()), dtype=np.float32)
+    for i, face in enumerate(faces):
+        vectors[i] = HOG.compute(face).ravel()
+    return normalize_rows(vectors)
+
+# method: (kanonik boyut, descriptor fonksiyonu, varsayılan eşik)
+# lbp ve hog deneyseldir: gerçek yüzlerde kalibre edilmiş bir eşikleri yok,
+# istemci eşiği açıkça göndermelidir
+FACE_MATCH_METHODS = {
+    "ncc": (FACE_DESCRIPTOR_SIDE, ncc_descriptors, 0.6),
+    "lbp": (FACE_DESCRIPTOR_SIDE, lbp_descriptors, None),
+    "hog": (FACE_TEXTURE_SIDE, hog_descriptors, None),
+}
+DEFAULT_MATCH_METHOD = "ncc"
+
+def face_descriptors(gray_image: np.ndarray, face_rects, method: str = DEFAULT_MATCH_METHOD) -> np.ndarray:
+    """Görseldeki yüzlerin (n, D) descriptor matrisi"""
+    side, descriptors, _ = FACE_MATCH_METHODS[method]
+    return descriptors(canonical_faces(gray_image, face_rects, side))
+
+def face_descriptor(gray_face: np.ndarray, method: str = DEFAULT_MATCH_METHOD) -> np.ndarray:
+    """Tek bir yüz kırpıntısının descriptor'ı"""
+    return face_descriptors(gray_face, [(0, 0, gray_face.shape[1], gray_face.shape[0])], method)[0]
+
+def face_similarities(gray_image: np.ndarray, face_rects, ref_face_region: np.ndarray,
+                      method: str = DEFAULT_MATCH_METHOD) -> np.ndarray:
+    """Görseldeki her yüzün referansa benzerliği"""
+    if method != "ncc":
+        # Tüm yüzler kanonik boyuta getirilip referansla tek çarpımda skorlanır
+        return face_descriptors(gray_image, face_rects, method) @ face_descriptor(ref_face_region, method)
+    # ncc skorları mevcut istemcilerin 0.6 eşiğiyle uyumlu kalsın diye eski
+    # yoldan hesaplanır: referans her yüzün kendi boyutuna getirilip
+    # TM_CCOEFF_NORMED alınır (32x32 kanonik descriptor biraz farklı skor verir)
+    similarities = np.empty(len(face_rects), dtype=np.float32)
+    for i, (x, y, w, h) in enumerate(face_rects):
+        ref_resized = cv2.resize(ref_face_region, (int(w), int(h)))
+        result = cv2.matchTemplate(gray_image[y:y+h, x:x+w], ref_resized, cv2.TM_CCOEFF_NORMED)
+        similarities[i] = cv2.minMaxLoc(result)[1]
+    return similarities
+
+def resolve_match_method(match_method: str, threshold: Optional[float]) -> float:
+    """Bilinmeyen yöntemde 400 verir; eşik verilmediyse yöntemin varsayılanını döndürür"""
+    if match_method not in FACE_MATCH_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown match_method: {match_method}. Use one of {', '.join(FACE_MATCH_METHODS)}")
+    if threshold is not None:
+        return threshold
+    default = FACE_MATCH_METHODS[match_method][2]
+    if default is None:
+        raise HTTPException(status_code=400, detail=f"match_method {match_method} is experimental and requires an explicit threshold")
+    return default
+
 @app.post("/compare-faces")
 async def compare_faces(
-    reference_image: str = Form(..., description="Base64 encoded reference image of the person"),
-    target_image: str = Form(..., description="Base64 encoded target image to search in"),
-    threshold: float = Form(default=0.6, description="Similarity threshold (0.1-1.0)")
+    reference_image: Optional[str] = Form(default=None, description="Base64 encoded reference image of the person"),
+    reference_image_file: Optional[UploadFile] = File(default=None, description="Raw reference image file (binary upload)"),
+    target_image: Optional[str] = Form(default=None, description="Base64 encoded target image to search in"),
+    target_image_file: Optional[UploadFile] = File(default=None, description="Raw target image file (binary upload)"),
+    threshold: Optional[float] = Form(default=None, description="Similarity threshold (default 0.6 for ncc; required for lbp and hog)"),
+    reference_id: Optional[str] = Form(default=None, description="ID from /references, instead of re-uploading the reference image"),
+    detection_max_side: Optional[int] = Form(default=None, description="Run detection with the longest side capped at this many pixels (0 = full resolution)"),
+    match_method: str = Form(default=DEFAULT_MATCH_METHOD, description="Face descriptor: ncc (pixel correlation); lbp or hog (experimental texture histograms, need an explicit threshold)")
 ):
     """
     İki görsel arasında yüz karşılaştırması yapar
     Reference image'deki kişinin target image'de olup olmadığını kontrol eder
     """
+    threshold = resolve_match_method(match_method, threshold)
+    target_source = await read_image_source(target_image, target_image_file, "target_image")
+    if reference_id:
+        ref_face_region = get_stored_reference_face(reference_id)
+    else:
+        reference_source = await read_image_source(reference_image, reference_image_file, "reference_image")
     try:
-        # Base64'ten image'e dönüştür
-        ref_image = decode_base64_image(reference_image)
-        target_img = decode_base64_image(target_image)
-        
-        # Reference image'den yüz çıkar
-        gray_ref = cv2.cvtColor(ref_image, cv2.COLOR_BGR2GRAY)
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        
-        ref_faces = face_cascade.detectMultiScale(gray_ref, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
-        
-        if len(ref_faces) == 0:
-            return {
-                "success": False,
-                "error": "No face found in reference image",
-                "matches": []
-            }
-        
-        # En büyük yüzü referans olarak al
-        ref_face = max(ref_faces, key=lambda face: face[2] * face[3])
-        ref_x, ref_y, ref_w, ref_h = ref_face
-        ref_face_region = gray_ref[ref_y:ref_y+ref_h, ref_x:ref_x+ref_w]
-        
-        # Target image'de yüzleri bul
-        gray_target = cv2.cvtColor(target_img, cv2.COLOR_BGR2GRAY)
-        target_faces = face_cascade.detectMultiScale(gray_target, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
-        
-        matches = []
-        
-        for i, (x, y, w, h) in enumerate(target_faces):
-            target_face_region = gray_target[y:y+h, x:x+w]
-            
-            # Template matching ile basit benzerlik hesapla
-            # Önce boyutları eşitle
-            ref_resized = cv2.resize(ref_face_region, (w, h))
-            
-            # Normalized correlation coefficient
-            result = cv2.matchTemplate(target_face_region, ref_resized, cv2.TM_CCOEFF_NORMED)
-            _, max_val, _, _ = cv2.minMaxLoc(result)
-            
-            similarity = float(max_val)
-            
-            if similarity >= threshold:
-                matches.append({
-                    "face_id": i,
-                    "coordinates": {
-                        "top": int(y),
-                        "right": int(x + w),
-                        "bottom": int(y + h),
-                        "left": int(x)
-                    },
-                    "width": int(w),
-                    "height": int(h),
-                    "similarity": similarity,
-                    "confidence": min(similarity * 1.2, 1.0)  # Confidence ayarlaması
-                })
-        
-        return {
-            "success": True,
-            "reference_face_found": True,
-            "target_faces_count": len(target_faces),
-            "matches_count": len(matches),
-            "matches": matches,
-            "threshold_used": threshold
-        }
-        
+        if not reference_id:
+            reference = await image_executor.run("compare-faces", extract_reference_face, reference_source, detection_max_side)
+            if reference is None:
+                return dict(NO_REFERENCE_FACE_RESULT, matches=[])
+            ref_face_region = reference["face"]
+        return await match_reference_face("compare-faces", ref_face_region, target_source, threshold, detection_max_side, match_method)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Face comparison error: {str(e)}")
 
+NO_REFERENCE_FACE_RESULT = {
+    "success": False,
+    "error": "No face found in reference image",
+    "matches": []
+}
+
+def extract_reference_face(reference_image: Union[str, bytes], max_side: Optional[int] = None) -> Optional[dict]:
+    """Referans görseldeki en büyük yüzü gri tonlu kırpıntı olarak döndürür (yüz yoksa None)"""
+    # Base64 veya binary upload'dan gri kareye dönüştür
+    ref_frame = load_gray(reference_image, max_side)
+
+    # Reference image'den yüz çıkar
+    gray_ref = ref_frame.gray
+    ref_faces = ref_frame.detect("face", max_side=max_side, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
+
+    if len(ref_faces) == 0:
+        return None
+
+    # En büyük yüzü referans olarak al; kırpıntı dik karede, koordinatlar orijinalde
+    ref_face = max(ref_faces, key=lambda face: face[2] * face[3])
+    ref_x, ref_y, ref_w, ref_h = ref_face
+    face = gray_ref[ref_y:ref_y+ref_h, ref_x:ref_x+ref_w].copy()
+    ref_x, ref_y, ref_w, ref_h = ref_frame.to_original(ref_face)[0]
+    return {
+        "face": face,
+        "coordinates": {
+            "top": int(ref_y),
+            "right": int(ref_x + ref_w),
+            "bottom": int(ref_y + ref_h),
+            "left": int(ref_x)
+        },
+        "faces_in_image": len(ref_faces)
+    }
+
+async def match_reference_face(endpoint: str, ref_face_region: np.ndarray, target_image: Union[str, bytes],
+                               threshold: float, max_side: Optional[int] = None,
+                               method: str = DEFAULT_MATCH_METHOD) -> dict:
+    """
+    Hazır referans yüz kırpıntısını hedef görseldeki yüzlerle karşılaştırır.
+    Skorlar eşikten bağımsız önbelleklenir (cached_run); eşik değişince tekrar hesaplanmaz
+    """
+    scored = await cached_run(endpoint, score_target_faces, target_image, ref_face_region, max_side, method)
+    return filter_matches(scored, threshold, method)
+
+def filter_matches(scored: dict, threshold: float, method: str) -> dict:
+    """score_target_faces sonucundan eşiği geçen yüzler"""
+    matches = []
+    for face in scored["faces"]:
+        similarity = face["similarity"]
+        if similarity >= threshold:
+            matches.append({
+                **face,
+                "confidence": min(similarity * 1.2, 1.0)  # Confidence ayarlaması
+            })
+
+    return {
+        "success": True,
+        "reference_face_found": True,
+        "target_faces_count": scored["target_faces_count"],
+        "matches_count": len(matches),
+        "matches": matches,
+        "threshold_used": threshold,
+        "match_method": method
+    }
+
+def score_target_faces(target_image: Union[str, bytes], ref_face_region: np.ndarray, max_side: Optional[int] = None,
+                       method: str = DEFAULT_MATCH_METHOD) -> dict:
+    """Hedef görseldeki her yüzün referansa benzerliğini hesaplar"""
+    target_frame = load_gray(target_image, max_side)
+
+    # Target image'de yüzleri bul
+    target_faces = target_frame.detect("face", max_side=max_side, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
+
+    with timed_stage("match"):
+        similarities = face_similarities(target_frame.gray, target_faces, ref_face_region, method)
+
+    faces = []
+    for i, (x, y, w, h) in enumerate(target_frame.to_original(target_faces)):
+        faces.append({
+            "face_id": i,
+            "coordinates": {
+                "top": int(y),
+                "right": int(x + w),
+                "bottom": int(y + h),
+                "left": int(x)
+            },
+            "width": int(w),
+            "height": int(h),
+            "similarity": float(similarities[i])
+        })
+
+    return {
+        "target_faces_count": len(target_faces),
+        "faces": faces
+    }
+
 @app.post("/scan-gallery")
 async def scan_gallery_for_person(
-    reference_image: str = Form(..., description="Base64 encoded reference image of the person"),
-    gallery_images: List[str] = Form(..., description="List of base64 encoded gallery images"),
-    threshold: float = Form(default=0.6, description="Similarity threshold"),
-    person_name: str = Form(default="Unknown", description="Name of the person being searched")
+    reference_image: Optional[str] = Form(default=None, description="Base64 encoded reference image of the person"),
+    reference_image_file: Optional[UploadFile] = File(default=None, description="Raw reference image file (binary upload)"),
+    gallery_images: List[str] = Form(default=[], description="List of base64 encoded gallery images"),
+    gallery_images_files: List[UploadFile] = File(default=[], description="Raw gallery image files (binary upload)"),
+    threshold: Optional[float] = Form(default=None, description="Similarity threshold (default 0.6 for ncc; required for lbp and hog)"),
+    person_name: str = Form(default="Unknown", description="Name of the person being searched"),
+    reference_id: Optional[str] = Form(default=None, description="ID from /references, instead of re-uploading the reference image"),
+    detection_max_side: Optional[int] = Form(default=None, description="Run detection with the longest side capped at this many pixels (0 = full resolution)"),
+    match_method: str = Form(default=DEFAULT_MATCH_METHOD, description="Face descriptor: ncc (pixel correlation); lbp or hog (experimental texture histograms, need an explicit threshold)")
 ):
     """
     Galeriden gelen tüm fotoğraflarda belirli bir kişiyi arar
     """
+    threshold = resolve_match_method(match_method, threshold)
+    gallery_sources = await read_image_sources(gallery_images, gallery_images_files, "gallery_images")
+    ref_face_region = await load_scan_reference(reference_id, reference_image, reference_image_file, detection_max_side)
     try:
         results = []
         total_matches = 0
         
-        for idx, gallery_image in enumerate(gallery_images):
-            try:
-                # Her galeri fotoğrafı için yüz karşılaştırması yap
-                comparison_result = await compare_faces(
-                    reference_image=reference_image,
-                    target_image=gallery_image,
-                    threshold=threshold
+        async for record in scan_gallery_items(ref_face_region, gallery_sources, threshold, detection_max_side, match_method):
+            total_matches += record["matches_count"]
+            results.append(record)
+        
+        return {
+            **scan_summary(person_name, ref_face_region, len(results), total_matches,
+                           len([r for r in results if r["found"]]), threshold, match_method),
+            "scan_results": results,
+            "scan_completed_at": datetime.now().isoformat()
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Gallery scan error: {str(e)}")
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+@app.post("/scan-gallery/stream")
+async def scan_gallery_stream(
+    request: Request,
+    reference_image: Optional[str] = Form(default=None, description="Base64 encoded reference image of the person"),
+    reference_image_file: Optional[UploadFile] = File(default=None, description="Raw reference image file (binary upload)"),
+    gallery_images: List[str] = Form(default=[], description="List of base64 encoded gallery images"),
+    gallery_images_files: List[UploadFile] = File(default=[], description="Raw gallery image files (binary upload)"),
+    threshold: Optional[float] = Form(default=None, description="Similarity threshold (default 0.6 for ncc; required for lbp and hog)"),
+    person_name: str = Form(default="Unknown", description="Name of the person being searched"),
+    reference_id: Optional[str] = Form(default=None, description="ID from /references, instead of re-uploading the reference image"),
+    detection_max_side: Optional[int] = Form(default=None, description="Run detection with the longest side capped at this many pixels (0 = full resolution)"),
+    match_method: str = Form(default=DEFAULT_MATCH_METHOD, description="Face descriptor: ncc (pixel correlation); lbp or hog (experimental texture histograms, need an explicit threshold)"),
+    stream_format: Optional[str] = Query(default=None, description="ndjson (default) or sse")
+):
+    """
+    /scan-gallery'nin akış versiyonu: her galeri fotoğrafı skorlandığı anda bir
+    kayıt gönderilir, özet sayılar son kayıtta gelir
+    """
+    if stream_format is None:
+        stream_format = "sse" if "text/event-stream" in request.headers.get("accept", "") else "ndjson"
+    if stream_format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown stream_format: {stream_format}. Use ndjson or sse")
+    
+    threshold = resolve_match_method(match_method, threshold)
+    gallery_sources = await read_image_sources(gallery_images, gallery_images_files, "gallery_images")
+    ref_face_region = await load_scan_reference(reference_id, reference_image, reference_image_file, detection_max_side)
+    
+    async def body():
+        scanned = 0
+        total_matches = 0
+        images_with_matches = 0
+        
+        async for record in scan_gallery_items(ref_face_region, gallery_sources, threshold, detection_max_side, match_method):
+            scanned += 1
+            total_matches += record["matches_count"]
+            images_with_matches += 1 if record["found"] else 0
+            yield stream_record("result", record, stream_format)
+        
+        summary = scan_summary(person_name, ref_face_region, scanned, total_matches, images_with_matches, threshold, match_method)
+        summary["scan_completed_at"] = datetime.now().isoformat()
+        yield stream_record("summary", summary, stream_format)
+    
+    return StreamingResponse(
+        body(),
+        media_type=STREAM_MEDIA_TYPES[stream_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def stream_record(record_type: str, record: dict, stream_format: str) -> bytes:
+    """Tek bir kaydı NDJSON satırı veya SSE olayı olarak kodlar"""
+    if stream_format == "sse":
+        return f"event: {record_type}\ndata: {json.dumps(record, default=str)}\n\n".encode()
+    return (json.dumps({"type": record_type, **record}, default=str) + "\n").encode()
+
+async def load_scan_reference(reference_id: Optional[str], reference_image: Optional[str],
+                              reference_image_file: Optional[UploadFile], max_side: Optional[int]) -> Optional[np.ndarray]:
+    """Kayıtlı referans yüzü ya da yüklenen referanstan bir kez çıkarılan yüzü döndürür (yüz yoksa None)"""
+    if reference_id:
+        return get_stored_reference_face(reference_id)
+    reference_source = await read_image_source(reference_image, reference_image_file, "reference_image")
+    # Referans yüz tarama başına bir kez çıkarılır
+    reference = await image_executor.run("scan-gallery", extract_reference_face, reference_source, max_side)
+    return reference["face"] if reference is not None else None
+
+async def scan_gallery_items(ref_face_region: Optional[np.ndarray], gallery_sources: list, threshold: float,
+                             max_side: Optional[int], method: str = DEFAULT_MATCH_METHOD):
+    """Her galeri fotoğrafı skorlandıkça bir sonuç kaydı üretir"""
+    for idx in range(len(gallery_sources)):
+        gallery_image = gallery_sources[idx]
+        # İşlenen fotoğrafı hemen bırak, bellek galeri boyunca büyümesin
+        gallery_sources[idx] = None
+        try:
+            # Her galeri fotoğrafı için yüz karşılaştırması yap
+            if ref_face_region is None:
+                comparison_result = NO_REFERENCE_FACE_RESULT
+            else:
+                comparison_result = await match_reference_face(
+                    "scan-gallery", ref_face_region, gallery_image, threshold, max_side, method
                 )
-                
-                if comparison_result["success"] and comparison_result["matches_count"] > 0:
-                    total_matches += comparison_result["matches_count"]
-                    results.append({
-                        "image_index": idx,
-                        "found": True,
-                        "matches": comparison_result["matches"],
-                        "matches_count": comparison_result["matches_count"]
-                    })
-                else:
-                    results.append({
-                        "image_index": idx,
-                        "found": False,
-                        "matches": [],
-                        "matches_count": 0
-                    })
-                    
-            except Exception as e:
-                # Tek fotoğraf hata verirse diğerlerini etkilemesin
-                results.append({
+            
+            if comparison_result["success"] and comparison_result["matches_count"] > 0:
+                yield {
+                    "image_index": idx,
+                    "found": True,
+                    "matches": comparison_result["matches"],
+                    "matches_count": comparison_result["matches_count"]
+                }
+            else:
+                yield {
                     "image_index": idx,
                     "found": False,
-                    "error": str(e),
                     "matches": [],
                     "matches_count": 0
-                })
+                }
+                
+        except Exception as e:
+            # Tek fotoğraf hata verirse diğerlerini etkilemesin
+            yield {
+                "image_index": idx,
+                "found": False,
+                "error": str(e),
+                "matches": [],
+                "matches_count": 0
+            }
+
+def scan_summary(person_name: str, ref_face_region: Optional[np.ndarray], scanned: int, total_matches: int,
+                 images_with_matches: int, threshold: float, method: str = DEFAULT_MATCH_METHOD) -> dict:
+    return {
+        "success": True,
+        "person_name": person_name,
+        "reference_face_found": ref_face_region is not None,
+        "total_images_scanned": scanned,
+        "total_matches_found": total_matches,
+        "images_with_matches": images_with_matches,
+        "threshold_used": threshold,
+        "match_method": method
+    }
+
+# Kalıcı galeri yüz indeksi: tekrar eden kişi aramaları için
+GALLERIES_DIR = os.path.join(TEMP_DIR, "galleries")
+
+def index_photo_sync(image: Union[str, bytes], max_side: Optional[int] = None) -> dict:
+    """Galeri fotoğrafındaki yüz kutuları ve descriptor'ları (havuzda çalışır)"""
+    frame = load_gray(image, max_side)
+    face_rects = frame.detect("face", max_side=max_side, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
+    
+    boxes = np.empty((len(face_rects), 4), dtype=np.int32)
+    with timed_stage("process"):
+        descriptors = face_descriptors(frame.gray, face_rects)
+        for i, (x, y, w, h) in enumerate(frame.to_original(face_rects)):
+            boxes[i] = (y, x + w, y + h, x)
+    return {
+        "boxes": boxes,
+        "descriptors": descriptors,
+        "width": frame.width,
+        "height": frame.height
+    }
+
+class GalleryIndex:
+    """
+    Tek bir galerinin yüz indeksi. Descriptor'lar, yüz kutuları (top, right,
+    bottom, left) ve her satırın ait olduğu fotoğraf slotu ayrı np.memmap
+    dosyalarındadır; fotoğraf listesi index.json'da tutulur.
+    Satırlar önce yazılıp sonra index.json atomik güncellendiği için yarıda
+    kalan bir ekleme sadece yok sayılan satırlar bırakır. Silinen fotoğrafların
+    satırları -1 ile işaretlenir, yarıdan fazlası boşalınca indeks sıkıştırılır.
+    """
+
+    ARRAYS = {
+        "descriptors": (np.float32, FACE_DESCRIPTOR_SIZE),
+        "boxes": (np.int32, 4),
+        "owners": (np.int32, None),
+    }
+
+    def __init__(self, directory: str, meta: dict):
+        self.directory = directory
+        self.meta = meta
+        self._arrays = {}
+        self._lock = threading.Lock()
+        self._slots = {photo["slot"]: photo_id for photo_id, photo in meta["photos"].items()}
+
+    @classmethod
+    def create(cls, directory: str, gallery_id: str, name: str) -> "GalleryIndex":
+        os.makedirs(directory, exist_ok=True)
+        now = datetime.now().isoformat()
+        meta = {
+            "gallery_id": gallery_id,
+            "name": name,
+            "descriptor_side": FACE_DESCRIPTOR_SIDE,
+            "rows": 0,
+            "removed_rows": 0,
+            "capacity": 0,
+            "next_slot": 0,
+            "photos": {},
+            "created_at": now,
+            "updated_at": now
+        }
+        index = cls(directory, meta)
+        for name_ in cls.ARRAYS:
+            open(index._array_path(name_), "wb").close()
+        index._save_meta()
+        return index
+
+    @classmethod
+    def open(cls, directory: str) -> "GalleryIndex":
+        with open(os.path.join(directory, "index.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        # Farklı boyutta descriptor'larla kurulmuş indeks yanlış satır genişliğiyle okunurdu
+        if meta.get("descriptor_side") != FACE_DESCRIPTOR_SIDE:
+            raise ValueError(
+                f"Gallery index was built with descriptor side {meta.get('descriptor_side')}, "
+                f"current side is {FACE_DESCRIPTOR_SIDE}; delete and re-index the gallery"
+            )
+        return cls(directory, meta)
+
+    def _array_path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.bin")
+
+    def _array(self, name: str) -> np.ndarray:
+        array = self._arrays.get(name)
+        if array is None:
+            dtype, width = self.ARRAYS[name]
+            shape = (self.meta["capacity"], width) if width else (self.meta["capacity"],)
+            array = np.memmap(self._array_path(name), dtype=dtype, mode="r+", shape=shape) if self.meta["capacity"] else np.empty(shape, dtype=dtype)
+            self._arrays[name] = array
+        return array
+
+    def _close_arrays(self):
+        for array in self._arrays.values():
+            if isinstance(array, np.memmap):
+                array.flush()
+        self._arrays.clear()
+
+    def _ensure_capacity(self, rows: int):
+        if rows <= self.meta["capacity"]:
+            return
+        capacity = max(64, self.meta["capacity"] * 2, rows)
+        self._close_arrays()
+        # Dosyayı uzatmak yeterli; mevcut satırlar kopyalanmaz
+        for name, (dtype, width) in self.ARRAYS.items():
+            with open(self._array_path(name), "r+b") as f:
+                f.truncate(capacity * (width or 1) * np.dtype(dtype).itemsize)
+        self.meta["capacity"] = capacity
+
+    def _save_meta(self):
+        self.meta["updated_at"] = datetime.now().isoformat()
+        path = os.path.join(self.directory, "index.json")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def photo(self, photo_id: str) -> Optional[dict]:
+        with self._lock:
+            photo = self.meta["photos"].get(photo_id)
+            return dict(photo, photo_id=photo_id) if photo else None
+
+    def add(self, photo_id: str, content_hash: str, indexed: dict) -> dict:
+        """Fotoğrafı ekler; aynı ID farklı içerikle gelirse eski satırları değiştirir"""
+        with self._lock:
+            if photo_id in self.meta["photos"]:
+                self._remove_rows(photo_id)
+            
+            count = len(indexed["boxes"])
+            start = self.meta["rows"]
+            self._ensure_capacity(start + count)
+            slot = self.meta["next_slot"]
+            if count:
+                self._array("descriptors")[start:start + count] = indexed["descriptors"]
+                self._array("boxes")[start:start + count] = indexed["boxes"]
+                self._array("owners")[start:start + count] = slot
+                for name in self.ARRAYS:
+                    self._array(name).flush()
+            
+            photo = {
+                "slot": slot,
+                "sha256": content_hash,
+                "rows": list(range(start, start + count)),
+                "face_count": count,
+                "width": indexed["width"],
+                "height": indexed["height"],
+                "added_at": datetime.now().isoformat()
+            }
+            self.meta["photos"][photo_id] = photo
+            self.meta["rows"] = start + count
+            self.meta["next_slot"] = slot + 1
+            self._slots[slot] = photo_id
+            self._save_meta()
+            return dict(photo, photo_id=photo_id)
+
+    def remove(self, photo_id: str) -> bool:
+        with self._lock:
+            if photo_id not in self.meta["photos"]:
+                return False
+            self._remove_rows(photo_id)
+            if self.meta["removed_rows"] * 2 > self.meta["rows"]:
+                self._compact()
+            self._save_meta()
+            return True
+
+    def _remove_rows(self, photo_id: str):
+        """Kilit altında çağrılır"""
+        photo = self.meta["photos"].pop(photo_id)
+        self._slots.pop(photo["slot"], None)
+        if photo["rows"]:
+            owners = self._array("owners")
+            owners[photo["rows"]] = -1
+            owners.flush()
+            self.meta["removed_rows"] += len(photo["rows"])
+
+    def _compact(self):
+        """Silinmiş satırları atarak canlı satırları başa taşır (kilit altında)"""
+        rows = self.meta["rows"]
+        live = np.flatnonzero(self._array("owners")[:rows] >= 0)
+        for name in self.ARRAYS:
+            array = self._array(name)
+            array[:len(live)] = array[live]
+            array.flush()
+        new_row = {int(old): new for new, old in enumerate(live)}
+        for photo in self.meta["photos"].values():
+            photo["rows"] = [new_row[row] for row in photo["rows"]]
+        self.meta["rows"] = len(live)
+        self.meta["removed_rows"] = 0
+
+    def search(self, reference: np.ndarray, threshold: float) -> List[dict]:
+        """Referans descriptor'ını tüm yüzlerle tek matris-vektör çarpımında karşılaştırır"""
+        with self._lock:
+            rows = self.meta["rows"]
+            if rows == 0:
+                return []
+            owners = self._array("owners")[:rows]
+            similarities = np.asarray(self._array("descriptors")[:rows]) @ reference
+            hits = np.flatnonzero((owners >= 0) & (similarities >= threshold))
+            # Kilit bırakılınca _compact memmap'i yeniden yazabilir; kullanılan satırlar kopyalanır
+            hit_owners = np.array(owners[hits])
+            hit_similarities = np.array(similarities[hits])
+            boxes = np.array(self._array("boxes")[hits])
+            slots = dict(self._slots)
+        
+        results = {}
+        for owner, similarity, (top, right, bottom, left) in zip(hit_owners, hit_similarities, boxes):
+            photo_id = slots[int(owner)]
+            similarity = float(similarity)
+            entry = results.setdefault(photo_id, {"photo_id": photo_id, "found": True, "matches": []})
+            entry["matches"].append({
+                "coordinates": {"top": int(top), "right": int(right), "bottom": int(bottom), "left": int(left)},
+                "width": int(right - left),
+                "height": int(bottom - top),
+                "similarity": similarity,
+                "confidence": min(similarity * 1.2, 1.0)
+            })
+        for entry in results.values():
+            entry["matches"].sort(key=lambda match: match["similarity"], reverse=True)
+            entry["matches_count"] = len(entry["matches"])
+        return sorted(results.values(), key=lambda entry: entry["matches"][0]["similarity"], reverse=True)
+
+    def describe(self, include_photos: bool = False) -> dict:
+        with self._lock:
+            info = {
+                "gallery_id": self.meta["gallery_id"],
+                "name": self.meta["name"],
+                "photo_count": len(self.meta["photos"]),
+                "face_count": self.meta["rows"] - self.meta["removed_rows"],
+                "index_bytes": self.meta["capacity"] * (FACE_DESCRIPTOR_SIZE * 4 + 4 * 4 + 4),
+                "created_at": self.meta["created_at"],
+                "updated_at": self.meta["updated_at"]
+            }
+            if include_photos:
+                info["photos"] = [
+                    {"photo_id": photo_id, "face_count": photo["face_count"], "sha256": photo["sha256"], "added_at": photo["added_at"]}
+                    for photo_id, photo in self.meta["photos"].items()
+                ]
+            return info
+
+    def close(self):
+        with self._lock:
+            self._close_arrays()
+
+class GalleryStore:
+    """Galeri indekslerini TEMP_DIR/galleries/<gallery_id> altında açar ve önbellekler"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _valid_id(gallery_id: str) -> bool:
+        return len(gallery_id) == 32 and all(c in "0123456789abcdef" for c in gallery_id)
+
+    def create(self, name: str) -> GalleryIndex:
+        gallery_id = uuid.uuid4().hex
+        index = GalleryIndex.create(os.path.join(self.directory, gallery_id), gallery_id, name)
+        with self._lock:
+            self._indexes[gallery_id] = index
+        return index
+
+    def get(self, gallery_id: str) -> Optional[GalleryIndex]:
+        if not self._valid_id(gallery_id):
+            return None
+        with self._lock:
+            index = self._indexes.get(gallery_id)
+            if index is None:
+                directory = os.path.join(self.directory, gallery_id)
+                if not os.path.exists(os.path.join(directory, "index.json")):
+                    return None
+                index = self._indexes[gallery_id] = GalleryIndex.open(directory)
+            return index
+
+    def delete(self, gallery_id: str) -> bool:
+        if not self._valid_id(gallery_id):
+            return False
+        directory = os.path.join(self.directory, gallery_id)
+        with self._lock:
+            index = self._indexes.pop(gallery_id, None)
+            if index is None and not os.path.exists(os.path.join(directory, "index.json")):
+                return False
+        # Uyumsuz (açılamayan) indeksler de silinebilsin diye açmadan kaldırılır
+        if index is not None:
+            index.close()
+        shutil.rmtree(directory, ignore_errors=True)
+        return True
+
+    def list(self) -> List[dict]:
+        galleries = []
+        for gallery_id in sorted(os.listdir(self.directory)):
+            try:
+                index = self.get(gallery_id)
+            except ValueError as e:
+                galleries.append({"gallery_id": gallery_id, "error": str(e)})
+                continue
+            if index is not None:
+                galleries.append(index.describe())
+        return galleries
+
+gallery_store = GalleryStore(GALLERIES_DIR)
+
+def get_gallery_or_404(gallery_id: str) -> GalleryIndex:
+    try:
+        index = gallery_store.get(gallery_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if index is None:
+        raise HTTPException(status_code=404, detail=f"Unknown gallery_id: {gallery_id}")
+    return index
+
+@app.post("/galleries")
+async def create_gallery(name: str = Form(default="Gallery", description="Display name of the gallery")):
+    """Boş bir galeri indeksi oluşturur"""
+    index = await asyncio.to_thread(gallery_store.create, name)
+    return {"success": True, **index.describe()}
+
+@app.get("/galleries")
+async def list_galleries():
+    galleries = await asyncio.to_thread(gallery_store.list)
+    return {"success": True, "count": len(galleries), "galleries": galleries}
+
+@app.get("/galleries/{gallery_id}")
+async def get_gallery(gallery_id: str):
+    return {"success": True, **get_gallery_or_404(gallery_id).describe(include_photos=True)}
+
+@app.delete("/galleries/{gallery_id}")
+async def delete_gallery(gallery_id: str):
+    if not await asyncio.to_thread(gallery_store.delete, gallery_id):
+        raise HTTPException(status_code=404, detail=f"Unknown gallery_id: {gallery_id}")
+    return {"success": True, "gallery_id": gallery_id, "deleted": True}
+
+def hashed_source_bytes(source: Union[str, bytes]) -> tuple:
+    """Görüntü byte'ları ve sha256 özeti (thread'de çalışır)"""
+    data = source_bytes(source)
+    return data, hashlib.sha256(data).hexdigest()
+
+@app.post("/galleries/{gallery_id}/photos")
+async def add_gallery_photos(
+    gallery_id: str,
+    images: List[str] = Form(default=[], description="List of base64 encoded gallery images"),
+    images_files: List[UploadFile] = File(default=[], description="Raw gallery image files (binary upload)"),
+    photo_ids: List[str] = Form(default=[], description="Client photo IDs in upload order (default: content hash)"),
+    detection_max_side: Optional[int] = Form(default=None, description="Run detection with the longest side capped at this many pixels (0 = full resolution)")
+):
+    """
+    Fotoğrafları indekse ekler. Aynı ID ve aynı içerikle tekrar gelen
+    fotoğraflar decode edilmeden atlanır; içeriği değişenler yeniden indekslenir.
+    """
+    index = get_gallery_or_404(gallery_id)
+    sources = await read_image_sources(images, images_files)
+    if photo_ids and len(photo_ids) != len(sources):
+        raise HTTPException(status_code=400, detail="photo_ids must have one entry per uploaded image")
+    
+    results = []
+    for i in range(len(sources)):
+        # base64 çözme ve hash tam görüntü üzerinde; event loop'u bloklamasın
+        image_data, content_hash = await asyncio.to_thread(hashed_source_bytes, sources[i])
+        sources[i] = None
+        photo_id = photo_ids[i] if photo_ids else content_hash[:32]
         
+        existing = index.photo(photo_id)
+        if existing is not None and existing["sha256"] == content_hash:
+            results.append({"index": i, "photo_id": photo_id, "status": "unchanged", "face_count": existing["face_count"]})
+            continue
+        try:
+            indexed = await image_executor.run("galleries", index_photo_sync, image_data, detection_max_side)
+            photo = await asyncio.to_thread(index.add, photo_id, content_hash, indexed)
+            results.append({
+                "index": i,
+                "photo_id": photo_id,
+                "status": "replaced" if existing is not None else "added",
+                "face_count": photo["face_count"]
+            })
+        except Exception as e:
+            results.append({"index": i, "photo_id": photo_id, "status": "failed", "error": str(e)})
+    
+    return {"success": True, **index.describe(), "results": results}
+
+@app.delete("/galleries/{gallery_id}/photos/{photo_id}")
+async def remove_gallery_photo(gallery_id: str, photo_id: str):
+    index = get_gallery_or_404(gallery_id)
+    if not await asyncio.to_thread(index.remove, photo_id):
+        raise HTTPException(status_code=404, detail=f"Unknown photo_id: {photo_id}")
+    return {"success": True, "gallery_id": gallery_id, "photo_id": photo_id, "deleted": True}
+
+@app.post("/galleries/{gallery_id}/search")
+async def search_gallery(
+    gallery_id: str,
+    reference_image: Optional[str] = Form(default=None, description="Base64 encoded reference image of the person"),
+    reference_image_file: Optional[UploadFile] = File(default=None, description="Raw reference image file (binary upload)"),
+    reference_id: Optional[str] = Form(default=None, description="ID from /references, instead of re-uploading the reference image"),
+    threshold: float = Form(default=0.6, description="Similarity threshold (32x32 ncc descriptors; scores differ slightly from /compare-faces)"),
+    person_name: str = Form(default="Unknown", description="Name of the person being searched"),
+    detection_max_side: Optional[int] = Form(default=None, description="Run detection with the longest side capped at this many pixels (0 = full resolution)")
+):
+    """
+    İndekslenmiş galeride kişiyi arar; galeri fotoğrafları yeniden yüklenmez.
+    scan_results yalnızca eşleşme bulunan fotoğrafları, en benzerden başlayarak içerir.
+    """
+    index = get_gallery_or_404(gallery_id)
+    ref_face_region = await load_scan_reference(reference_id, reference_image, reference_image_file, detection_max_side)
+    try:
+        results = []
+        if ref_face_region is not None:
+            results = await asyncio.to_thread(index.search, face_descriptor(ref_face_region), threshold)
+        info = index.describe()
         return {
-            "success": True,
-            "person_name": person_name,
-            "total_images_scanned": len(gallery_images),
-            "total_matches_found": total_matches,
-            "images_with_matches": len([r for r in results if r["found"]]),
-            "threshold_used": threshold,
+            **scan_summary(person_name, ref_face_region, info["photo_count"],
+                           sum(r["matches_count"] for r in results), len(results), threshold),
+            "gallery_id": gallery_id,
             "scan_results": results,
             "scan_completed_at": datetime.now().isoformat()
         }
-        
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Gallery scan error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Gallery search error: {str(e)}")
+
+MATCHED_PROCESSING_TYPES = ("blur", "avatar", "artistic")
+
+def validate_processing_type(processing_type: str, params) -> dict:
+    """İşlem türü ve parametreleri işlem (ve akış) başlamadan önce 400 ile doğrulanır"""
+    if processing_type not in MATCHED_PROCESSING_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown processing type: {processing_type}. Use one of {', '.join(MATCHED_PROCESSING_TYPES)}")
+    if not isinstance(params, dict):
+        raise HTTPException(status_code=400, detail="processing_params must be a JSON object")
+    if processing_type == "artistic":
+        resolve_tier(params.get("tier", "final"))
+    return params
 
 @app.post("/process-matched-photos")
 async def process_matched_photos(
-    images_with_matches: List[str] = Form(..., description="List of base64 images that contain matches"),
+    request: Request,
+    images_with_matches: List[str] = Form(default=[], description="List of base64 images that contain matches"),
+    images_with_matches_files: List[UploadFile] = File(default=[], description="Raw image files that contain matches (binary upload)"),
     face_coordinates_list: List[str] = Form(..., description="List of JSON face coordinates for each image"),
     processing_type: str = Form(..., description="Processing type: blur, avatar, artistic"),
-    processing_params: str = Form(default="{}", description="Additional processing parameters")
+    processing_params: str = Form(default="{}", description="Additional processing parameters"),
+    response_format: Optional[str] = Query(default=None, description="json (default), or jpeg/webp/png for a multipart/mixed stream"),
+    quality: int = Query(default=DEFAULT_IMAGE_QUALITY, ge=1, le=100, description="Output image quality")
 ):
     """
     Eşleşen fotoğraflarda toplu işlem yapar (bulanıklaştırma, avatar, sanatsal dönüştürme)
     """
+    sources = await read_image_sources(images_with_matches, images_with_matches_files, "images_with_matches")
+    response_format = resolve_response_format(request, response_format)
+    params = validate_processing_type(processing_type, parse_json_param(processing_params, "processing_params"))
     try:
-        params = json.loads(processing_params)
-        processed_results = []
+        items = process_matched_items(sources, face_coordinates_list, processing_type, params, response_format, quality)
+        total_images = len(sources)
+        summary = functools.partial(process_matched_summary, processing_type, total_images)
         
-        for idx, (image, coords_json) in enumerate(zip(images_with_matches, face_coordinates_list)):
-            try:
-                coords = json.loads(coords_json)
-                
-                if processing_type == "blur":
-                    result = await blur_face(
-                        image=image,
-                        face_coordinates=coords_json,
-                        blur_intensity=params.get("blur_intensity", 15)
-                    )
-                elif processing_type == "avatar":
-                    result = await replace_with_avatar(
-                        image=image,
-                        face_coordinates=coords_json,
-                        avatar_style=params.get("avatar_style", "cartoon")
-                    )
-                elif processing_type == "artistic":
-                    result = await artify_photo(
-                        image=image,
-                        art_style=params.get("art_style", "van_gogh")
-                    )
-                else:
-                    raise ValueError(f"Unknown processing type: {processing_type}")
-                
-                processed_results.append({
-                    "index": idx,
-                    "success": result["success"],
-                    "processed_image": result.get("processed_image"),
-                    "processing_info": result.get("processing_info", {})
-                })
-                
-            except Exception as e:
-                processed_results.append({
-                    "index": idx,
-                    "success": False,
-                    "error": str(e),
-                    "processed_image": None
-                })
+        if response_format != "json":
+            return multipart_response(items, summary, response_format)
+        
+        processed_results = [item async for _, item in items]
+        return {**summary(processed_results), "results": processed_results}
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch processing error: {str(e)}")
+
+async def process_matched_items(sources: list, face_coordinates_list: List[str], processing_type: str,
+                                params: dict, response_format: str, quality: int):
+    """Her görsel bittikçe (index, sonuç) üretir; tek görselin hatası diğerlerini durdurmaz"""
+    for idx, (image, coords_json) in enumerate(zip(sources, face_coordinates_list)):
+        yield idx, await process_matched_item(idx, image, coords_json, processing_type, params, response_format, quality)
+
+async def process_matched_item(idx: int, image: Union[str, bytes], coords_json: str, processing_type: str, params: dict,
+                               response_format: str, quality: int, endpoint: str = "process-matched-photos") -> dict:
+    try:
+        if processing_type == "blur":
+            result = await cached_run(
+                endpoint, blur_face_sync,
+                image, coords_json, params.get("blur_intensity", 15), response_format, quality
+            )
+        elif processing_type == "avatar":
+            result = await cached_run(
+                endpoint, replace_with_avatar_sync,
+                image, coords_json, params.get("avatar_style", "cartoon"), response_format, quality
+            )
+        elif processing_type == "artistic":
+            result = await cached_run(
+                endpoint, artify_photo_sync,
+                image, params.get("art_style", "van_gogh"), response_format, quality, resolve_tier(params.get("tier", "final"))
+            )
+        else:
+            raise ValueError(f"Unknown processing type: {processing_type}")
         
-        successful_count = len([r for r in processed_results if r["success"]])
+        return {
+            "index": idx,
+            "success": result["success"],
+            "processed_image": result.get("processed_image"),
+            "processing_info": result.get("processing_info", {})
+        }
         
+    except Exception as e:
         return {
-            "success": True,
-            "processing_type": processing_type,
-            "total_images": len(images_with_matches),
-            "successful_processing": successful_count,
-            "failed_processing": len(images_with_matches) - successful_count,
-            "results": processed_results,
-            "processed_at": datetime.now().isoformat()
+            "index": idx,
+            "success": False,
+            "error": str(e),
+            "processed_image": None
+        }
+
+def process_matched_summary(processing_type: str, total_images: int, processed_results: list) -> dict:
+    successful_count = len([r for r in processed_results if r["success"]])
+    return {
+        "success": True,
+        "processing_type": processing_type,
+        "total_images": total_images,
+        "successful_processing": successful_count,
+        "failed_processing": total_images - successful_count,
+        "processed_at": datetime.now().isoformat()
+    }
+
+@app.post("/count-people")
+async def count_people_in_photo(
+    image: Optional[str] = Form(default=None, description="Base64 encoded image"),
+    image_file: Optional[UploadFile] = File(default=None, description="Raw image file (binary upload)"),
+    detection_max_side: Optional[int] = Form(default=None, description="Run detection with the longest side capped at this many pixels (0 = full resolution)"),
+    mode: str = Form(default="full", description="full (face and body cascades) or fast (stop once 0-1 vs 2+ people is settled)")
+):
+    """
+    Fotoğrafta kaç kişi olduğunu tespit eder (akıllı silme için)
+    """
+    if mode not in COUNT_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown mode: {mode}. Use one of {', '.join(COUNT_MODES)}")
+    source = await read_image_source(image, image_file)
+    try:
+        return await cached_run("count-people", count_people_sync, source, detection_max_side, mode)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"People counting error: {str(e)}")
+
+# Hızlı sayım: smart_suggestion yalnızca 0-1 ile 2+ kişiyi ayırır
+COUNT_MODES = ("full", "fast")
+FAST_BODY_MAX_SIDE = int(os.getenv("FACEFADE_FAST_BODY_MAX_SIDE", "640"))
+
+def count_people_sync(image: Union[str, bytes], max_side: Optional[int] = None, mode: str = "full") -> dict:
+    """Kişi saymanın CPU tarafı (havuzda çalışır)"""
+    return count_people_in_context(ImageContext(image, max_side), max_side, mode)
+
+def fast_body_search(context: ImageContext, face_rects: np.ndarray, max_side: Optional[int] = None):
+    """
+    Hızlı sayımın gövde araması: (gövdeler, aranan bölge) ya da iki yüz kararı
+    zaten verdiyse None. Tek yüz varsa aynı sıradaki diğer kişiler aranır:
+    yüz çizgisinin altındaki bant, o yüze uygun gövde ölçekleriyle taranır.
+    Yüz yoksa bütün görsel taranır; her iki durumda da çözünürlük düşüktür.
+    """
+    if len(face_rects) >= 2:
+        return None
+    
+    height, width = context.gray.shape[:2]
+    side = FAST_BODY_MAX_SIDE if not max_side or max_side <= 0 else min(max_side, FAST_BODY_MAX_SIDE)
+    params = {"scaleFactor": 1.1, "minNeighbors": 3}
+    top = 0
+    if len(face_rects):
+        _, y, w, h = (int(v) for v in face_rects[0])
+        top = max(0, y - h // 2)
+        # Ayakta bir insan kabaca 7-8 yüz boyu; kutular bir miktar pay içerir
+        params["minSize"] = (int(1.2 * w), int(3 * h))
+        params["maxSize"] = (min(width, 4 * w), min(height - top, 10 * h))
+    
+    body_rects = detect_objects(context.gray[top:], "body", max_side=side, **params)
+    body_rects[:, 1] += top
+    return body_rects, {"region": (0, top, width, height - top), "max_side": side}
+
+def count_people_in_context(context: ImageContext, max_side: Optional[int] = None, mode: str = "full") -> dict:
+    """Kişi sayımı; decode ve tespitler context'ten paylaşılır"""
+    # OpenCV ile yüz tespiti
+    face_rects = context.detect(
+        "face",
+        max_side=max_side,
+        scaleFactor=1.1,
+        minNeighbors=5,
+        minSize=(30, 30)
+    )
+
+    # Vücut tespiti de ekle (daha accurate)
+    stages_run = ["face"]
+    body_search = None
+    if mode == "fast":
+        body = fast_body_search(context, face_rects, max_side)
+        body_rects = np.empty((0, 4), dtype=np.int32)
+        if body is not None:
+            body_rects, body_search = body
+            stages_run.append("body")
+    else:
+        body_rects = context.detect("body", max_side=max_side, scaleFactor=1.1, minNeighbors=3)
+        stages_run.append("body")
+        height, width = context.gray.shape[:2]
+        body_search = {
+            "region": (0, 0, width, height),
+            "max_side": DETECTION_MAX_SIDE if max_side is None else max_side
         }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Batch processing error: {str(e)}")
 
-@app.post("/count-people")
-async def count_people_in_photo(
-    image: str = Form(..., description="Base64 encoded image")
-):
+    # Face ve body detection'ı birleştir
+    total_people = max(len(face_rects), len(body_rects))
+
+    # Tespitler gri karede (dik, küçük decode edilmiş olabilir); yanıt orijinal koordinatlarda
+    face_rects = context.frame.to_original(face_rects)
+    body_rects = context.frame.to_original(body_rects)
+    if body_search is not None:
+        x, y, w, h = context.frame.to_original(body_search["region"])[0]
+        body_search["region"] = {"top": int(y), "right": int(x + w), "bottom": int(y + h), "left": int(x)}
+
+    faces = []
+    for i, (x, y, w, h) in enumerate(face_rects):
+        faces.append({
+            "id": i,
+            "type": "face",
+            "coordinates": {
+                "top": int(y),
+                "right": int(x + w), 
+                "bottom": int(y + h),
+                "left": int(x)
+            },
+            "width": int(w),
+            "height": int(h)
+        })
+
+    bodies = []
+    for i, (x, y, w, h) in enumerate(body_rects):
+        bodies.append({
+            "id": i,
+            "type": "body",
+            "coordinates": {
+                "top": int(y),
+                "right": int(x + w),
+                "bottom": int(y + h), 
+                "left": int(x)
+            },
+            "width": int(w),
+            "height": int(h)
+        })
+
+    # Akıllı silme önerisi
+    suggestion = ""
+    if total_people == 0:
+        suggestion = "delete_photo"  # Kişi bulunamadı, fotoğraf silinebilir
+    elif total_people == 1:
+        suggestion = "delete_photo"  # Tek kişi var, fotoğraf silinebilir
+    else:
+        suggestion = "smart_remove"  # Birden fazla kişi, AI inpainting kullan
+
+    return {
+        "success": True,
+        "total_people": total_people,
+        "faces_detected": len(face_rects),
+        "bodies_detected": len(body_rects),
+        "faces": faces,
+        "bodies": bodies,
+        "smart_suggestion": suggestion,
+        "mode": mode,
+        "stages_run": stages_run,
+        "early_exit": "body" not in stages_run,
+        "body_search": body_search,
+        "processed_at": datetime.now().isoformat()
+    }
+
+def padded_roi(shape: tuple, top: int, right: int, bottom: int, left: int, pad: int) -> tuple:
+    """Bölgeyi her yönde pad kadar genişletip görsel sınırlarına kırpar: (y0, y1, x0, x1)"""
+    h, w = shape[:2]
+    return max(0, top - pad), min(h, bottom + pad), max(0, left - pad), min(w, right + pad)
+
+# cv2.inpaint yalnızca mask'e yakın bilinen pikselleri okur; bu pay ile
+# kırpıntı üzerinde çalışmak tam kare ile aynı sonucu verir
+INPAINT_RADIUS = 3
+INPAINT_ROI_PAD = 2 * INPAINT_RADIUS + 4
+INPAINT_ALGORITHMS = {"telea": cv2.INPAINT_TELEA, "ns": cv2.INPAINT_NS}
+
+class SingleInpaint:
+    """Tek algoritmayla (TELEA veya NS) tam çözünürlükte doldurur"""
+
+    def __init__(self, algorithm: str = "telea"):
+        self.algorithm = algorithm
+
+    def pad(self, diameter: int) -> int:
+        return INPAINT_ROI_PAD
+
+    def __call__(self, crop: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        return cv2.inpaint(crop, mask, inpaintRadius=INPAINT_RADIUS, flags=INPAINT_ALGORITHMS[self.algorithm])
+
+    def describe(self) -> dict:
+        return {"strategy": "single", "algorithm": self.algorithm}
+
+class BlendedInpaint:
+    """TELEA ve NS sonuçlarını ağırlıklı karıştırır (önceki varsayılan davranış)"""
+
+    def __init__(self, alpha: float = 0.7):
+        self.alpha = alpha
+
+    def pad(self, diameter: int) -> int:
+        return INPAINT_ROI_PAD
+
+    def __call__(self, crop: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        # OpenCV TELEA inpainting algoritması kullan
+        inpainted = cv2.inpaint(crop, mask, inpaintRadius=INPAINT_RADIUS, flags=cv2.INPAINT_TELEA)
+        # Daha gelişmiş inpainting için NS (Navier-Stokes) de dene
+        inpainted_ns = cv2.inpaint(crop, mask, inpaintRadius=INPAINT_RADIUS, flags=cv2.INPAINT_NS)
+        # İki sonucu blend et (daha iyi sonuç için)
+        return cv2.addWeighted(inpainted, self.alpha, inpainted_ns, 1-self.alpha, 0)
+
+    def describe(self) -> dict:
+        return {"strategy": "blended", "alpha": self.alpha}
+
+class PyramidInpaint:
     """
-    Fotoğrafta kaç kişi olduğunu tespit eder (akıllı silme için)
+    Kabadan inceye: büyük mask'i uzun kenarı coarse_side olan küçültülmüş
+    kırpıntıda doldurur, büyütüp yerleştirir, sonra yalnızca mask kenarındaki
+    refine_band genişliğindeki şeridi tam çözünürlükte yeniden doldurur.
     """
-    try:
-        opencv_image = decode_base64_image(image)
-        
-        # OpenCV ile yüz tespiti
-        gray_image = cv2.cvtColor(opencv_image, cv2.COLOR_BGR2GRAY)
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        
-        face_rects = face_cascade.detectMultiScale(
-            gray_image,
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(30, 30)
-        )
-        
-        # Vücut tespiti de ekle (daha accurate)
-        body_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_fullbody.xml')
-        body_rects = body_cascade.detectMultiScale(gray_image, scaleFactor=1.1, minNeighbors=3)
-        
-        # Face ve body detection'ı birleştir
-        total_people = max(len(face_rects), len(body_rects))
-        
-        faces = []
-        for i, (x, y, w, h) in enumerate(face_rects):
-            faces.append({
-                "id": i,
-                "type": "face",
-                "coordinates": {
-                    "top": int(y),
-                    "right": int(x + w), 
-                    "bottom": int(y + h),
-                    "left": int(x)
-                },
-                "width": int(w),
-                "height": int(h)
-            })
+
+    def __init__(self, base, coarse_side: int = 256, refine_band: int = 6, refine_algorithm: str = "telea"):
+        self.base = base
+        self.coarse_side = coarse_side
+        self.refine_band = refine_band
+        self.refine_algorithm = refine_algorithm
+
+    def scale(self, diameter: int) -> float:
+        return min(1.0, self.coarse_side / max(1, diameter))
+
+    def pad(self, diameter: int) -> int:
+        # Küçük ölçekte de base stratejinin yeterli bilinen komşuluğu olsun
+        return max(INPAINT_ROI_PAD, int(np.ceil(INPAINT_ROI_PAD / self.scale(diameter))))
+
+    def __call__(self, crop: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        _, _, mask_w, mask_h = cv2.boundingRect(mask)
+        scale = self.scale(max(mask_w, mask_h))
+        if scale >= 1.0:
+            return self.base(crop, mask)
         
-        bodies = []
-        for i, (x, y, w, h) in enumerate(body_rects):
-            bodies.append({
-                "id": i,
-                "type": "body",
-                "coordinates": {
-                    "top": int(y),
-                    "right": int(x + w),
-                    "bottom": int(y + h), 
-                    "left": int(x)
-                },
-                "width": int(w),
-                "height": int(h)
-            })
+        h, w = mask.shape
+        size = (max(1, round(w * scale)), max(1, round(h * scale)))
+        small = cv2.resize(crop, size, interpolation=cv2.INTER_AREA)
+        # Kısmen maskeli pikseller de doldurulsun diye eşik 0
+        _, small_mask = cv2.threshold(cv2.resize(mask, size, interpolation=cv2.INTER_AREA), 0, 255, cv2.THRESH_BINARY)
+        coarse = cv2.resize(self.base(small, small_mask), (w, h), interpolation=cv2.INTER_CUBIC)
         
-        # Akıllı silme önerisi
-        suggestion = ""
-        if total_people == 0:
-            suggestion = "delete_photo"  # Kişi bulunamadı, fotoğraf silinebilir
-        elif total_people == 1:
-            suggestion = "delete_photo"  # Tek kişi var, fotoğraf silinebilir
-        else:
-            suggestion = "smart_remove"  # Birden fazla kişi, AI inpainting kullan
+        result = crop.copy()
+        np.copyto(result, coarse, where=mask[:, :, None] > 0)
         
+        # Kenar şeridi: dışarıda orijinal, içeride kaba dolgu bilinen kabul edilir
+        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * self.refine_band + 1, 2 * self.refine_band + 1))
+        band = cv2.subtract(mask, cv2.erode(mask, kernel))
+        return cv2.inpaint(result, band, inpaintRadius=INPAINT_RADIUS, flags=INPAINT_ALGORITHMS[self.refine_algorithm])
+
+    def describe(self) -> dict:
         return {
-            "success": True,
-            "total_people": total_people,
-            "faces_detected": len(face_rects),
-            "bodies_detected": len(body_rects),
-            "faces": faces,
-            "bodies": bodies,
-            "smart_suggestion": suggestion,
-            "processed_at": datetime.now().isoformat()
+            "strategy": "pyramid",
+            "base": self.base.describe(),
+            "coarse_side": self.coarse_side,
+            "refine_band": self.refine_band,
+            "refine_algorithm": self.refine_algorithm
         }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"People counting error: {str(e)}")
+
+# Kalite / gecikme ön ayarları (/smart-remove-person inpaint_preset)
+INPAINT_PRESETS = {
+    "quality": BlendedInpaint(0.7),
+    "telea": SingleInpaint("telea"),
+    "ns": SingleInpaint("ns"),
+    "balanced": PyramidInpaint(BlendedInpaint(0.7), coarse_side=384, refine_band=8),
+    "fast": PyramidInpaint(SingleInpaint("telea"), coarse_side=160, refine_band=5),
+}
+DEFAULT_INPAINT_PRESET = "quality"
 
 @app.post("/smart-remove-person")
 async def smart_remove_person(
-    image: str = Form(..., description="Base64 encoded image"),
+    request: Request,
+    image: Optional[str] = Form(default=None, description="Base64 encoded image"),
+    image_file: Optional[UploadFile] = File(default=None, description="Raw image file (binary upload)"),
     target_face_coordinates: str = Form(..., description="JSON coordinates of person to remove"),
-    removal_method: str = Form(default="auto", description="auto, delete_photo, inpaint")
+    removal_method: str = Form(default="auto", description="auto, delete_photo, inpaint"),
+    inpaint_preset: str = Form(default=DEFAULT_INPAINT_PRESET, description="Inpainting quality/latency preset: quality, balanced, fast, telea, ns"),
+    people_count: Optional[str] = Form(default=None, description="Prior /count-people result (JSON) or total people count for this image; skips detection"),
+    response_format: Optional[str] = Query(default=None, description="json (default), jpeg, webp, png"),
+    quality: int = Query(default=DEFAULT_IMAGE_QUALITY, ge=1, le=100, description="Output image quality")
 ):
     """
     Akıllı kişi silme - tek kişiyse fotoğrafı sil, çoklu kişiyse AI inpainting
     """
+    source = await read_image_source(image, image_file)
+    response_format = resolve_response_format(request, response_format)
+    if inpaint_preset not in INPAINT_PRESETS:
+        raise HTTPException(status_code=400, detail=f"Unknown inpaint_preset: {inpaint_preset}. Use one of {', '.join(INPAINT_PRESETS)}")
+    total_people = parse_people_count(people_count) if people_count else None
     try:
-        opencv_image = decode_base64_image(image)
-        target_coords = json.loads(target_face_coordinates)
-        
-        # Önce kaç kişi olduğunu tespit et
-        people_count_result = await count_people_in_photo(image)
-        total_people = people_count_result["total_people"]
-        
-        result = {
-            "success": True,
-            "total_people_detected": total_people,
-            "removal_method_used": "",
-            "processed_image": None,
-            "should_delete_photo": False,
-            "processing_info": {
-                "target_coordinates": target_coords,
-                "processed_at": datetime.now().isoformat()
-            }
-        }
-        
-        if removal_method == "auto":
-            if total_people <= 1:
-                removal_method = "delete_photo"
-            else:
-                removal_method = "inpaint"
-        
-        if removal_method == "delete_photo":
-            # Fotoğraf tamamen silinecek (frontend'te handle edilir)
-            result["removal_method_used"] = "delete_photo"
-            result["should_delete_photo"] = True
-            result["message"] = "Fotoğrafta sadece hedef kişi var. Fotoğraf tamamen silinecek."
-            
-        elif removal_method == "inpaint":
-            # AI inpainting ile kişiyi çıkar
-            result["removal_method_used"] = "inpaint"
-            inpainted_image = apply_advanced_inpainting(opencv_image, target_coords)
-            result["processed_image"] = encode_image_to_base64(inpainted_image)
-            result["message"] = "Hedef kişi fotoğraftan AI ile çıkarıldı. Diğer kişiler korundu."
-        
-        return result
-        
+        people_count_source = "client"
+        if total_people is None:
+            # Aynı görselin önbellekteki /count-people sonucu (önbellek ana süreçte)
+            counted = await asyncio.to_thread(cached_result, count_people_sync, source, None, "full")
+            if counted is not None:
+                total_people, people_count_source = counted["total_people"], "cache"
+        result = await cached_run("smart-remove-person", smart_remove_person_sync, source, target_face_coordinates, removal_method, response_format, quality, inpaint_preset, total_people, people_count_source)
+        return image_response(result, response_format)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Smart removal error: {str(e)}")
 
-def apply_advanced_inpainting(image: np.ndarray, target_coords: dict) -> np.ndarray:
+def parse_people_count(people_count: str) -> int:
+    """/count-people yanıtından ya da düz sayıdan toplam kişi sayısı (geçersizse 400)"""
+    try:
+        value = json.loads(people_count)
+        total_people = value.get("total_people") if isinstance(value, dict) else value
+        if isinstance(total_people, bool) or not isinstance(total_people, int) or total_people < 0:
+            raise ValueError("total_people must be a non-negative integer")
+        return total_people
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid people_count: {str(e)}")
+
+def smart_remove_person_sync(image: Union[str, bytes], target_face_coordinates: str, removal_method: str,
+                             response_format: str = "json", quality: int = DEFAULT_IMAGE_QUALITY,
+                             inpaint_preset: str = DEFAULT_INPAINT_PRESET, total_people: Optional[int] = None,
+                             people_count_source: str = "client") -> dict:
+    """Akıllı silmenin CPU tarafı (havuzda çalışır)"""
+    context = ImageContext(image)
+    target_coords = json.loads(target_face_coordinates)
+    if removal_method == "inpaint" or (removal_method == "auto" and (total_people is None or total_people > 1)):
+        # Renkli görsel gerekebilir; sayım gri karesini ondan türetir, tek decode.
+        # Sadece sayım gerektiren yollar (delete_photo) küçük gri decode'da kalır
+        context.image
+
+    # Önce kaç kişi olduğunu tespit et: verilmediyse (istemci ya da önbellekteki
+    # /count-people sonucu) aynı context'te tespit
+    if total_people is None:
+        total_people = count_people_in_context(context)["total_people"]
+        people_count_source = "detected"
+
+    result = {
+        "success": True,
+        "total_people_detected": total_people,
+        "removal_method_used": "",
+        "processed_image": None,
+        "should_delete_photo": False,
+        "processing_info": {
+            "target_coordinates": target_coords,
+            "people_count_source": people_count_source,
+            "processed_at": datetime.now().isoformat()
+        }
+    }
+
+    if removal_method == "auto":
+        if total_people <= 1:
+            removal_method = "delete_photo"
+        else:
+            removal_method = "inpaint"
+
+    if removal_method == "delete_photo":
+        # Fotoğraf tamamen silinecek (frontend'te handle edilir)
+        result["removal_method_used"] = "delete_photo"
+        result["should_delete_photo"] = True
+        result["message"] = "Fotoğrafta sadece hedef kişi var. Fotoğraf tamamen silinecek."
+
+    elif removal_method == "inpaint":
+        # AI inpainting ile kişiyi çıkar
+        result["removal_method_used"] = "inpaint"
+        result["processing_info"]["inpaint_preset"] = inpaint_preset
+        result["processing_info"]["inpaint_strategy"] = INPAINT_PRESETS[inpaint_preset].describe()
+        with timed_stage("process"):
+            inpainted_image = apply_advanced_inpainting(context.image, target_coords, in_place=True, preset=inpaint_preset)
+        result["processed_image"] = encode_output(inpainted_image, response_format, quality)
+        result["message"] = "Hedef kişi fotoğraftan AI ile çıkarıldı. Diğer kişiler korundu."
+
+    return result
+
+def apply_advanced_inpainting(image: np.ndarray, target_coords: dict, in_place: bool = False,
+                              preset: str = DEFAULT_INPAINT_PRESET) -> np.ndarray:
     """
     Gelişmiş AI inpainting - kişiyi çıkarıp arka planı gerçekçi şekilde doldur
+    Tüm işlem dairesel mask'in çevresindeki kırpıntıda, preset'in stratejisiyle
+    yapılır. in_place=True ise sonuç image'e yazılır.
     """
     try:
+        strategy = INPAINT_PRESETS[preset]
+
         # Target koordinatları al
         top = target_coords["top"]
         bottom = target_coords["bottom"] 
@@ -738,9 +3389,6 @@ def apply_advanced_inpainting(image: np.ndarray, target_coords: dict) -> np.ndar
         left = max(0, min(left, w))
         right = max(0, min(right, w))
         
-        # Mask oluştur (silinecek alan)
-        mask = np.zeros((h, w), dtype=np.uint8)
-        
         # Yüz alanını biraz genişlet (daha iyi inpainting için)
         margin = 20
         top_expanded = max(0, top - margin)
@@ -753,17 +3401,19 @@ def apply_advanced_inpainting(image: np.ndarray, target_coords: dict) -> np.ndar
         center_y = (top_expanded + bottom_expanded) // 2
         radius = max((right_expanded - left_expanded) // 2, (bottom_expanded - top_expanded) // 2)
         
-        cv2.circle(mask, (center_x, center_y), radius, 255, -1)
-        
-        # OpenCV TELEA inpainting algoritması kullan
-        inpainted = cv2.inpaint(image, mask, inpaintRadius=3, flags=cv2.INPAINT_TELEA)
+        # Daireyi ve stratejinin ihtiyaç duyduğu komşuluğu kapsayan kırpıntı
+        y0, y1, x0, x1 = padded_roi(
+            image.shape, center_y - radius, center_x + radius + 1, center_y + radius + 1, center_x - radius,
+            strategy.pad(2 * radius + 1)
+        )
+        crop = image[y0:y1, x0:x1]
         
-        # Daha gelişmiş inpainting için NS (Navier-Stokes) de dene
-        inpainted_ns = cv2.inpaint(image, mask, inpaintRadius=3, flags=cv2.INPAINT_NS)
+        # Mask oluştur (silinecek alan), kırpıntı koordinatlarında
+        mask = np.zeros(crop.shape[:2], dtype=np.uint8)
+        cv2.circle(mask, (center_x - x0, center_y - y0), radius, 255, -1)
         
-        # İki sonucu blend et (daha iyi sonuç için)
-        alpha = 0.7
-        final_result = cv2.addWeighted(inpainted, alpha, inpainted_ns, 1-alpha, 0)
+        final_result = image if in_place else image.copy()
+        final_result[y0:y1, x0:x1] = strategy(crop, mask)
         
         return final_result
         
@@ -803,133 +3453,235 @@ def apply_advanced_inpainting(image: np.ndarray, target_coords: dict) -> np.ndar
         
         return result
 
+CEREMONY_TYPES = ("artistic", "dreamy", "abstract", "healing")
+
+def resolve_ceremony_type(ceremony_type: str) -> str:
+    if ceremony_type not in CEREMONY_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown ceremony_type: {ceremony_type}. Use one of {', '.join(CEREMONY_TYPES)}")
+    return ceremony_type
+
 @app.post("/closure-ceremony")
 async def perform_closure_ceremony(
-    images: List[str] = Form(..., description="List of base64 images containing the person"),
+    request: Request,
+    images: List[str] = Form(default=[], description="List of base64 images containing the person"),
+    images_files: List[UploadFile] = File(default=[], description="Raw image files containing the person (binary upload)"),
     person_name: str = Form(..., description="Name of the person for emotional context"),
     art_style: str = Form(default="van_gogh", description="Art style for transformation"),
-    ceremony_type: str = Form(default="artistic", description="Type: artistic, dreamy, abstract, healing")
+    ceremony_type: str = Form(default="artistic", description="Type: artistic, dreamy, abstract, healing"),
+    tier: str = Form(default="final", description="final (full resolution) or preview (reduced resolution, approximate filters)"),
+    response_format: Optional[str] = Query(default=None, description="json (default), or jpeg/webp/png for a multipart/mixed stream"),
+    quality: int = Query(default=DEFAULT_IMAGE_QUALITY, ge=1, le=100, description="Output image quality")
 ):
     """
     Kapanış Seremonisi - Anıları sanat eserine dönüştürerek duygusal iyileşme
     """
+    tier = resolve_tier(tier)
+    ceremony_type = resolve_ceremony_type(ceremony_type)
+    sources = await read_image_sources(images, images_files)
+    response_format = resolve_response_format(request, response_format)
     try:
-        processed_images = []
-        ceremony_messages = []
-        
-        # Seremoni türüne göre mesajlar
-        ceremony_messages_map = {
-            "artistic": [
-                f"{person_name} ile olan anıların artık güzel birer sanat eseri oldu. 🎨",
-                "Acı veren anılar, güzel tablolara dönüştü. İyileşme başladı. ✨",
-                "Geçmiş artık bir müze gibi - güzel ama dokunulmaz. 🏛️"
-            ],
-            "dreamy": [
-                f"{person_name} ile olan anıların rüya gibi, yumuşak bir hale geldi. ☁️",
-                "Keskin kenarlar yumuşadı, acı azaldı. 💫",
-                "Anılar artık bir rüya gibi - uzak ama güzel. 🌙"
-            ],
-            "abstract": [
-                f"{person_name} ile olan bağların artık soyut bir sanat eseri. 🎭",
-                "Gerçeklik dönüştü, yeni bir form aldı. 🌈",
-                "Anılar artık yoruma açık, özgün bir eser. 🎪"
-            ],
-            "healing": [
-                f"{person_name} ile olan anıların iyileştirici bir enerji taşıyor. 💚",
-                "Her fotoğraf bir şifa hikayesi oldu. 🌿",
-                "Kapanış tamamlandı, yeni bir başlangıç. 🌱"
-            ]
-        }
-        
-        for i, image_b64 in enumerate(images):
-            try:
-                # Her fotoğrafa özel sanatsal dönüşüm
-                if ceremony_type == "artistic":
-                    result = await artify_photo(image_b64, art_style)
-                elif ceremony_type == "dreamy":
-                    # Dreamy effect - soft blur + pastel colors
-                    opencv_image = decode_base64_image(image_b64)
-                    dreamy_image = apply_dreamy_effect(opencv_image)
-                    result = {
-                        "success": True,
-                        "processed_image": encode_image_to_base64(dreamy_image)
-                    }
-                elif ceremony_type == "abstract":
-                    # Abstract effect - geometrical transformation
-                    opencv_image = decode_base64_image(image_b64)
-                    abstract_image = apply_abstract_effect(opencv_image)
-                    result = {
-                        "success": True,
-                        "processed_image": encode_image_to_base64(abstract_image)
-                    }
-                elif ceremony_type == "healing":
-                    # Healing effect - warm colors + soft glow
-                    opencv_image = decode_base64_image(image_b64)
-                    healing_image = apply_healing_effect(opencv_image)
-                    result = {
-                        "success": True,
-                        "processed_image": encode_image_to_base64(healing_image)
-                    }
-                
-                if result["success"]:
-                    processed_images.append({
-                        "index": i,
-                        "original_image": image_b64,
-                        "transformed_image": result["processed_image"],
-                        "transformation_type": ceremony_type
-                    })
-                    
-            except Exception as e:
-                print(f"Error processing image {i}: {e}")
-                continue
+        summary = functools.partial(closure_ceremony_summary, person_name, ceremony_type)
         
-        # Rastgele iyileştirici mesaj seç
-        messages = ceremony_messages_map.get(ceremony_type, ceremony_messages_map["artistic"])
-        selected_message = messages[len(processed_images) % len(messages)]
+        items = closure_ceremony_items(sources, ceremony_type, art_style, response_format, quality, tier)
+        if response_format != "json":
+            return multipart_response(items, summary, response_format, image_key="transformed_image")
         
-        return {
-            "success": True,
-            "ceremony_type": ceremony_type,
-            "person_name": person_name,
-            "total_images_processed": len(processed_images),
-            "processed_images": processed_images,
-            "ceremony_message": selected_message,
-            "emotional_guidance": f"Kapanış seremonin tamamlandı. {person_name} ile olan anıların artık güzel birer eser. İyileşme yolculuğun başladı. 💙",
-            "ceremony_completed_at": datetime.now().isoformat()
-        }
+        processed_images = [item async for _, item in items]
+        return {**summary(processed_images), "processed_images": processed_images}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Closure ceremony error: {str(e)}")
 
-def apply_dreamy_effect(image: np.ndarray) -> np.ndarray:
+async def closure_ceremony_items(sources: list, ceremony_type: str, art_style: str, response_format: str, quality: int,
+                                 tier: str = "final"):
+    """Başarıyla dönüşen her görsel için (index, sonuç) üretir"""
+    for i, image_b64 in enumerate(sources):
+        try:
+            yield i, await closure_ceremony_item(i, image_b64, ceremony_type, art_style, response_format, quality, tier=tier)
+        except Exception as e:
+            print(f"Error processing image {i}: {e}")
+            continue
+
+async def closure_ceremony_item(i: int, image_b64: Union[str, bytes], ceremony_type: str, art_style: str,
+                                response_format: str, quality: int, endpoint: str = "closure-ceremony",
+                                tier: str = "final") -> dict:
+    # Her fotoğrafa özel sanatsal dönüşüm
+    result = await cached_run(
+        endpoint, closure_transform_sync, image_b64, ceremony_type, art_style, response_format, quality, tier
+    )
+    
+    item = {
+        "index": i,
+        "transformed_image": result["processed_image"],
+        "transformation_type": ceremony_type,
+        "tier": tier
+    }
+    if response_format == "json":
+        # Binary upload'lar geri gönderilmez, istemcide zaten var
+        item["original_image"] = image_b64 if isinstance(image_b64, str) else None
+    return item
+
+def closure_ceremony_summary(person_name: str, ceremony_type: str, processed_images: list) -> dict:
+    # Seremoni türüne göre mesajlar
+    ceremony_messages_map = {
+        "artistic": [
+            f"{person_name} ile olan anıların artık güzel birer sanat eseri oldu. 🎨",
+            "Acı veren anılar, güzel tablolara dönüştü. İyileşme başladı. ✨",
+            "Geçmiş artık bir müze gibi - güzel ama dokunulmaz. 🏛️"
+        ],
+        "dreamy": [
+            f"{person_name} ile olan anıların rüya gibi, yumuşak bir hale geldi. ☁️",
+            "Keskin kenarlar yumuşadı, acı azaldı. 💫",
+            "Anılar artık bir rüya gibi - uzak ama güzel. 🌙"
+        ],
+        "abstract": [
+            f"{person_name} ile olan bağların artık soyut bir sanat eseri. 🎭",
+            "Gerçeklik dönüştü, yeni bir form aldı. 🌈",
+            "Anılar artık yoruma açık, özgün bir eser. 🎪"
+        ],
+        "healing": [
+            f"{person_name} ile olan anıların iyileştirici bir enerji taşıyor. 💚",
+            "Her fotoğraf bir şifa hikayesi oldu. 🌿",
+            "Kapanış tamamlandı, yeni bir başlangıç. 🌱"
+        ]
+    }
+    
+    # Rastgele iyileştirici mesaj seç
+    messages = ceremony_messages_map.get(ceremony_type, ceremony_messages_map["artistic"])
+    selected_message = messages[len(processed_images) % len(messages)]
+    
+    return {
+        "success": True,
+        "ceremony_type": ceremony_type,
+        "person_name": person_name,
+        "total_images_processed": len(processed_images),
+        "ceremony_message": selected_message,
+        "emotional_guidance": f"Kapanış seremonin tamamlandı. {person_name} ile olan anıların artık güzel birer eser. İyileşme yolculuğun başladı. 💙",
+        "ceremony_completed_at": datetime.now().isoformat()
+    }
+
+def closure_transform_sync(image_b64: Union[str, bytes], ceremony_type: str, art_style: str,
+                           response_format: str = "json", quality: int = DEFAULT_IMAGE_QUALITY, tier: str = "final") -> dict:
+    """Seremoni dönüşümünün CPU tarafı (havuzda çalışır)"""
+    if ceremony_type == "artistic":
+        return artify_photo_sync(image_b64, art_style, response_format, quality, tier)
+    
+    opencv_image, scale = load_tier_image(image_b64, tier)
+    with timed_stage("process"):
+        if ceremony_type == "dreamy":
+            # Dreamy effect - soft blur + pastel colors
+            transformed = apply_dreamy_effect(opencv_image, tier, scale)
+        elif ceremony_type == "abstract":
+            # Abstract effect - geometrical transformation
+            transformed = apply_abstract_effect(opencv_image, tier)
+        elif ceremony_type == "healing":
+            # Healing effect - warm colors + soft glow
+            transformed = apply_healing_effect(opencv_image, tier, scale)
+        else:
+            raise ValueError(f"Unknown ceremony type: {ceremony_type}")
+    
+    return {
+        "success": True,
+        "processed_image": encode_output(transformed, response_format, tier_quality(tier, quality))
+    }
+
+def apply_dreamy_effect(image: np.ndarray, tier: str = "final", scale: float = 1.0) -> np.ndarray:
     """Dreamy/rüya gibi efekt uygula"""
+    if tier == "preview":
+        image, reduced = preview_image(image)
+        scale *= reduced
+    
     # Soft blur
-    dreamy = cv2.GaussianBlur(image, (15, 15), 0)
+    blur = art_kernel(15, scale)
+    dreamy = cv2.GaussianBlur(image, (blur, blur), 0)
     
     # Pastel renk dönüşümü
     dreamy = cv2.addWeighted(image, 0.4, dreamy, 0.6, 0)
     
-    # Brightness ve contrast ayarı
-    dreamy = cv2.convertScaleAbs(dreamy, alpha=1.1, beta=20)
-    
-    # Warm tone ekleme
-    dreamy[:, :, 0] = np.clip(dreamy[:, :, 0] * 0.9, 0, 255)  # Blue azalt
-    dreamy[:, :, 2] = np.clip(dreamy[:, :, 2] * 1.1, 0, 255)  # Red artır
-    
-    return dreamy
+    # Brightness/contrast + warm tone tek LUT geçişinde
+    return color_styles.apply(dreamy, "dreamy", in_place=True)
 
-def apply_abstract_effect(image: np.ndarray) -> np.ndarray:
-    """Abstract/soyut efekt uygula"""
-    # Color quantization
+# Abstract efekt paleti: k-means tüm pikseller yerine rastgele bir alt kümede eğitilir
+PALETTE_COLORS = 8
+PALETTE_SAMPLE_PIXELS = 65536
+PALETTE_ASSIGN_CHUNK = 1 << 20
+PALETTE_ATTEMPTS = 10
+PREVIEW_PALETTE_SAMPLES = 8192
+# Önizlemede k-means daha az rastgele başlangıçla denenir (~5 kat hızlı, palet yaklaşık)
+PREVIEW_PALETTE_ATTEMPTS = 2
+# Process havuzu worker'larında (ResultCache kapalı) tutulan palet sayısı
+WORKER_PALETTE_CACHE_ITEMS = 64
+_worker_palettes: Optional[OrderedDict] = None
+
+def fit_palette(image: np.ndarray, colors: int = PALETTE_COLORS, samples: int = PALETTE_SAMPLE_PIXELS,
+                attempts: int = PALETTE_ATTEMPTS) -> np.ndarray:
+    """
+    Görselin renk paletini (colors x 3, float32) döndürür; sonuç görsel hash'iyle
+    ResultCache'te, process havuzu worker'larında süreç-yerel LRU'da önbelleklenir
+    """
+    key = None
+    if CACHE_ENABLED or _worker_palettes is not None:
+        key = result_cache.make_key(np.ascontiguousarray(image).data, "fit_palette",
+                                    {"shape": image.shape, "colors": colors, "samples": samples, "attempts": attempts})
+        if CACHE_ENABLED:
+            cached = result_cache.get(key)
+        else:
+            cached = _worker_palettes.get(key)
+            if cached is not None:
+                _worker_palettes.move_to_end(key)
+        if cached is not None:
+            return cached
+    
     data = image.reshape((-1, 3))
+    if len(data) > samples:
+        # Sabit seed: aynı görsel her zaman aynı alt kümeyi kullanır
+        data = data[np.random.default_rng(0).integers(0, len(data), samples)]
     data = np.float32(data)
     
     criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 4, 1.0)
-    _, labels, centers = cv2.kmeans(data, 8, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
+    _, _, centers = cv2.kmeans(data, colors, None, criteria, attempts, cv2.KMEANS_RANDOM_CENTERS)
+    
+    if key is not None:
+        if CACHE_ENABLED:
+            result_cache.put(key, centers)
+        else:
+            _worker_palettes[key] = centers
+            if len(_worker_palettes) > WORKER_PALETTE_CACHE_ITEMS:
+                _worker_palettes.popitem(last=False)
+    return centers
+
+def quantize_to_palette(image: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    """
+    Her pikseli en yakın palet rengine atar. ||x - c||² = ||x||² - 2x·c + ||c||²
+    olduğundan karşılaştırma için -2x·c + ||c||² yeterli. Mesafeler parça parça
+    (renk x piksel) matris çarpımıyla hesaplanır, en küçüğü satır satır taranır.
+    """
+    centers = centers.astype(np.float32)
+    pixels = image.reshape((-1, 3))
+    labels = np.empty(len(pixels), dtype=np.uint8)
+    cross = -2 * centers
+    norms = np.sum(centers ** 2, axis=1)[:, None]
+    for start in range(0, len(pixels), PALETTE_ASSIGN_CHUNK):
+        distances = cross @ np.float32(pixels[start:start + PALETTE_ASSIGN_CHUNK]).T
+        distances += norms
+        best = distances[0].copy()
+        chunk_labels = labels[start:start + PALETTE_ASSIGN_CHUNK]
+        chunk_labels[:] = 0
+        for index in range(1, len(centers)):
+            closer = distances[index] < best
+            np.minimum(best, distances[index], out=best)
+            np.copyto(chunk_labels, index, where=closer)
+    return np.take(np.uint8(centers), labels, axis=0).reshape(image.shape)
+
+def apply_abstract_effect(image: np.ndarray, tier: str = "final") -> np.ndarray:
+    """Abstract/soyut efekt uygula"""
+    samples, attempts = PALETTE_SAMPLE_PIXELS, PALETTE_ATTEMPTS
+    if tier == "preview":
+        image, _ = preview_image(image)
+        samples, attempts = PREVIEW_PALETTE_SAMPLES, PREVIEW_PALETTE_ATTEMPTS
     
-    centers = np.uint8(centers)
-    abstract = centers[labels.flatten()]
-    abstract = abstract.reshape(image.shape)
+    # Color quantization
+    abstract = quantize_to_palette(image, fit_palette(image, samples=samples, attempts=attempts))
     
     # Edge detection overlay
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
@@ -941,23 +3693,735 @@ def apply_abstract_effect(image: np.ndarray) -> np.ndarray:
     
     return abstract
 
-def apply_healing_effect(image: np.ndarray) -> np.ndarray:
+def apply_healing_effect(image: np.ndarray, tier: str = "final", scale: float = 1.0) -> np.ndarray:
     """Healing/iyileştirici efekt uygula"""
-    # Warm color tone
-    healing = image.copy()
+    if tier == "preview":
+        image, reduced = preview_image(image)
+        scale *= reduced
     
     # Soft glow effect
-    glow = cv2.GaussianBlur(healing, (35, 35), 0)
-    healing = cv2.addWeighted(healing, 0.7, glow, 0.3, 0)
+    blur = art_kernel(35, scale)
+    glow = cv2.GaussianBlur(image, (blur, blur), 0)
+    healing = cv2.addWeighted(image, 0.7, glow, 0.3, 0)
+    
+    # Green-blue healing tones + contrast yumuşatma tek LUT geçişinde
+    return color_styles.apply(healing, "healing", in_place=True)
+
+# İşlem hattı: tek decode, sıralı adımlar, tek encode
+PIPELINE_MAX_STEPS = 20
+PIPELINE_EFFECTS = {
+    "dreamy": apply_dreamy_effect,
+    "abstract": apply_abstract_effect,
+    "healing": apply_healing_effect,
+}
+
+class PipelineInputError(ValueError):
+    """Adım parametresi görselin içeriğiyle uyuşmuyor (örn. olmayan yüz indeksi); 400 döner"""
+
+def pipeline_targets(params: dict, context: dict) -> List[dict]:
+    """
+    Adımın uygulanacağı yüz koordinatları: açıkça verilen face_coordinates
+    (tek nesne veya liste), yoksa önceki detect adımının yüzleri (face_indices ile süzülebilir)
+    """
+    if "face_coordinates" in params:
+        coordinates = params["face_coordinates"]
+        return coordinates if isinstance(coordinates, list) else [coordinates]
+    
+    faces = context.get("faces")
+    if faces is None:
+        raise ValueError("Step needs face_coordinates or a preceding detect step")
+    indices = params.get("face_indices")
+    if indices is None:
+        return [face["coordinates"] for face in faces]
+    # Tip parse_pipeline_steps'te doğrulandı; aralık ancak tespitten sonra bilinir
+    invalid = [i for i in indices if i >= len(faces)]
+    if invalid:
+        raise PipelineInputError(f"face_indices {invalid} out of range; detect found {len(faces)} face(s)")
+    return [faces[i]["coordinates"] for i in indices]
+
+def pipeline_detect(image: np.ndarray, params: dict, context: dict):
+    faces = find_faces(image, params.get("detection_max_side"), context["orientation"])
+    context["faces"] = faces
+    return image, {"face_count": len(faces), "faces": faces}
+
+def pipeline_blur(image: np.ndarray, params: dict, context: dict):
+    blur_intensity = params.get("blur_intensity", 15)
+    # /blur-face ile aynı doğrulama
+    if blur_intensity < 5 or blur_intensity > 50:
+        blur_intensity = 15
+    # GaussianBlur tek sayı çekirdek ister (anonymize gibi)
+    blur_intensity |= 1
+    targets = pipeline_targets(params, context)
+    for coords in targets:
+        blur_region(image, coords, blur_intensity)
+    return image, {"faces_processed": len(targets), "blur_intensity": blur_intensity}
+
+def pipeline_avatar(image: np.ndarray, params: dict, context: dict):
+    avatar_style = params.get("avatar_style", "cartoon")
+    targets = pipeline_targets(params, context)
+    for coords in targets:
+        paste_avatar(image, coords, avatar_style)
+    return image, {"faces_processed": len(targets), "avatar_style": avatar_style}
+
+def pipeline_artify(image: np.ndarray, params: dict, context: dict):
+    art_style = params.get("art_style", "van_gogh")
+    return apply_art_style(image, art_style), {"art_style": art_style}
+
+def pipeline_inpaint(image: np.ndarray, params: dict, context: dict):
+    preset = params.get("inpaint_preset", DEFAULT_INPAINT_PRESET)
+    targets = pipeline_targets(params, context)
+    for coords in targets:
+        image = apply_advanced_inpainting(image, coords, in_place=True, preset=preset)
+    return image, {"faces_processed": len(targets), "inpaint_preset": preset}
+
+def pipeline_effect(image: np.ndarray, params: dict, context: dict):
+    effect = params.get("effect", "dreamy")
+    return PIPELINE_EFFECTS[effect](image), {"effect": effect}
+
+PIPELINE_OPERATIONS = {
+    "detect": pipeline_detect,
+    "blur": pipeline_blur,
+    "avatar": pipeline_avatar,
+    "artify": pipeline_artify,
+    "inpaint": pipeline_inpaint,
+    "effect": pipeline_effect,
+}
+
+def parse_pipeline_steps(steps: str) -> List[dict]:
+    """steps JSON'unu doğrular; hatalar 400 olarak döner"""
+    try:
+        parsed = json.loads(steps)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON in steps: {str(e)}")
+    if not isinstance(parsed, list) or not parsed:
+        raise HTTPException(status_code=400, detail="steps must be a non-empty JSON list")
+    if len(parsed) > PIPELINE_MAX_STEPS:
+        raise HTTPException(status_code=400, detail=f"At most {PIPELINE_MAX_STEPS} steps are allowed")
+    
+    detected = False
+    for index, step in enumerate(parsed):
+        if not isinstance(step, dict) or step.get("op") not in PIPELINE_OPERATIONS:
+            raise HTTPException(status_code=400, detail=f"Step {index}: op must be one of {', '.join(PIPELINE_OPERATIONS)}")
+        detected = detected or step["op"] == "detect"
+        if step["op"] in ("blur", "avatar", "inpaint") and "face_coordinates" not in step and not detected:
+            raise HTTPException(status_code=400, detail=f"Step {index}: {step['op']} needs face_coordinates or a preceding detect step")
+        intensity = step.get("blur_intensity")
+        if intensity is not None and (not isinstance(intensity, int) or isinstance(intensity, bool)):
+            raise HTTPException(status_code=400, detail=f"Step {index}: blur_intensity must be an integer")
+        indices = step.get("face_indices")
+        if indices is not None and (not isinstance(indices, list) or
+                                    not all(isinstance(i, int) and not isinstance(i, bool) and i >= 0 for i in indices)):
+            raise HTTPException(status_code=400, detail=f"Step {index}: face_indices must be a list of non-negative integers")
+        if step["op"] == "effect" and step.get("effect", "dreamy") not in PIPELINE_EFFECTS:
+            raise HTTPException(status_code=400, detail=f"Step {index}: effect must be one of {', '.join(PIPELINE_EFFECTS)}")
+        if step["op"] == "inpaint" and step.get("inpaint_preset", DEFAULT_INPAINT_PRESET) not in INPAINT_PRESETS:
+            raise HTTPException(status_code=400, detail=f"Step {index}: inpaint_preset must be one of {', '.join(INPAINT_PRESETS)}")
+    return parsed
+
+@app.post("/pipeline")
+async def run_pipeline(
+    request: Request,
+    image: Optional[str] = Form(default=None, description="Base64 encoded image"),
+    image_file: Optional[UploadFile] = File(default=None, description="Raw image file (binary upload)"),
+    steps: str = Form(..., description='JSON list of steps, e.g. [{"op": "detect"}, {"op": "blur"}, {"op": "artify", "art_style": "monet"}]'),
+    response_format: Optional[str] = Query(default=None, description="json (default), jpeg, webp, png"),
+    quality: int = Query(default=DEFAULT_IMAGE_QUALITY, ge=1, le=100, description="Output image quality")
+):
+    """
+    Adımları (detect, blur, avatar, artify, inpaint, effect) tek bir görsel üzerinde
+    sırayla çalıştırır: bir kez decode, bir kez encode. detect adımının yüzleri
+    sonraki blur/avatar/inpaint adımlarına otomatik aktarılır.
+    """
+    source = await read_image_source(image, image_file)
+    response_format = resolve_response_format(request, response_format)
+    parsed_steps = parse_pipeline_steps(steps)
+    try:
+        result = await cached_run("pipeline", run_pipeline_sync, source, parsed_steps, response_format, quality)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Pipeline error: {str(e)}")
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return image_response(result, response_format)
+
+def run_pipeline_sync(image: Union[str, bytes], steps: List[dict],
+                      response_format: str = "json", quality: int = DEFAULT_IMAGE_QUALITY) -> dict:
+    """İşlem hattının CPU tarafı (havuzda çalışır)"""
+    opencv_image, orientation = load_oriented_image(image)
+    # Adımlar geometriyi değiştirmez; tespit her adımda aynı EXIF yönüyle yapılır
+    context = {"orientation": orientation}
+    step_results = []
+    
+    for index, step in enumerate(steps):
+        operation = step["op"]
+        start = time.perf_counter()
+        try:
+            if operation == "detect":
+                # detect_objects kendi "detect" aşamasını ölçer
+                opencv_image, info = PIPELINE_OPERATIONS[operation](opencv_image, step, context)
+            else:
+                with timed_stage("process"):
+                    opencv_image, info = PIPELINE_OPERATIONS[operation](opencv_image, step, context)
+        except PipelineInputError as e:
+            # Worker'dan HTTPException taşınamaz; endpoint bu sonucu 400'e çevirir
+            return {"success": False, "error": f"Step {index} ({operation}): {str(e)}"}
+        except Exception as e:
+            raise ValueError(f"Step {index} ({operation}) failed: {str(e)}")
+        step_results.append({
+            "index": index,
+            "op": operation,
+            **info,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)
+        })
     
-    # Green-blue healing tones
-    healing[:, :, 1] = np.clip(healing[:, :, 1] * 1.15, 0, 255)  # Green artır
-    healing[:, :, 0] = np.clip(healing[:, :, 0] * 1.05, 0, 255)  # Blue biraz artır
+    return {
+        "success": True,
+        "processed_image": encode_output(opencv_image, response_format, quality),
+        "steps": step_results,
+        "processing_info": {
+            "steps_count": len(steps),
+            "image_dimensions": {
+                "width": opencv_image.shape[1],
+                "height": opencv_image.shape[0]
+            },
+            "processed_at": datetime.now().isoformat()
+        }
+    }
+
+# Tüm yüzleri tek geçişte anonimleştirme
+ANONYMIZE_METHODS = ("blur", "box_blur", "pixelate", "avatar")
+
+def pixelate_region(image: np.ndarray, coords: dict, block_size: int) -> np.ndarray:
+    """
+    Bölgeyi block_size piksellik karelere böler. INTER_AREA ile küçültüp
+    INTER_NEAREST ile büyütür; piksel başı maliyet blok boyutundan bağımsızdır.
+    """
+    top, right, bottom, left = coords["top"], coords["right"], coords["bottom"], coords["left"]
+    region = image[top:bottom, left:right]
+    height, width = region.shape[:2]
+    if height == 0 or width == 0:
+        return image
+    small = cv2.resize(region, (max(1, width // block_size), max(1, height // block_size)), interpolation=cv2.INTER_AREA)
+    image[top:bottom, left:right] = cv2.resize(small, (width, height), interpolation=cv2.INTER_NEAREST)
+    return image
+
+def box_blur_region(image: np.ndarray, coords: dict, kernel_size: int) -> np.ndarray:
+    """Kutu filtresi (kayan toplam) ile bulanıklaştırır; maliyet çekirdek boyutundan bağımsızdır"""
+    top, right, bottom, left = coords["top"], coords["right"], coords["bottom"], coords["left"]
+    region = image[top:bottom, left:right]
+    if region.size:
+        image[top:bottom, left:right] = cv2.blur(region, (kernel_size, kernel_size))
+    return image
+
+def expand_box(coords: dict, padding: float, shape: tuple) -> dict:
+    """Kutuyu her yönde boyutunun padding katı kadar büyütüp görsele kırpar"""
+    h, w = shape[:2]
+    pad_y = int(round((coords["bottom"] - coords["top"]) * padding))
+    pad_x = int(round((coords["right"] - coords["left"]) * padding))
+    return {
+        "top": max(0, coords["top"] - pad_y),
+        "right": min(w, coords["right"] + pad_x),
+        "bottom": min(h, coords["bottom"] + pad_y),
+        "left": max(0, coords["left"] - pad_x)
+    }
+
+def anonymize_region(image: np.ndarray, coords: dict, method: str, intensity: int, avatar_style: str = "cartoon") -> np.ndarray:
+    if method == "blur":
+        # GaussianBlur tek sayı çekirdek ister
+        return blur_region(image, coords, intensity | 1)
+    if method == "box_blur":
+        return box_blur_region(image, coords, intensity)
+    if method == "pixelate":
+        return pixelate_region(image, coords, intensity)
+    if method == "avatar":
+        return paste_avatar(image, coords, avatar_style)
+    raise ValueError(f"Unknown anonymize method: {method}")
+
+@app.post("/anonymize")
+async def anonymize_faces(
+    request: Request,
+    image: Optional[str] = Form(default=None, description="Base64 encoded image"),
+    image_file: Optional[UploadFile] = File(default=None, description="Raw image file (binary upload)"),
+    method: str = Form(default="pixelate", description="blur, box_blur, pixelate, avatar"),
+    intensity: int = Form(default=15, ge=1, le=255, description="Kernel size (blur, box_blur) or block size in pixels (pixelate)"),
+    avatar_style: str = Form(default="cartoon", description="Avatar style when method=avatar"),
+    padding: float = Form(default=0.0, ge=0.0, le=1.0, description="Grow each face box by this fraction of its size"),
+    detection_max_side: Optional[int] = Form(default=None, description="Run detection with the longest side capped at this many pixels (0 = full resolution)"),
+    response_format: Optional[str] = Query(default=None, description="json (default), jpeg, webp, png"),
+    quality: int = Query(default=DEFAULT_IMAGE_QUALITY, ge=1, le=100, description="Output image quality")
+):
+    """
+    Görseldeki tüm yüzleri bulur ve tek istekte bulanıklaştırır / pikselleştirir /
+    avatarla değiştirir (tek decode, tek encode)
+    """
+    source = await read_image_source(image, image_file)
+    response_format = resolve_response_format(request, response_format)
+    if method not in ANONYMIZE_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown method: {method}. Use one of {', '.join(ANONYMIZE_METHODS)}")
+    try:
+        result = await cached_run(
+            "anonymize", anonymize_faces_sync,
+            source, method, intensity, avatar_style, padding, detection_max_side, response_format, quality
+        )
+        return image_response(result, response_format)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Anonymize error: {str(e)}")
+
+def anonymize_faces_sync(image: Union[str, bytes], method: str, intensity: int, avatar_style: str = "cartoon",
+                         padding: float = 0.0, max_side: Optional[int] = None,
+                         response_format: str = "json", quality: int = DEFAULT_IMAGE_QUALITY) -> dict:
+    """Anonimleştirmenin CPU tarafı (havuzda çalışır)"""
+    opencv_image, orientation = load_oriented_image(image)
+    faces = find_faces(opencv_image, max_side, orientation)
+    
+    with timed_stage("process"):
+        for face in faces:
+            face["coordinates"] = expand_box(face["coordinates"], padding, opencv_image.shape)
+            anonymize_region(opencv_image, face["coordinates"], method, intensity, avatar_style)
+    
+    return {
+        "success": True,
+        "processed_image": encode_output(opencv_image, response_format, quality),
+        "face_count": len(faces),
+        "faces": faces,
+        "processing_info": {
+            "method": method,
+            "intensity": intensity,
+            "padding": padding,
+            "processed_at": datetime.now().isoformat()
+        }
+    }
+
+# Asenkron iş kuyruğu (toplu endpoint'ler için)
+JOBS_DIR = os.path.join(TEMP_DIR, "jobs")
+JOB_WORKERS = int(os.getenv("FACEFADE_JOB_WORKERS", str(EXECUTOR_WORKERS)))
+JOB_OPERATIONS = ("batch-process", "process-matched-photos", "closure-ceremony")
+JOB_TERMINAL_STATUSES = ("completed", "cancelled", "failed")
+# Biten işlerin sonuçları bu kadar saat saklanır (0 = süresiz); girdiler iş biter bitmez silinir
+JOB_RETENTION_HOURS = float(os.getenv("FACEFADE_JOB_RETENTION_HOURS", "24"))
+
+class JobManager:
+    """
+    Toplu işleri arka planda, öğe bazında paralel işler.
+    Girdiler, iş durumu ve her öğenin sonucu TEMP_DIR/jobs/<job_id> altında
+    saklanır; yarıda kalan işler uygulama yeniden başlayınca kaldığı yerden devam eder.
+    İş bitince girdileri silinir, sonuçlar JOB_RETENTION_HOURS sonra temizlenir.
+    """
+
+    def __init__(self, directory: str, workers: int):
+        self.directory = directory
+        self.workers = max(1, workers)
+        os.makedirs(self.directory, exist_ok=True)
+        self._jobs = {}
+        self._tasks = {}
+        self._events = {}
+        self._save_locks = {}
+        self._semaphore = None
+
+    # --- Dosya düzeni ---
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.directory, job_id)
+
+    def _input_path(self, job_id: str, index: int) -> str:
+        return os.path.join(self._job_dir(job_id), "inputs", f"{index}.bin")
+
+    def _result_path(self, job_id: str, index: int) -> str:
+        return os.path.join(self._job_dir(job_id), "results", f"{index}.json")
+
+    async def _save(self, job: dict):
+        """
+        Durumu event loop'ta anlık görüntü olarak alır, job.json'u thread'de yazar.
+        Aynı işin yazımları sırayla yapılır; eski görüntü yenisinin üstüne yazılmaz.
+        """
+        job["updated_at"] = datetime.now().isoformat()
+        job["version"] += 1
+        snapshot = json.dumps(job, ensure_ascii=False)
+        # Akış dinleyicilerini uyandır
+        event = self._events.pop(job["job_id"], None)
+        if event is not None:
+            event.set()
+        if job["job_id"] not in self._jobs:
+            # İş silindi; iptal edilen öğelerin son kayıtları dizini yeniden oluşturmasın
+            return
+        lock = self._save_locks.setdefault(job["job_id"], asyncio.Lock())
+        async with lock:
+            await asyncio.to_thread(self._write_job, self._job_dir(job["job_id"]), snapshot)
+
+    @staticmethod
+    def _write_job(job_dir: str, snapshot: str):
+        path = os.path.join(job_dir, "job.json")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(snapshot)
+        os.replace(tmp_path, path)
+
+    async def _finish(self, job: dict):
+        """Terminal duruma geçen işin girdilerini siler; sonuçlar saklama süresince kalır"""
+        job["finished_at"] = datetime.now().isoformat()
+        await self._save(job)
+        await asyncio.to_thread(shutil.rmtree, os.path.join(self._job_dir(job["job_id"]), "inputs"), True)
+
+    @staticmethod
+    def _write_inputs(job_dir: str, sources: list):
+        """Base64 çözme ve yazma thread'de yapılır; büyük toplu işler event loop'u bekletmez"""
+        os.makedirs(os.path.join(job_dir, "inputs"), exist_ok=True)
+        os.makedirs(os.path.join(job_dir, "results"), exist_ok=True)
+        try:
+            for index, source in enumerate(sources):
+                with open(os.path.join(job_dir, "inputs", f"{index}.bin"), "wb") as f:
+                    f.write(source_bytes(source))
+        except Exception:
+            # Geçersiz base64: yarım yazılmış iş dizini kalmasın
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+
+    # --- İş yaşam döngüsü ---
+    async def submit(self, operation: str, sources: list, params: dict) -> dict:
+        if operation not in JOB_OPERATIONS:
+            raise ValueError(f"Unknown job operation: {operation}")
+        job_id = uuid.uuid4().hex
+        await asyncio.to_thread(self._write_inputs, self._job_dir(job_id), sources)
+        
+        now = datetime.now().isoformat()
+        job = {
+            "job_id": job_id,
+            "operation": operation,
+            "params": params,
+            "status": "queued",
+            "total_items": len(sources),
+            "items": ["pending"] * len(sources),
+            "errors": {},
+            "created_at": now,
+            "updated_at": now,
+            "finished_at": None,
+            "version": 0
+        }
+        self._jobs[job_id] = job
+        await self._save(job)
+        self._start(job_id)
+        await self.sweep()
+        return job
+
+    def _start(self, job_id: str):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        task = asyncio.create_task(self._run(job_id))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    def _load_jobs(self) -> List[dict]:
+        jobs = []
+        for job_id in os.listdir(self.directory):
+            path = os.path.join(self._job_dir(job_id), "job.json")
+            if not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                jobs.append(json.load(f))
+        return jobs
+
+    async def resume_all(self):
+        """Yeniden başlatmada yarım kalan işleri yükleyip devam ettirir, süresi dolanları siler"""
+        for job in await asyncio.to_thread(self._load_jobs):
+            job_id = job["job_id"]
+            self._jobs[job_id] = job
+            if job["status"] not in JOB_TERMINAL_STATUSES:
+                # Yarıda kesilen öğeler baştan işlenir
+                job["items"] = ["pending" if status == "running" else status for status in job["items"]]
+                job["status"] = "queued"
+                await self._save(job)
+                self._start(job_id)
+            else:
+                # Önceki sürümlerden kalan girdiler
+                await asyncio.to_thread(shutil.rmtree, os.path.join(self._job_dir(job_id), "inputs"), True)
+        await self.sweep()
+
+    async def sweep(self):
+        """Saklama süresi dolan biten işleri dosyalarıyla birlikte siler"""
+        if JOB_RETENTION_HOURS <= 0:
+            return
+        cutoff = datetime.now().timestamp() - JOB_RETENTION_HOURS * 3600
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["status"] in JOB_TERMINAL_STATUSES and job["finished_at"]
+            and datetime.fromisoformat(job["finished_at"]).timestamp() < cutoff
+        ]
+        for job_id in expired:
+            await self.delete(job_id)
+
+    async def _run(self, job_id: str):
+        job = self._jobs[job_id]
+        job["status"] = "running"
+        await self._save(job)
+        pending = [index for index, status in enumerate(job["items"]) if status == "pending"]
+        await asyncio.gather(*(self._run_item(job, index) for index in pending))
+        
+        if job["status"] == "running":
+            job["status"] = "completed"
+            await self._finish(job)
+
+    async def _run_item(self, job: dict, index: int):
+        async with self._semaphore:
+            if job["status"] != "running":
+                return
+            job["items"][index] = "running"
+            await self._save(job)
+            try:
+                data = await asyncio.to_thread(self._read_file, self._input_path(job["job_id"], index))
+                result = await self._process_item(job, index, data)
+                await asyncio.to_thread(self._write_json, self._result_path(job["job_id"], index), result)
+                job["items"][index] = "completed" if result.get("success", True) else "failed"
+                if "error" in result:
+                    job["errors"][str(index)] = result["error"]
+            except asyncio.CancelledError:
+                job["items"][index] = "cancelled"
+                raise
+            except Exception as e:
+                job["items"][index] = "failed"
+                job["errors"][str(index)] = str(e)
+            finally:
+                await self._save(job)
+
+    async def _process_item(self, job: dict, index: int, data: bytes) -> dict:
+        """Öğeyi senkron endpoint'lerin kullandığı aynı fonksiyonlarla işler"""
+        params = job["params"]
+        quality = params.get("quality", DEFAULT_IMAGE_QUALITY)
+        if job["operation"] == "batch-process":
+            result = await batch_process_item(data, params["operation"], params.get("parameters", {}), "json", quality, endpoint="jobs")
+            return {"image_index": index, "result": result}
+        if job["operation"] == "process-matched-photos":
+            return await process_matched_item(
+                index, data, params["face_coordinates_list"][index], params["processing_type"],
+                params.get("processing_params", {}), "json", quality, endpoint="jobs"
+            )
+        # tier'sız kaydedilmiş eski işler final olarak devam eder
+        return await closure_ceremony_item(index, data, params["ceremony_type"], params["art_style"], "json", quality,
+                                           endpoint="jobs", tier=params.get("tier", "final"))
+
+    @staticmethod
+    def _read_file(path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    @staticmethod
+    def _write_json(path: str, data: dict):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    async def cancel(self, job_id: str) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if job["status"] not in JOB_TERMINAL_STATUSES:
+            job["status"] = "cancelled"
+            job["items"] = ["cancelled" if status == "pending" else status for status in job["items"]]
+            task = self._tasks.get(job_id)
+            if task is not None:
+                task.cancel()
+            await self._finish(job)
+        return job
+
+    async def delete(self, job_id: str) -> bool:
+        if await self.cancel(job_id) is None:
+            return False
+        self._jobs.pop(job_id, None)
+        lock = self._save_locks.pop(job_id, asyncio.Lock())
+        # Süren bir job.json yazımı bitsin, silinen dizine yazmasın
+        async with lock:
+            await asyncio.to_thread(shutil.rmtree, self._job_dir(job_id), True)
+        return True
+
+    # --- Sorgular ---
+    def get(self, job_id: str) -> Optional[dict]:
+        return self._jobs.get(job_id)
+
+    def describe(self, job: dict) -> dict:
+        counts = {status: 0 for status in ("pending", "running", "completed", "failed", "cancelled")}
+        for status in job["items"]:
+            counts[status] += 1
+        return {
+            "job_id": job["job_id"],
+            "operation": job["operation"],
+            "status": job["status"],
+            "total_items": job["total_items"],
+            "progress": round((counts["completed"] + counts["failed"]) / job["total_items"], 4) if job["total_items"] else 1.0,
+            "item_counts": counts,
+            "errors": job["errors"],
+            "created_at": job["created_at"],
+            "updated_at": job["updated_at"],
+            "finished_at": job["finished_at"]
+        }
+
+    def list(self) -> List[dict]:
+        return [self.describe(job) for job in sorted(self._jobs.values(), key=lambda job: job["created_at"])]
+
+    def results(self, job: dict) -> List[dict]:
+        """Şu ana kadar tamamlanan öğelerin sonuçları (kısmi sonuçlar dahil)"""
+        results = []
+        for index, status in enumerate(job["items"]):
+            path = self._result_path(job["job_id"], index)
+            if status in ("completed", "failed") and os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    results.append(json.load(f))
+        return results
+
+    def summary(self, job: dict, results: List[dict]) -> dict:
+        """Senkron endpoint'in döndürdüğü özetin aynısı"""
+        params = job["params"]
+        if job["operation"] == "batch-process":
+            return {"success": True, "processed_count": len(results)}
+        if job["operation"] == "process-matched-photos":
+            return process_matched_summary(params["processing_type"], job["total_items"], results)
+        return closure_ceremony_summary(params["person_name"], params["ceremony_type"], [r for r in results if "transformed_image" in r])
+
+    async def wait_for_change(self, job_id: str, version: int, timeout: float = 15.0):
+        job = self._jobs.get(job_id)
+        if job is None or job["version"] != version:
+            return
+        event = self._events.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+job_manager = JobManager(JOBS_DIR, JOB_WORKERS)
+
+@app.on_event("startup")
+async def resume_jobs():
+    await job_manager.resume_all()
+
+def get_job_or_404(job_id: str) -> dict:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job_id: {job_id}")
+    return job
+
+def parse_json_param(value: str, name: str):
+    try:
+        return json.loads(value)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON in {name}: {str(e)}")
+
+@app.post("/jobs/batch-process")
+async def submit_batch_process_job(
+    images: List[str] = Form(default=[], description="List of base64 encoded images"),
+    images_files: List[UploadFile] = File(default=[], description="Raw image files (binary upload)"),
+    operation: str = Form(..., description="Operation: detect, artify"),
+    parameters: str = Form(default="{}", description="JSON parameters for operation"),
+    quality: int = Form(default=DEFAULT_IMAGE_QUALITY, ge=1, le=100, description="Output image quality")
+):
+    """/batch-process'i arka plan işi olarak başlatır, hemen job_id döndürür"""
+    sources = await read_image_sources(images, images_files)
+    parameters = validate_batch_operation(operation, parse_json_param(parameters, "parameters"))
+    params = {"operation": operation, "parameters": parameters, "quality": quality}
+    job = await job_manager.submit("batch-process", sources, params)
+    return {"success": True, **job_manager.describe(job)}
+
+@app.post("/jobs/process-matched-photos")
+async def submit_process_matched_job(
+    images_with_matches: List[str] = Form(default=[], description="List of base64 images that contain matches"),
+    images_with_matches_files: List[UploadFile] = File(default=[], description="Raw image files that contain matches (binary upload)"),
+    face_coordinates_list: List[str] = Form(..., description="List of JSON face coordinates for each image"),
+    processing_type: str = Form(..., description="Processing type: blur, avatar, artistic"),
+    processing_params: str = Form(default="{}", description="Additional processing parameters"),
+    quality: int = Form(default=DEFAULT_IMAGE_QUALITY, ge=1, le=100, description="Output image quality")
+):
+    """/process-matched-photos'u arka plan işi olarak başlatır"""
+    sources = await read_image_sources(images_with_matches, images_with_matches_files, "images_with_matches")
+    # Koordinatı olmayan görseller senkron endpoint'teki zip gibi atlanır
+    sources = sources[:len(face_coordinates_list)]
+    params = {
+        "face_coordinates_list": face_coordinates_list[:len(sources)],
+        "processing_type": processing_type,
+        "processing_params": validate_processing_type(processing_type, parse_json_param(processing_params, "processing_params")),
+        "quality": quality
+    }
+    job = await job_manager.submit("process-matched-photos", sources, params)
+    return {"success": True, **job_manager.describe(job)}
+
+@app.post("/jobs/closure-ceremony")
+async def submit_closure_ceremony_job(
+    images: List[str] = Form(default=[], description="List of base64 images containing the person"),
+    images_files: List[UploadFile] = File(default=[], description="Raw image files containing the person (binary upload)"),
+    person_name: str = Form(..., description="Name of the person for emotional context"),
+    art_style: str = Form(default="van_gogh", description="Art style for transformation"),
+    ceremony_type: str = Form(default="artistic", description="Type: artistic, dreamy, abstract, healing"),
+    tier: str = Form(default="final", description="final (full resolution) or preview (reduced resolution, approximate filters)"),
+    quality: int = Form(default=DEFAULT_IMAGE_QUALITY, ge=1, le=100, description="Output image quality")
+):
+    """/closure-ceremony'yi arka plan işi olarak başlatır"""
+    tier = resolve_tier(tier)
+    resolve_ceremony_type(ceremony_type)
+    sources = await read_image_sources(images, images_files)
+    params = {"person_name": person_name, "art_style": art_style, "ceremony_type": ceremony_type, "tier": tier, "quality": quality}
+    job = await job_manager.submit("closure-ceremony", sources, params)
+    return {"success": True, **job_manager.describe(job)}
+
+@app.get("/jobs")
+async def list_jobs():
+    jobs = job_manager.list()
+    return {"success": True, "count": len(jobs), "jobs": jobs}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """İşin durumu ve ilerlemesi (polling için)"""
+    return {"success": True, **job_manager.describe(get_job_or_404(job_id))}
+
+@app.get("/jobs/{job_id}/results")
+async def get_job_results(job_id: str):
+    """Tamamlanan öğelerin sonuçları; iş sürerken kısmi sonuç döner"""
+    job = get_job_or_404(job_id)
+    results = await asyncio.to_thread(job_manager.results, job)
+    return {
+        **job_manager.summary(job, results),
+        "job": job_manager.describe(job),
+        "results": results
+    }
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    request: Request,
+    job_id: str,
+    stream_format: Optional[str] = Query(default=None, description="ndjson (default) or sse")
+):
+    """İlerlemeyi NDJSON/SSE olarak akıtır; iş bitince 'done' kaydıyla kapanır"""
+    get_job_or_404(job_id)
+    if stream_format is None:
+        stream_format = "sse" if "text/event-stream" in request.headers.get("accept", "") else "ndjson"
+    if stream_format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown stream_format: {stream_format}. Use ndjson or sse")
     
-    # Contrast yumuşat
-    healing = cv2.convertScaleAbs(healing, alpha=0.9, beta=15)
+    async def body():
+        version = None
+        while True:
+            job = job_manager.get(job_id)
+            if job is None:
+                break
+            if job["version"] != version:
+                version = job["version"]
+                state = job_manager.describe(job)
+                if job["status"] in JOB_TERMINAL_STATUSES:
+                    yield stream_record("done", state, stream_format)
+                    break
+                yield stream_record("progress", state, stream_format)
+            await job_manager.wait_for_change(job_id, version)
     
-    return healing
+    return StreamingResponse(
+        body(),
+        media_type=STREAM_MEDIA_TYPES[stream_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Bekleyen öğeleri iptal eder; tamamlanmış sonuçlar korunur"""
+    get_job_or_404(job_id)
+    return {"success": True, **job_manager.describe(await job_manager.cancel(job_id))}
+
+@app.delete("/jobs/{job_id}")
+async def delete_job(job_id: str):
+    """İşi iptal eder ve tüm dosyalarını siler"""
+    get_job_or_404(job_id)
+    await job_manager.delete(job_id)
+    return {"success": True, "job_id": job_id, "deleted": True}
 
 if __name__ == "__main__":
     uvicorn.run(
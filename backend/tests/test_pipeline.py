@@ -0,0 +1,78 @@
+"""
+/pipeline uç testleri.
+
+Çalıştırma (backend klasöründen):
+    python -m pytest -q tests
+"""
+import base64
+import io
+import json
+import os
+import sys
+
+import cv2
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.synthetic import synthetic_photo
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    # main, temp_files'ı çalışma dizinine açar; testler repo'yu kirletmesin
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("facefade"))
+    try:
+        import main
+        main.CACHE_ENABLED = False
+        with TestClient(main.app) as test_client:
+            yield test_client
+    finally:
+        os.chdir(cwd)
+
+@pytest.fixture(scope="module")
+def photo():
+    image, _ = synthetic_photo(960, 540, face_radii=(90, 80))
+    return base64.b64encode(cv2.imencode(".jpg", image)[1].tobytes()).decode()
+
+def run_steps(client, photo, steps):
+    return client.post("/pipeline", data={"image": photo, "steps": json.dumps(steps)})
+
+@pytest.mark.parametrize("intensity", [16, 20, 50])
+def test_blur_even_intensity_uses_odd_kernel(client, photo, intensity):
+    response = run_steps(client, photo, [{"op": "detect"}, {"op": "blur", "blur_intensity": intensity}])
+    assert response.status_code == 200
+    detect_step, blur_step = response.json()["steps"][:2]
+    assert detect_step["face_count"] > 0
+    assert blur_step["blur_intensity"] == intensity | 1
+    assert blur_step["faces_processed"] == detect_step["face_count"]
+
+@pytest.mark.parametrize("intensity", ["15", 15.5, True])
+def test_blur_non_integer_intensity_is_rejected(client, photo, intensity):
+    response = run_steps(client, photo, [{"op": "detect"}, {"op": "blur", "blur_intensity": intensity}])
+    assert response.status_code == 400
+    assert "blur_intensity" in response.json()["detail"]
+
+def test_face_indices_out_of_range_is_rejected(client, photo):
+    response = run_steps(client, photo, [{"op": "detect"}, {"op": "blur", "face_indices": [99]}])
+    assert response.status_code == 400
+    assert "out of range" in response.json()["detail"]
+
+def test_detect_follows_exif_orientation(client):
+    # Dik fotoğraf diskte 90° yatık saklanır; EXIF 6 onu görüntülerken döndürür
+    image, _ = synthetic_photo(960, 540, face_radii=(90, 80))
+    stored = Image.fromarray(cv2.cvtColor(cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE), cv2.COLOR_BGR2RGB))
+    exif = stored.getexif()
+    exif[0x0112] = 6
+    buffer = io.BytesIO()
+    stored.save(buffer, "JPEG", quality=92, exif=exif.tobytes())
+    rotated = base64.b64encode(buffer.getvalue()).decode()
+    
+    detected = client.post("/detect-face", data={"image": rotated}).json()
+    response = run_steps(client, rotated, [{"op": "detect"}])
+    assert response.status_code == 200
+    assert detected["face_count"] > 0
+    assert response.json()["steps"][0]["faces"] == detected["faces"]
@@ -155,7 +155,8 @@ class AiService {
   }
 
   // Sanatsal stil uygulama
-  Future<String> applyArtStyle(File imageFile, {String artStyle = 'van_gogh'}) async {
+  // tier: 'preview' küçük, hızlı önizleme; 'final' tam çözünürlük
+  Future<String> applyArtStyle(File imageFile, {String artStyle = 'van_gogh', String tier = 'final'}) async {
     try {
       String base64Image = await _fileToBase64(imageFile);
       
@@ -164,6 +165,7 @@ class AiService {
         data: FormData.fromMap({
           'image': base64Image,
           'art_style': artStyle,
+          'tier': tier,
         }),
         options: Options(
           contentType: 'multipart/form-data',
@@ -523,7 +525,7 @@ class AiService {
   Future<Map<String, dynamic>> smartRemovePerson(
     File imageFile,
     Map<String, dynamic> targetCoordinates,
-    {String removalMethod = 'auto'}
+    {String removalMethod = 'auto', int? totalPeople}
   ) async {
     try {
       String base64Image = await _fileToBase64(imageFile);
@@ -534,6 +536,8 @@ class AiService {
           'image': base64Image,
           'target_face_coordinates': jsonEncode(targetCoordinates),
           'removal_method': removalMethod,
+          // Önceki /count-people sonucu varsa backend tespiti tekrar yapmaz
+          if (totalPeople != null) 'people_count': totalPeople.toString(),
         }),
         options: Options(
           contentType: 'multipart/form-data',
@@ -554,7 +558,7 @@ class AiService {
   Future<Map<String, dynamic>> performAdvancedClosureCeremony(
     List<File> imageFiles,
     String personName,
-    {String artStyle = 'van_gogh', String ceremonyType = 'artistic'}
+    {String artStyle = 'van_gogh', String ceremonyType = 'artistic', String tier = 'final'}
   ) async {
     try {
       List<String> base64Images = [];
@@ -569,6 +573,7 @@ class AiService {
           'person_name': personName,
           'art_style': artStyle,
           'ceremony_type': ceremonyType,
+          'tier': tier,
         }),
         options: Options(
           contentType: 'multipart/form-data',
@@ -688,6 +693,7 @@ class AiService {
                 imageFile,
                 targetCoords,
                 removalMethod: 'inpaint',
+                totalPeople: photoData['total_people'],
               );
               
               processedResults.add({